@@ -0,0 +1,121 @@
+import os
+import random
+import zipfile
+from io import BytesIO
+from pathlib import Path
+from PIL import Image, ImageDraw, ImageFont
+import fitz
+
+WORDS = ('the quick brown fox jumps over lazy dog document page image text scan optical character recognition '
+         'table figure chapter section paragraph sample output result value number report summary').split()
+
+PAGE_WIDTH_IN = 8.27
+PAGE_HEIGHT_IN = 11.69
+
+def load_font(size_px):
+    for name in ('DejaVuSans.ttf', 'Arial.ttf', 'arial.ttf', 'LiberationSans-Regular.ttf'):
+        try:
+            return ImageFont.truetype(name, size_px)
+        except OSError:
+            pass
+
+    try:
+        return ImageFont.load_default(size=size_px)
+    except TypeError:
+        # Pillow < 10.1 only has the fixed size bitmap font
+        return ImageFont.load_default()
+
+def random_lines(rng, count, words_per_line=10):
+    return [' '.join(rng.choice(WORDS) for _ in range(words_per_line)) for _ in range(count)]
+
+def make_text_page(dpi, rng, font_pt=11, lines=40):
+    width = int(PAGE_WIDTH_IN * dpi)
+    height = int(PAGE_HEIGHT_IN * dpi)
+    font_px = max(8, int(font_pt * dpi / 72))
+    line_height = int(font_px * 1.5)
+    margin = dpi
+
+    img = Image.new('RGB', (width, height), 'white')
+    draw = ImageDraw.Draw(img)
+    font = load_font(font_px)
+
+    y = margin
+    for line in random_lines(rng, lines):
+        if y + line_height > height - margin:
+            break
+        draw.text((margin, y), line, fill='black', font=font)
+        y += line_height
+
+    return img
+
+def write_ocr_pages(folder, dpi, count, rng):
+    Path(folder).mkdir(parents=True, exist_ok=True)
+    for i in range(1, count + 1):
+        make_text_page(dpi, rng).save(os.path.join(folder, f"page_{i:03d}.png"))
+    return folder
+
+def write_jpegs(folder, count, rng, dpi=150):
+    Path(folder).mkdir(parents=True, exist_ok=True)
+    for i in range(1, count + 1):
+        make_text_page(dpi, rng).save(os.path.join(folder, f"photo_{i:03d}.jpg"), 'JPEG', quality=90)
+    return folder
+
+def write_docx(path, images):
+    # Smallest package Word2PNG cares about: content types, a document part and word/media
+    content_types = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                     '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                     '<Default Extension="xml" ContentType="application/xml"/>'
+                     '<Default Extension="png" ContentType="image/png"/>'
+                     '<Default Extension="jpeg" ContentType="image/jpeg"/>'
+                     '<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+                     '</Types>')
+    document = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body><w:p/></w:body></w:document>')
+
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as docx:
+        docx.writestr('[Content_Types].xml', content_types)
+        docx.writestr('word/document.xml', document)
+        for i, img in enumerate(images, 1):
+            buffer = BytesIO()
+            if i % 2:
+                img.save(buffer, 'PNG')
+                docx.writestr(f"word/media/image{i}.png", buffer.getvalue())
+            else:
+                img.save(buffer, 'JPEG', quality=90)
+                docx.writestr(f"word/media/image{i}.jpeg", buffer.getvalue())
+    return path
+
+def write_docxs(folder, count, images_per_doc, rng, dpi=100):
+    Path(folder).mkdir(parents=True, exist_ok=True)
+    for i in range(1, count + 1):
+        images = [make_text_page(dpi, rng) for _ in range(images_per_doc)]
+        write_docx(os.path.join(folder, f"document_{i:02d}.docx"), images)
+    return folder
+
+def write_pdf(path, pages, rng, scanned_every=2, dpi=150):
+    # Mix born-digital pages (real text layer) with scanned pages (one full page image)
+    with fitz.open() as pdf:
+        for i in range(pages):
+            page = pdf.new_page(width=PAGE_WIDTH_IN * 72, height=PAGE_HEIGHT_IN * 72)
+            if scanned_every and i % scanned_every == scanned_every - 1:
+                buffer = BytesIO()
+                make_text_page(dpi, rng).save(buffer, 'PNG')
+                page.insert_image(page.rect, stream=buffer.getvalue())
+            else:
+                page.insert_text((72, 72), "\n".join(random_lines(rng, 40)), fontsize=11)
+        pdf.save(path, garbage=3, deflate=True)
+    return path
+
+def generate_fixtures(root, pages=8, dpis=(150, 300), documents=4, seed=1234):
+    # Seeded so every run and every commit benchmarks exactly the same inputs
+    rng = random.Random(seed)
+    Path(root).mkdir(parents=True, exist_ok=True)
+
+    fixtures = {'ocr': {}, 'seed': seed, 'pages': pages}
+    for dpi in dpis:
+        fixtures['ocr'][dpi] = write_ocr_pages(os.path.join(root, f"ocr_{dpi}dpi"), dpi, pages, rng)
+
+    fixtures['jpeg'] = write_jpegs(os.path.join(root, 'jpeg'), pages, rng)
+    fixtures['docx'] = write_docxs(os.path.join(root, 'docx'), documents, max(1, pages // 2), rng)
+    fixtures['pdf'] = write_pdf(os.path.join(root, 'document.pdf'), pages * 2, rng)
+    return fixtures
@@ -0,0 +1,174 @@
+import os
+import sys
+import json
+import argparse
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, os.path.abspath(SRC_DIR))
+
+import fixtures
+import OCR_Images as ocrfast
+import OCR_Images_slow as ocrslow
+import PDF2PNG as pdf2png
+import PageDPI as pdpi
+import JPEG2PNG as jpeg2png
+import Word2PNG as word2png
+import Batch as batch
+import Report as rpt
+
+SUITES = ['ocr_fast', 'ocr_slow', 'pdf2png', 'jpeg2png', 'word2png']
+
+def parse_int_list(value):
+    return [int(v) for v in value.split(',') if v.strip()]
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=SRC_DIR, text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_case(name, params, func, scratch, repeat):
+    runs = []
+    for _ in range(repeat):
+        output_folder = tempfile.mkdtemp(prefix=f"{name}_", dir=scratch)
+        # The report doubles as a silent event sink, so the timings are the converters' own
+        report = rpt.RunReport(name, params)
+        start = time.perf_counter()
+        count = func(output_folder, report)
+        seconds = time.perf_counter() - start
+        shutil.rmtree(output_folder, ignore_errors=True)
+
+        result = report.to_dict()
+        result['seconds'] = seconds
+        result['count'] = count
+        runs.append(result)
+
+    best = min(runs, key=lambda r: r['seconds'])
+    print(f"{name:<10} {json.dumps(params):<45} {best['seconds']:8.3f}s  {best['throughput']:7.2f} items/s")
+    return {'name': name, 'params': params, 'best_seconds': best['seconds'], 'runs': runs}
+
+def build_cases(suites, fixture_paths, workers_list, language):
+    cases = []
+
+    if 'ocr_fast' in suites:
+        for dpi, folder in fixture_paths['ocr'].items():
+            for engine in ('threads', 'processes'):
+                for workers in workers_list:
+                    params = {'dpi': dpi, 'engine': engine, 'workers': workers}
+                    func = lambda out, events, folder=folder, engine=engine, workers=workers: \
+                        ocrfast.fast_ocr_images(folder, out, language, workers, engine, events=events)
+                    cases.append(('ocr_fast', params, func))
+
+    if 'ocr_slow' in suites:
+        for dpi, folder in fixture_paths['ocr'].items():
+            func = lambda out, events, folder=folder: ocrslow.ocr_images_to_individual_files(folder, out, language, events=events)
+            cases.append(('ocr_slow', {'dpi': dpi, 'workers': 1}, func))
+
+    if 'pdf2png' in suites:
+        for dpi in list(fixture_paths['ocr']) + [pdpi.AUTO]:
+            for workers in workers_list:
+                func = lambda out, events, dpi=dpi, workers=workers: \
+                    pdf2png.extract_images_from_pdf(fixture_paths['pdf'], out, dpi, workers=workers, events=events)
+                cases.append(('pdf2png', {'dpi': dpi, 'workers': workers}, func))
+
+    if 'jpeg2png' in suites:
+        for profile in jpeg2png.PROFILES:
+            for workers in workers_list:
+                func = lambda out, events, profile=profile, workers=workers: \
+                    jpeg2png.convert_jpeg_to_png(fixture_paths['jpeg'], out, events=events, workers=workers, profile=profile)
+                cases.append(('jpeg2png', {'profile': profile, 'workers': workers}, func))
+
+    if 'word2png' in suites:
+        for workers in workers_list:
+            func = lambda out, events, workers=workers: \
+                word2png.extract_images_from_docxs(batch.build_jobs(fixture_paths['docx'], out, {'.docx'}), workers, events)
+            cases.append(('word2png', {'workers': workers}, func))
+
+    return cases
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    previous = {(c['name'], json.dumps(c['params'], sort_keys=True)): c['best_seconds'] for c in baseline['cases']}
+    regressions = 0
+
+    print("-" * 50)
+    print(f"Compared with {baseline_path} ({baseline.get('commit') or 'unknown commit'})")
+    for case in results['cases']:
+        before = previous.get((case['name'], json.dumps(case['params'], sort_keys=True)))
+        if not before:
+            continue
+
+        ratio = case['best_seconds'] / before
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  REGRESSION'
+            regressions += 1
+        print(f"{case['name']:<10} {json.dumps(case['params']):<45} {before:8.3f}s -> {case['best_seconds']:8.3f}s  x{ratio:.2f}{flag}")
+
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the OCR and rasterization paths on synthetic fixtures', prog='run_benchmarks')
+    parser.add_argument('-o', '--output', default='benchmark_results.json', help='JSON file for the results (default: benchmark_results.json)')
+    parser.add_argument('--suites', default=','.join(SUITES), help=f'Comma separated suites to run (default: {",".join(SUITES)})')
+    parser.add_argument('--workers', type=parse_int_list, default=[1, 2, 4], help='Comma separated worker counts (default: 1,2,4)')
+    parser.add_argument('--dpis', type=parse_int_list, default=[150, 300], help='Comma separated DPIs for the OCR pages and PDF rendering (default: 150,300)')
+    parser.add_argument('--pages', type=int, default=8, help='Pages per fixture (default: 8)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per case; the fastest one is compared (default: 3)')
+    parser.add_argument('--lang', default='eng', help='OCR language (default: eng)')
+    parser.add_argument('--fixtures', default=None, help='Keep generated fixtures in this folder instead of a temporary one')
+    parser.add_argument('--compare', default=None, help='Previous results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Slowdown reported as a regression (default: 0.10 = 10%%)')
+
+    args = parser.parse_args()
+
+    suites = [s.strip() for s in args.suites.split(',') if s.strip()]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(sorted(unknown))}")
+
+    scratch = tempfile.mkdtemp(prefix='word2txt_bench_')
+    fixture_root = args.fixtures or os.path.join(scratch, 'fixtures')
+
+    try:
+        print(f"Generating fixtures in {fixture_root}")
+        fixture_paths = fixtures.generate_fixtures(fixture_root, args.pages, args.dpis)
+
+        results = {
+            'commit': git_commit(),
+            'created': time.time(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'settings': {'pages': args.pages, 'dpis': args.dpis, 'workers': args.workers, 'repeat': args.repeat, 'lang': args.lang, 'seed': fixture_paths['seed']},
+            'cases': [],
+        }
+
+        print("-" * 50)
+        for name, params, func in build_cases(suites, fixture_paths, args.workers, args.lang):
+            results['cases'].append(run_case(name, params, func, scratch, args.repeat))
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    if os.path.dirname(args.output):
+        Path(os.path.dirname(args.output)).mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, default=str)
+    print(f"Results: {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"{regressions} regressions")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
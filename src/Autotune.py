@@ -0,0 +1,90 @@
+import os
+from contextlib import contextmanager
+
+AUTO = 'auto'
+MAX_THREADS_PER_WORKER = 4
+
+def parse_workers(value):
+    if str(value).lower() == AUTO:
+        return AUTO
+    return int(value)
+
+def candidate_configs(cpu_count=None):
+    # Same total core budget split differently: many single-threaded workers first,
+    # then fewer workers that each let tesseract use more OpenMP threads
+    cpus = cpu_count or os.cpu_count() or 1
+    configs = []
+    threads = 1
+    while threads <= min(cpus, MAX_THREADS_PER_WORKER):
+        configs.append((max(1, cpus // threads), threads))
+        threads *= 2
+    return configs
+
+def default_threads_per_worker(workers, cpu_count=None):
+    cpus = cpu_count or os.cpu_count() or 1
+    return max(1, min(MAX_THREADS_PER_WORKER, cpus // max(1, workers)))
+
+@contextmanager
+def omp_thread_limit(threads):
+    # tesseract reads OMP_THREAD_LIMIT when it starts, and child processes inherit it
+    previous = os.environ.get('OMP_THREAD_LIMIT')
+    if threads is not None:
+        os.environ['OMP_THREAD_LIMIT'] = str(threads)
+    try:
+        yield
+    finally:
+        if previous is None:
+            os.environ.pop('OMP_THREAD_LIMIT', None)
+        else:
+            os.environ['OMP_THREAD_LIMIT'] = previous
+
+class AutoTuner:
+    def __init__(self, total_items, cpu_count=None, probe_rounds=2, tolerance=0.05):
+        self.candidates = candidate_configs(cpu_count)
+        self.probe_rounds = probe_rounds
+        self.tolerance = tolerance
+        self.remaining = total_items
+        self.results = []
+        self.next_index = 0
+        self.done = False
+
+    def probe_size(self, config):
+        return config[0] * self.probe_rounds
+
+    def next_probe(self):
+        # Returns (workers, threads, items) to measure, or None once tuning has converged
+        if self.done or self.next_index >= len(self.candidates):
+            self.done = True
+            return None
+
+        config = self.candidates[self.next_index]
+        size = self.probe_size(config)
+        # Keep at least one more probe's worth of items for the chosen configuration
+        if self.remaining < size * 2:
+            self.done = True
+            return None
+
+        self.next_index += 1
+        return config[0], config[1], size
+
+    def record(self, workers, threads, items, seconds):
+        self.remaining -= items
+        rate = items / seconds if seconds > 0 else 0.0
+        self.results.append({'workers': workers, 'threads': threads, 'items': items, 'seconds': seconds, 'rate': rate})
+
+        # Throughput is close to unimodal in the split, so stop at the first clear drop
+        best = self.best_result()
+        if rate < best['rate'] * (1 - self.tolerance):
+            self.done = True
+        return rate
+
+    def best_result(self):
+        if not self.results:
+            return None
+        return max(self.results, key=lambda r: r['rate'])
+
+    def best(self):
+        best = self.best_result()
+        if best is None:
+            return self.candidates[0]
+        return best['workers'], best['threads']
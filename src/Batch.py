@@ -0,0 +1,77 @@
+import os
+import glob
+import json
+import csv
+from itertools import zip_longest
+from pathlib import Path
+
+def is_glob(path):
+    return any(ch in path for ch in '*?[')
+
+def is_batch_input(input_path, manifest=None):
+    return bool(manifest) or (input_path is not None and (os.path.isdir(input_path) or is_glob(input_path)))
+
+def collect_documents(input_path, extensions):
+    if os.path.isdir(input_path):
+        candidates = [os.path.join(input_path, f) for f in os.listdir(input_path)]
+    elif is_glob(input_path):
+        candidates = glob.glob(input_path, recursive=True)
+    else:
+        candidates = [input_path]
+
+    return sorted(f for f in candidates if os.path.isfile(f) and os.path.splitext(f)[1].lower() in extensions)
+
+def load_manifest(manifest_path):
+    # Entries are (input, output) pairs; output may be None to use the default subfolder
+    entries = []
+
+    if manifest_path.lower().endswith('.csv'):
+        with open(manifest_path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                if row.get('input'):
+                    entries.append((row['input'], row.get('output') or None))
+    else:
+        with open(manifest_path, encoding='utf-8') as f:
+            data = json.load(f)
+
+        if isinstance(data, dict):
+            data = data.get('jobs', [])
+
+        for item in data:
+            if isinstance(item, str):
+                entries.append((item, None))
+            elif item.get('input'):
+                entries.append((item['input'], item.get('output')))
+
+    # Relative paths in a manifest are relative to the manifest itself
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    return [(os.path.join(base, src), os.path.join(base, dst) if dst else None) for src, dst in entries]
+
+def unique_name(name, used_names):
+    # Inputs from different folders can share a name; later ones get _02, _03, ...
+    unique = name
+    counter = 2
+    while unique in used_names:
+        unique = f"{name}_{counter:02d}"
+        counter += 1
+    used_names.add(unique)
+    return unique
+
+def build_jobs(input_path, output_folder, extensions, manifest=None):
+    entries = []
+    if manifest:
+        entries.extend(load_manifest(manifest))
+    if input_path:
+        entries.extend((doc, None) for doc in collect_documents(input_path, extensions))
+
+    jobs = []
+    used_names = set()
+    for src, dst in entries:
+        if dst is None:
+            dst = os.path.join(output_folder, unique_name(Path(src).stem, used_names))
+        jobs.append((src, dst))
+
+    return jobs
+
+def interleave(task_lists):
+    return [task for group in zip_longest(*task_lists) for task in group if task is not None]
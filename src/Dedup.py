@@ -0,0 +1,162 @@
+import os
+import json
+import hashlib
+import Journal as jnl
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+DUPLICATES_NAME = 'duplicates.json'
+HASH_CHUNK = 1024 * 1024
+
+# 16x16 difference hash: coarse enough to match re-encoded or re-scaled copies,
+# fine enough that two different pages of body text rarely collide
+DHASH_SIZE = 16
+DEFAULT_MAX_DISTANCE = 6
+# Copies must also have nearly the same shape
+MAX_ASPECT_DIFFERENCE = 0.02
+
+def has_pil():
+    return Image is not None
+
+def sha256_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+def sha256_stream(f):
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+def sha256_file(path):
+    with open(path, 'rb') as f:
+        return sha256_stream(f)
+
+def dhash(img, size=DHASH_SIZE):
+    # One bit per pair of horizontal neighbours on a tiny grayscale copy
+    small = img.convert('L').resize((size + 1, size), Image.BILINEAR)
+    pixels = small.tobytes()
+    bits = 0
+    for row in range(size):
+        offset = row * (size + 1)
+        for col in range(size):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return bits
+
+def image_fingerprint(path):
+    with Image.open(path) as img:
+        # JPEG decoders can skip straight to a reduced size, which is all the hash needs
+        img.draft('L', (DHASH_SIZE * 8, DHASH_SIZE * 8))
+        return dhash(img), img.width / max(1, img.height)
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+class DuplicateFinder:
+    # Remembers the first item of each content; add() returns that first item for every later copy
+    def __init__(self, similar=False, max_distance=DEFAULT_MAX_DISTANCE):
+        self.similar = similar
+        self.max_distance = max_distance
+        self.exact = {}
+        self.fingerprints = []
+
+    def add(self, key, content, path=None):
+        # content is anything that identifies the bytes, e.g. a SHA-256 or (size, SHA-256)
+        original = self.exact.get(content)
+        if original is not None:
+            return original
+        self.exact[content] = key
+
+        if self.similar and path is not None:
+            try:
+                fingerprint, aspect = image_fingerprint(path)
+            except Exception:
+                return None
+
+            for other_fingerprint, other_aspect, other_key in self.fingerprints:
+                if abs(aspect - other_aspect) <= MAX_ASPECT_DIFFERENCE * other_aspect and hamming(fingerprint, other_fingerprint) <= self.max_distance:
+                    return other_key
+            self.fingerprints.append((fingerprint, aspect, key))
+
+        return None
+
+def duplicates_path(folder):
+    return os.path.join(folder, DUPLICATES_NAME)
+
+def load_duplicates(folder):
+    # {duplicate file name: original file name} written by Word2PNG
+    path = duplicates_path(folder)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return {str(k): str(v) for k, v in data.items()} if isinstance(data, dict) else {}
+
+def save_duplicates(folder, duplicates):
+    # Several documents may share an output folder, so earlier entries are kept
+    merged = load_duplicates(folder)
+    merged.update(duplicates)
+    jnl.atomic_write_text(duplicates_path(folder), json.dumps(merged, indent=2, ensure_ascii=False, sort_keys=True))
+
+def forget_duplicates(folder, originals):
+    # Drop the copies of images that are being replaced, so they don't point at a file from another run
+    originals = set(originals)
+    duplicates = load_duplicates(folder)
+    kept = {name: original for name, original in duplicates.items() if original not in originals}
+    if len(kept) != len(duplicates):
+        jnl.atomic_write_text(duplicates_path(folder), json.dumps(kept, indent=2, ensure_ascii=False, sort_keys=True))
+
+def resolve(duplicates):
+    # Point every duplicate at the original that is actually processed, never at another duplicate
+    resolved = {}
+    for duplicate in duplicates:
+        original = duplicates[duplicate]
+        seen = {duplicate}
+        while original in duplicates and original not in seen:
+            seen.add(original)
+            original = duplicates[original]
+        if original != duplicate:
+            resolved[duplicate] = original
+    return resolved
+
+def plan_pages(input_folder, image_paths, exact=True, similar=False, max_distance=DEFAULT_MAX_DISTANCE, journal=None):
+    # Returns (pages, duplicates): every page to report in order, and {duplicate path: original path}.
+    # Duplicates that Word2PNG never wrote to disk are listed in duplicates.json and still get their own page.
+    # Only files that share their size are hashed, through the journal when given so a resumed run doesn't hash them again.
+    present = set(image_paths)
+    duplicates = {}
+    for name, original in load_duplicates(input_folder).items():
+        path = os.path.join(input_folder, name)
+        original_path = os.path.join(input_folder, original)
+        if path not in present and original_path in present:
+            duplicates[path] = original_path
+
+    if exact or similar:
+        hash_file = journal.cached_sha256 if journal is not None else sha256_file
+        sizes = {path: os.path.getsize(path) for path in image_paths}
+        same_size = {}
+        for size in sizes.values():
+            same_size[size] = same_size.get(size, 0) + 1
+
+        finder = DuplicateFinder(similar and has_pil(), max_distance)
+        for path in sorted(image_paths):
+            size = sizes[path]
+            content = (size, hash_file(path)) if same_size[size] > 1 else (size,)
+            original = finder.add(path, content, path)
+            if original is not None:
+                duplicates[path] = original
+
+    duplicates = resolve(duplicates)
+    pages = sorted(present | set(duplicates))
+    return pages, duplicates
+
+def copies_of(duplicates):
+    copies = {}
+    for duplicate, original in sorted(duplicates.items()):
+        copies.setdefault(original, []).append(duplicate)
+    return copies
@@ -1,106 +1,205 @@
 import os
+import csv
 import argparse
 from pathlib import Path
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from PIL import Image
-
-def convert_jpeg_to_png(input_folder, output_folder, quality=95):
-    Path(output_folder).mkdir(parents=True, exist_ok=True)
-
-    jpeg_extensions = {'.jpg', '.jpeg', '.jpe', '.jfif'}
-    jpeg_files = []
-
+import Journal as jnl
+import Progress as progress
+import Report as rpt
+
+JPEG_EXTENSIONS = {'.jpg', '.jpeg', '.jpe', '.jfif'}
+
+# Speed/size trade-off for the encoder. zlib level 9 with optimize is what every conversion used before
+PROFILES = {
+    'fast': {'compress_level': 1, 'optimize': False},
+    'balanced': {'compress_level': 6, 'optimize': False},
+    'small': {'compress_level': 9, 'optimize': True},
+}
+DEFAULT_PROFILE = 'small'
+
+TARGETS = {
+    'png': {'extensions': JPEG_EXTENSIONS, 'suffix': '.png', 'label': 'JPEG', 'alpha_modes': ('P', 'RGBA', 'LA')},
+    'jpeg': {'extensions': {'.png'}, 'suffix': '.jpg', 'label': 'PNG', 'alpha_modes': ('RGBA', 'LA', 'P')},
+}
+
+def list_inputs(input_folder, extensions):
+    files = []
     for f in os.listdir(input_folder):
         file_path = os.path.join(input_folder, f)
-        if os.path.isfile(file_path) and os.path.splitext(f)[1].lower() in jpeg_extensions:
-            jpeg_files.append(f)
-
-    if not jpeg_files:
-        print("No JPEG files found in the input folder")
-        return 0
-
-    jpeg_files.sort()
-
-    print(f"Found {len(jpeg_files)} JPEG files for conversion")
-    print("-" * 50)
-
-    success_count = 0
-    for jpeg_file in jpeg_files:
-        try:
-            input_path = os.path.join(input_folder, jpeg_file)
-            output_filename = Path(jpeg_file).stem + '.png'
-            output_path = os.path.join(output_folder, output_filename)
+        if os.path.isfile(file_path) and os.path.splitext(f)[1].lower() in extensions:
+            files.append(f)
+    return sorted(files)
+
+def convert_file(input_path, output_path, target='png', quality=85, profile=DEFAULT_PROFILE, max_size=None):
+    # Top-level so pool workers can run it; returns sizes and stage timings
+    settings = PROFILES[profile]
+    item_start = time.perf_counter()
+
+    with Image.open(input_path) as img:
+        if max_size and img.format == 'JPEG':
+            # The JPEG decoder can scale by 1/2, 1/4 or 1/8 while decoding, far cheaper than a full decode and resize
+            img.draft('RGB', (max_size, max_size))
+        img.load()
+        decoded = time.perf_counter()
+
+        if img.mode in TARGETS[target]['alpha_modes']:
+            img = img.convert('RGB')
+        if max_size and max(img.size) > max_size:
+            img.thumbnail((max_size, max_size))
+        converted = time.perf_counter()
+
+        if target == 'png':
+            img.save(output_path, 'PNG', optimize=settings['optimize'], compress_level=settings['compress_level'])
+        else:
+            img.save(output_path, 'JPEG', quality=quality, optimize=settings['optimize'])
+
+    end = time.perf_counter()
+    timings = {'decode': decoded - item_start, 'convert': converted - decoded, 'encode_write': end - converted, 'total': end - item_start}
+    return {'input_size': os.path.getsize(input_path), 'output_size': os.path.getsize(output_path), 'timings': timings}
+
+def write_summary(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['file', 'output', 'input_bytes', 'output_bytes', 'seconds', 'status'])
+        writer.writerows(rows)
+
+def convert_images(input_folder, output_folder, target='png', quality=85, events=None, cancel_event=None, workers=1, profile=DEFAULT_PROFILE, max_size=None, summary_path=None, incremental=False):
+    if events is None:
+        events = progress.ConsoleReporter()
 
-            with Image.open(input_path) as img:
-                if img.mode in ('P', 'RGBA', 'LA'):
-                    img = img.convert('RGB')
-
-                img.save(output_path, 'PNG', optimize=True)
-
-            input_size = os.path.getsize(input_path)
-            output_size = os.path.getsize(output_path)
-
-            print(f"Converted: {jpeg_file} → {output_filename}")
-            print(f"Size: {input_size:,} bytes → {output_size:,} bytes")
-
-            success_count += 1
-
-        except Exception as e:
-            print(f"Failed to convert {jpeg_file}: {e}")
-
-    return success_count
-
-def convert_png_to_jpeg(input_folder, output_folder, quality=85):
     Path(output_folder).mkdir(parents=True, exist_ok=True)
 
-    png_files = [f for f in os.listdir(input_folder) if f.lower().endswith('.png') and os.path.isfile(os.path.join(input_folder, f))]
+    spec = TARGETS[target]
+    files = list_inputs(input_folder, spec['extensions'])
 
-    if not png_files:
-        print("No PNG files found in the input folder")
+    if not files:
+        progress.emit(events, progress.FINISHED, f"No {spec['label']} files found in the input folder")
         return 0
 
-    png_files.sort()
-
-    print(f"Found {len(png_files)} PNG files for conversion to JPEG")
-    print("-" * 50)
-
+    jobs = [(f, Path(f).stem + spec['suffix']) for f in files]
+    total = len(jobs)
+
+    journal = jnl.Journal(jnl.journal_path(output_folder)) if incremental else None
+    settings = f"{target}:{quality}:{profile}:{max_size}"
+    skipped_count = 0
+    if journal is not None:
+        # A stat per file, so an archive that only grows costs almost nothing to re-run
+        jobs = [(name, output_filename) for name, output_filename in jobs
+                if journal.source_outputs(os.path.join(input_folder, name), settings) is None]
+        skipped_count = total - len(jobs)
+
+    workers = max(1, min(workers or os.cpu_count() or 1, max(1, len(jobs))))
+    header = f"Found {total} {spec['label']} files for conversion to {target.upper()}"
+    header += f"\nProfile: {profile}" + (f", using {workers} processes" if workers > 1 else "")
+    if skipped_count:
+        header += f"\nSkipping {skipped_count} files that are unchanged since the last run"
+    progress.emit(events, progress.STARTED, header + "\n" + "-" * 50, total=total, workers=workers)
+
+    start_time = time.time()
     success_count = 0
-    for png_file in png_files:
-        try:
-            input_path = os.path.join(input_folder, png_file)
-            output_filename = Path(png_file).stem + '.jpg'
-            output_path = os.path.join(output_folder, output_filename)
-
-            with Image.open(input_path) as img:
-                if img.mode in ('RGBA', 'LA', 'P'):
-                    img = img.convert('RGB')
-
-                img.save(output_path, 'JPEG', quality=quality, optimize=True)
-
-            input_size = os.path.getsize(input_path)
-            output_size = os.path.getsize(output_path)
-
-            print(f"Converted: {png_file} → {output_filename}")
-            print(f"Size: {input_size:,} bytes → {output_size:,} bytes")
-            print(f"Compression: {((input_size - output_size) / input_size * 100):.1f}% reduction")
-
-            success_count += 1
-
-        except Exception as e:
-            print(f"Failed to convert {png_file}: {e}")
-
-    return success_count
-
-def main():
-    parser = argparse.ArgumentParser(description='Convert between JPEG and PNG formats', formatter_class=argparse.RawDescriptionHelpFormatter)
-
-    parser.add_argument('-i', '--input', required=True, help='Input folder containing images')
-    parser.add_argument('-o', '--output', required=True,help='Output folder for converted images')
+    done_count = skipped_count
+    input_total = 0
+    output_total = 0
+    rows = []
+
+    def report(name, output_filename, record=None, error=None):
+        nonlocal success_count, done_count, input_total, output_total
+        done_count += 1
+        if error is not None:
+            rows.append([name, output_filename, '', '', '', f"error: {error}"])
+            progress.emit(events, progress.ERROR, f"Failed to convert {name}: {error}",
+                          item=name, done=done_count, total=total, status='error', error=str(error))
+            return
+
+        input_size, output_size = record['input_size'], record['output_size']
+        seconds = record['timings']['total']
+        success_count += 1
+        input_total += input_size
+        output_total += output_size
+        rows.append([name, output_filename, input_size, output_size, f"{seconds:.3f}", 'success'])
+        if journal is not None:
+            journal.record_source(os.path.join(input_folder, name), [os.path.join(output_folder, output_filename)], settings)
+        message = f"Converted: {name} → {output_filename}\nSize: {input_size:,} bytes → {output_size:,} bytes in {seconds:.2f}s"
+        if target == 'jpeg' and input_size:
+            message += f"\nCompression: {((input_size - output_size) / input_size * 100):.1f}% reduction"
+        progress.emit(events, progress.PAGE_DONE, message,
+                      item=name, done=done_count, total=total, status='success',
+                      timings=record['timings'], input_size=input_size, output_size=output_size)
+
+    if workers == 1:
+        for name, output_filename in jobs:
+            if cancel_event is not None and cancel_event.is_set():
+                progress.emit(events, progress.INFO, "Cancelled")
+                break
+            try:
+                record = convert_file(os.path.join(input_folder, name), os.path.join(output_folder, output_filename), target, quality, profile, max_size)
+            except Exception as e:
+                report(name, output_filename, error=e)
+            else:
+                report(name, output_filename, record)
+    else:
+        # Encoding is CPU bound and holds the GIL, so each file goes to its own process
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(convert_file, os.path.join(input_folder, name), os.path.join(output_folder, output_filename), target, quality, profile, max_size): (name, output_filename)
+                       for name, output_filename in jobs}
+
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+
+                name, output_filename = futures[future]
+                try:
+                    report(name, output_filename, future.result())
+                except Exception as e:
+                    report(name, output_filename, error=e)
+
+                if cancel_event is not None and cancel_event.is_set():
+                    for pending in futures:
+                        pending.cancel()
+
+    if journal is not None:
+        journal.close()
+    if summary_path:
+        write_summary(summary_path, sorted(rows))
+
+    elapsed = time.time() - start_time
+    footer = []
+    if success_count:
+        change = (output_total - input_total) / input_total * 100 if input_total else 0.0
+        footer.append(f"Total size: {input_total:,} bytes → {output_total:,} bytes ({change:+.1f}%)")
+        footer.append(f"Converted {success_count} files in {elapsed:.2f} seconds ({success_count / max(elapsed, 1e-9):.2f} files/second)")
+    if skipped_count:
+        footer.append(f"Up to date: {skipped_count} files")
+    if summary_path:
+        footer.append(f"Per-file summary: {summary_path}")
+    progress.emit(events, progress.FINISHED, "\n".join(footer), done=done_count, total=total, elapsed=elapsed, success=success_count,
+                  input_bytes=input_total, output_bytes=output_total, skipped=skipped_count)
+
+    # Files that were already up to date count as done, so a re-run with nothing new still succeeds
+    return success_count + skipped_count
+
+def convert_jpeg_to_png(input_folder, output_folder, quality=95, events=None, cancel_event=None, workers=1, profile=DEFAULT_PROFILE, max_size=None, summary_path=None, incremental=False):
+    return convert_images(input_folder, output_folder, 'png', quality, events, cancel_event, workers, profile, max_size, summary_path, incremental)
+
+def convert_png_to_jpeg(input_folder, output_folder, quality=85, events=None, cancel_event=None, workers=1, profile=DEFAULT_PROFILE, max_size=None, summary_path=None, incremental=False):
+    return convert_images(input_folder, output_folder, 'jpeg', quality, events, cancel_event, workers, profile, max_size, summary_path, incremental)
+
+def add_arguments(parser, required=True):
+    parser.add_argument('-i', '--input', required=required, help='Input folder containing images')
+    parser.add_argument('-o', '--output', required=required, help='Output folder for converted images')
     parser.add_argument('--to', choices=['png', 'jpeg'], default='png',help='Target format (default: png)')
     parser.add_argument('--quality', type=int, default=85,help='JPEG quality (1-100, default: 85)')
-
-    args = parser.parse_args()
-
+    parser.add_argument('--workers', type=int, default=None, help='Number of processes converting files in parallel (default: CPU count)')
+    parser.add_argument('--profile', choices=list(PROFILES), default=DEFAULT_PROFILE, help=f'Encoder speed/size trade-off: fast (zlib level 1), balanced (level 6) or small (level 9 + optimize) (default: {DEFAULT_PROFILE})')
+    parser.add_argument('--max-size', type=int, default=None, help='Shrink images so the longest side is at most this many pixels; JPEGs are decoded at reduced size directly')
+    parser.add_argument('--summary', default=None, help='Write a CSV with the size and conversion time of every file to this path')
+    parser.add_argument('--incremental', action='store_true', help='Skip files that are unchanged since the last run (size, mtime and hash are kept in the output folder\'s job journal)')
+    parser.add_argument('--report', default=None, help='Write a JSON run report with throughput, latency percentiles and per-stage timings to this path')
+
+def run(args):
     if not os.path.exists(args.input):
         print(f"Error: Input folder does not exist: {args.input}")
         sys.exit(1)
@@ -110,10 +209,15 @@ def main():
     print(f"Target format: {args.to.upper()}")
     print("-" * 50)
 
-    if args.to == 'png':
-        success_count = convert_jpeg_to_png(args.input, args.output)
-    else:
-        success_count = convert_png_to_jpeg(args.input, args.output, args.quality)
+    report = rpt.RunReport('JPEG2PNG', vars(args)) if args.report else None
+    events = progress.MultiSink(progress.ConsoleReporter(), report)
+
+    success_count = convert_images(args.input, args.output, args.to, args.quality, events, workers=args.workers, profile=args.profile,
+                                   max_size=args.max_size, summary_path=args.summary, incremental=args.incremental)
+
+    if report is not None:
+        report.write(args.report)
+        print(f"Run report: {args.report}")
 
     print("-" * 50)
     if success_count > 0:
@@ -123,5 +227,10 @@ def main():
         print("No images were converted successfully")
         sys.exit(1)
 
+def main():
+    parser = argparse.ArgumentParser(description='Convert between JPEG and PNG formats', formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    run(parser.parse_args())
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,500 @@
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import asyncio
+import argparse
+import itertools
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qs, unquote
+import OCR_Cache as ocrcache
+import OCR_Engine as ocrengine
+import Autotune as autotune
+import PageDPI as pdpi
+import Pipeline as pl
+import Sinks as snk
+import Progress as progress
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_SPOOL_FOLDER = os.path.join(os.path.expanduser('~'), '.cache', 'word2txt', 'jobs')
+DEFAULT_MAX_UPLOAD_MB = 512
+DEFAULT_KEEP_JOBS = 1000
+DEFAULT_MAX_POOLS = 2
+MAX_JSON_BYTES = 1024 * 1024
+UPLOAD_CHUNK = 1024 * 1024
+DOWNLOAD_CHUNK = 1024 * 1024
+LOCAL_HOSTS = ('127.0.0.1', 'localhost', '::1')
+MESSAGE_TAIL = 50
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINAL = (DONE, FAILED, CANCELLED)
+
+HTTP_REASONS = {200: 'OK', 202: 'Accepted', 400: 'Bad Request', 403: 'Forbidden', 404: 'Not Found', 405: 'Method Not Allowed',
+                409: 'Conflict', 411: 'Length Required', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+CONTENT_TYPES = {'.txt': 'text/plain; charset=utf-8', '.jsonl': 'application/x-ndjson', '.json': 'application/json',
+                 '.hocr': 'text/html; charset=utf-8', '.html': 'text/html; charset=utf-8', '.xml': 'application/xml', '.pdf': 'application/pdf'}
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def response_head(status, content_type, length):
+    return (f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {length}\r\nConnection: close\r\n\r\n").encode('latin-1')
+
+def parse_bool(value):
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'on')
+
+def job_settings(values):
+    # Same names as the run command's options; strings (from a query string) are parsed the way the command line would
+    if not isinstance(values, dict):
+        raise HttpError(400, "settings must be an object")
+
+    settings = {}
+    for key, value in values.items():
+        if key not in pl.DEFAULTS:
+            raise HttpError(400, f"Unknown setting: {key} (choose from {', '.join(pl.DEFAULTS)})")
+        default = pl.DEFAULTS[key]
+        try:
+            if key == 'format':
+                value = snk.parse_formats(value if isinstance(value, str) else ','.join(value))
+            elif key == 'dpi':
+                value = pdpi.parse_dpi(value)
+            elif key in pl.CHOICES and value not in pl.CHOICES[key]:
+                raise ValueError(f"choose from {', '.join(pl.CHOICES[key])}")
+            elif isinstance(default, bool):
+                value = parse_bool(value)
+            elif isinstance(default, int) and isinstance(value, str):
+                value = int(value)
+        except (ValueError, TypeError, argparse.ArgumentTypeError) as e:
+            raise HttpError(400, f"Invalid {key}: {e}")
+        settings[key] = value
+    return settings
+
+class Job:
+    def __init__(self, job_id, input_path, output_folder, settings, priority):
+        self.id = job_id
+        self.input = input_path
+        self.output = output_folder
+        self.settings = settings
+        self.priority = priority
+        self.status = QUEUED
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.pages = None
+        self.error = None
+        self.done = 0
+        self.total = 0
+        self.messages = deque(maxlen=MESSAGE_TAIL)
+        self.cancel_event = threading.Event()
+        self.lock = threading.Lock()
+
+    def on_event(self, event):
+        # Progress sink for the pipeline; runs on worker threads
+        with self.lock:
+            if event.total:
+                self.done, self.total = event.done, event.total
+            if event.message:
+                self.messages.append(event.message)
+
+    def finish(self, status, error=None):
+        self.status = status
+        self.error = error
+        self.finished = time.time()
+
+    def to_dict(self, messages=False):
+        with self.lock:
+            data = {'id': self.id, 'status': self.status, 'priority': self.priority, 'input': self.input, 'output': self.output,
+                    'submitted': self.submitted, 'started': self.started, 'finished': self.finished,
+                    'done': self.done, 'total': self.total, 'pages': self.pages, 'error': self.error,
+                    'settings': {key: value for key, value in self.settings.items() if value != pl.DEFAULTS.get(key)}}
+            if messages:
+                data['messages'] = list(self.messages)
+        return data
+
+class JobServer:
+    # Jobs wait in a priority queue and run on a few threads; OCR goes to process pools that stay warm between jobs
+    def __init__(self, workers=None, slots=1, engine='processes', cache=None, spool_folder=DEFAULT_SPOOL_FOLDER,
+                 max_upload_mb=DEFAULT_MAX_UPLOAD_MB, keep_jobs=DEFAULT_KEEP_JOBS, max_pools=DEFAULT_MAX_POOLS, events=None, roots=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.slots = max(1, slots)
+        self.engine = engine
+        self.cache = cache
+        self.spool_folder = os.path.abspath(spool_folder)
+        # Folders jobs may read from and write to besides the spool; None allows any path the server user can reach
+        self.roots = [os.path.realpath(root) for root in roots] if roots else None
+        self.max_upload_bytes = max_upload_mb * 1024 * 1024
+        self.keep_jobs = keep_jobs
+        self.max_pools = max(1, max_pools)
+        self.events = events
+
+        self.jobs = OrderedDict()
+        self.queue = None
+        self.order = itertools.count()
+        self.executor = ThreadPoolExecutor(max_workers=self.slots)
+        self.runners = []
+
+        # One pool per (language, preprocess), since both are fixed when the workers start
+        self.pools = OrderedDict()
+        self.pools_in_use = {}
+        self.pool_lock = threading.Lock()
+
+    def acquire_pool(self, language, preprocess):
+        key = (language, preprocess)
+        with self.pool_lock:
+            pool = self.pools.pop(key, None)
+            if pool is None:
+                self.evict_pools(self.max_pools - 1)
+                pool = ocrengine.create_ocr_pool(language, self.workers, cache=self.cache, preprocess=preprocess)
+                progress.emit(self.events, progress.INFO, f"Started {self.workers} OCR workers for {language}" + (" with preprocessing" if preprocess else ""))
+            self.pools[key] = pool
+            self.pools_in_use[key] = self.pools_in_use.get(key, 0) + 1
+            return pool
+
+    def release_pool(self, language, preprocess):
+        with self.pool_lock:
+            self.pools_in_use[(language, preprocess)] -= 1
+
+    def evict_pools(self, keep):
+        # Least recently used first, and never a pool a running job still holds
+        for key in list(self.pools):
+            if len(self.pools) <= keep:
+                break
+            if not self.pools_in_use.get(key):
+                self.pools.pop(key).shutdown(wait=False)
+
+    def check_path(self, path):
+        if self.roots is None:
+            return
+        real = os.path.realpath(path)
+        for root in self.roots + [os.path.realpath(self.spool_folder)]:
+            if real == root or real.startswith(root.rstrip(os.sep) + os.sep):
+                return
+        raise HttpError(403, f"{path} is outside the folders this server may use")
+
+    def submit(self, spec, job_id=None):
+        if not isinstance(spec, dict):
+            raise HttpError(400, "A job must be a JSON object")
+        if not spec.get('input'):
+            raise HttpError(400, "input is required")
+
+        input_path = os.path.abspath(spec['input'])
+        self.check_path(input_path)
+        settings = job_settings(spec.get('settings') or {})
+        try:
+            pl.source_kind(input_path, settings.get('source', 'auto'))
+            priority = int(spec.get('priority', 0))
+        except ValueError as e:
+            raise HttpError(400, str(e))
+        if not os.path.exists(input_path):
+            raise HttpError(400, f"Input not found: {input_path}")
+
+        job_id = job_id or uuid.uuid4().hex[:12]
+        output_folder = os.path.abspath(spec.get('output') or os.path.join(self.spool_folder, job_id, 'out'))
+        self.check_path(output_folder)
+        # Workers belong to the server, so every job runs on the same warm pools
+        settings = dict(pl.DEFAULTS, **settings)
+        settings['workers'] = self.workers
+
+        job = Job(job_id, input_path, output_folder, settings, priority)
+        self.jobs[job_id] = job
+        self.queue.put_nowait((-priority, next(self.order), job_id))
+        progress.emit(self.events, progress.INFO, f"Queued {job_id}: {input_path} (priority {priority})")
+        return job
+
+    def cancel(self, job):
+        if job.status in FINAL:
+            raise HttpError(409, f"Job {job.id} is already {job.status}")
+        job.cancel_event.set()
+        if job.status == QUEUED:
+            job.finish(CANCELLED)
+
+    def run_job(self, job):
+        pool_key = None
+        try:
+            pool = None
+            if self.engine == 'processes' and job.settings['engine'] != 'slow':
+                pool_key = (job.settings['lang'], job.settings['preprocess'])
+                pool = self.acquire_pool(*pool_key)
+
+            job.pages = pl.run_pipeline(job.input, job.output, job.settings, self.cache, job.on_event, job.cancel_event, pool)
+            if job.cancel_event.is_set():
+                job.finish(CANCELLED)
+            elif job.pages:
+                job.finish(DONE)
+            else:
+                job.finish(FAILED, "Nothing was produced")
+        except Exception as e:
+            job.finish(FAILED, str(e))
+        finally:
+            if pool_key is not None:
+                self.release_pool(*pool_key)
+
+        message = f"Job {job.id} {job.status}: {job.pages or 0} pages in {job.finished - job.started:.2f}s"
+        progress.emit(self.events, progress.INFO, message + (f" ({job.error})" if job.error else ""))
+
+    def forget_old_jobs(self):
+        # The oldest finished jobs go first, together with their uploads and default outputs in the spool folder
+        finished = [job for job in self.jobs.values() if job.status in FINAL]
+        for job in finished[:max(0, len(finished) - self.keep_jobs)]:
+            del self.jobs[job.id]
+            shutil.rmtree(os.path.join(self.spool_folder, job.id), ignore_errors=True)
+
+    async def runner(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            _, _, job_id = await self.queue.get()
+            job = self.jobs.get(job_id)
+            if job is None or job.status != QUEUED:
+                continue
+
+            job.status = RUNNING
+            job.started = time.time()
+            await loop.run_in_executor(self.executor, self.run_job, job)
+            self.forget_old_jobs()
+
+    def health(self):
+        statuses = [job.status for job in self.jobs.values()]
+        with self.pool_lock:
+            pools = [language + ("+preprocess" if preprocess else "") for language, preprocess in self.pools]
+        return {'status': 'ok', 'queued': statuses.count(QUEUED), 'running': statuses.count(RUNNING), 'workers': self.workers,
+                'slots': self.slots, 'engine': self.engine, 'warm_pools': pools, 'cache': self.cache.path if self.cache is not None else None}
+
+    def result(self, job):
+        if job.status not in FINAL:
+            raise HttpError(409, f"Job {job.id} is {job.status}")
+        files = []
+        if os.path.isdir(job.output):
+            # Journals and other dot files are bookkeeping, not results
+            files = sorted(name for name in os.listdir(job.output) if not name.startswith('.') and os.path.isfile(os.path.join(job.output, name)))
+        return {'id': job.id, 'status': job.status, 'pages': job.pages, 'error': job.error, 'output': job.output, 'files': files}
+
+    def output_file(self, job, name):
+        path = os.path.join(job.output, name)
+        if name != os.path.basename(name) or name.startswith('.') or not os.path.isfile(path):
+            raise HttpError(404, f"No such result file: {name}")
+        # Sent by handle_connection in chunks, so a large searchable PDF neither sits in memory nor blocks the event loop
+        return path, CONTENT_TYPES.get(os.path.splitext(name)[1].lower(), 'application/octet-stream')
+
+    async def send_file(self, writer, status, path, content_type):
+        loop = asyncio.get_running_loop()
+        f = await loop.run_in_executor(None, open, path, 'rb')
+        try:
+            remaining = os.fstat(f.fileno()).st_size
+            writer.write(response_head(status, content_type, remaining))
+            while remaining:
+                chunk = await loop.run_in_executor(None, f.read, min(DOWNLOAD_CHUNK, remaining))
+                if not chunk:
+                    break
+                writer.write(chunk)
+                remaining -= len(chunk)
+                await writer.drain()
+        finally:
+            f.close()
+
+    async def read_upload(self, reader, headers, query):
+        # The request body is the file itself; job options come from the query string
+        filename = os.path.basename(query.pop('filename', '') or '')
+        if not filename:
+            raise HttpError(400, "Uploads need a filename query parameter, e.g. POST /jobs?filename=scan.pdf")
+        length = int(headers.get('content-length', 0))
+        if not length:
+            raise HttpError(411, "Uploads need a Content-Length")
+        if length > self.max_upload_bytes:
+            raise HttpError(413, f"Upload is larger than {self.max_upload_bytes // (1024 * 1024)} MB")
+
+        job_id = uuid.uuid4().hex[:12]
+        upload_folder = os.path.join(self.spool_folder, job_id)
+        Path(upload_folder).mkdir(parents=True, exist_ok=True)
+        upload_path = os.path.join(upload_folder, filename)
+
+        # Streamed to disk in chunks, so a large scan never sits in memory; the writes run off the event loop so other requests don't wait
+        loop = asyncio.get_running_loop()
+        f = await loop.run_in_executor(None, open, upload_path, 'wb')
+        complete = False
+        try:
+            remaining = length
+            while remaining:
+                chunk = await reader.read(min(UPLOAD_CHUNK, remaining))
+                if not chunk:
+                    raise HttpError(400, "Upload ended early")
+                await loop.run_in_executor(None, f.write, chunk)
+                remaining -= len(chunk)
+            complete = True
+        finally:
+            await loop.run_in_executor(None, f.close)
+            if not complete:
+                shutil.rmtree(upload_folder, ignore_errors=True)
+
+        # A single image is OCR'd as a folder of one
+        input_path = upload_folder if os.path.splitext(filename)[1].lower() in pl.IMAGE_EXTENSIONS else upload_path
+        spec = {'input': input_path, 'output': query.pop('output', None), 'priority': query.pop('priority', 0), 'settings': query}
+        try:
+            return self.submit(spec, job_id)
+        except HttpError:
+            shutil.rmtree(upload_folder, ignore_errors=True)
+            raise
+
+    async def submit_request(self, reader, headers, query):
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            raise HttpError(411, "Send a Content-Length; chunked bodies are not supported")
+
+        if headers.get('content-type', '').split(';')[0].strip().lower() != 'application/json':
+            return await self.read_upload(reader, headers, query)
+
+        length = int(headers.get('content-length', 0))
+        if length > MAX_JSON_BYTES:
+            raise HttpError(413, "Job description is too large")
+        try:
+            spec = json.loads((await reader.readexactly(length)).decode('utf-8') or '{}')
+        except ValueError as e:
+            raise HttpError(400, f"Invalid JSON: {e}")
+        return self.submit(spec)
+
+    async def handle_request(self, reader):
+        request_line, *header_lines = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+        method, target = request_line.split(' ')[:2]
+        method = method.upper()
+        headers = {}
+        for line in header_lines:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+
+        url = urlsplit(target)
+        parts = [unquote(part) for part in url.path.split('/') if part]
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        if parts == ['health'] and method == 'GET':
+            return 200, self.health()
+
+        if parts == ['jobs']:
+            if method == 'GET':
+                return 200, {'jobs': [job.to_dict() for job in self.jobs.values()]}
+            if method == 'POST':
+                return 202, (await self.submit_request(reader, headers, query)).to_dict()
+            raise HttpError(405, f"{method} is not supported on /jobs")
+
+        if len(parts) >= 2 and parts[0] == 'jobs':
+            job = self.jobs.get(parts[1])
+            if job is None:
+                raise HttpError(404, f"No such job: {parts[1]}")
+
+            if len(parts) == 2 and method == 'GET':
+                return 200, job.to_dict(messages=True)
+            if len(parts) == 2 and method == 'DELETE':
+                self.cancel(job)
+                return 200, job.to_dict()
+            if parts[2:] == ['result'] and method == 'GET':
+                return 200, self.result(job)
+            if len(parts) == 4 and parts[2] == 'files' and method == 'GET':
+                return 200, self.output_file(job, parts[3])
+
+        raise HttpError(404, f"No route for {method} {url.path}")
+
+    async def handle_connection(self, reader, writer):
+        try:
+            try:
+                status, body = await self.handle_request(reader)
+            except HttpError as e:
+                status, body = e.status, {'error': str(e)}
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError) as e:
+                status, body = 400, {'error': f"Malformed request: {e}"}
+            except Exception as e:
+                status, body = 500, {'error': str(e)}
+
+            # A (path, content type) pair is a result file
+            if isinstance(body, tuple):
+                await self.send_file(writer, status, *body)
+            else:
+                data = json.dumps(body, indent=2, ensure_ascii=False, default=str).encode('utf-8')
+                writer.write(response_head(status, 'application/json', len(data)) + data)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve_forever(self, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None):
+        self.queue = asyncio.PriorityQueue()
+        self.runners = [asyncio.create_task(self.runner()) for _ in range(self.slots)]
+
+        if socket_path:
+            server = await asyncio.start_unix_server(self.handle_connection, path=socket_path)
+            address = socket_path
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port)
+            address = f"http://{host}:{port}"
+
+        progress.emit(self.events, progress.STARTED, f"Listening on {address}\n{self.workers} OCR workers, {self.slots} jobs at a time, engine: {self.engine}"
+                      + (f"\nOCR cache: {self.cache.path}" if self.cache is not None else ""), workers=self.workers)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        for job in self.jobs.values():
+            if job.status not in FINAL:
+                job.cancel_event.set()
+        self.executor.shutdown(wait=True)
+        with self.pool_lock:
+            for pool in self.pools.values():
+                pool.shutdown()
+            self.pools.clear()
+
+def add_arguments(parser):
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f'Address to listen on (default: {DEFAULT_HOST}, local only). There is no authentication and jobs read and write files as the server user, so never listen beyond localhost without --root')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port to listen on (default: {DEFAULT_PORT})')
+    parser.add_argument('--socket', default=None, help='Listen on this Unix socket instead of a TCP port')
+    parser.add_argument('--workers', type=int, default=None, help='OCR worker processes per warm pool (default: CPU count)')
+    parser.add_argument('--jobs', type=int, default=1, help='Jobs run at the same time; the rest wait in the priority queue (default: 1)')
+    parser.add_argument('--engine', choices=['processes', 'threads'], default='processes', help='processes: warm worker pools kept across jobs; threads: one tesseract call per page (default: processes)')
+    parser.add_argument('--max-pools', type=int, default=DEFAULT_MAX_POOLS, help=f'Warm pools kept for different languages or preprocessing settings (default: {DEFAULT_MAX_POOLS})')
+    parser.add_argument('--root', dest='roots', action='append', default=None, help='Folder jobs may read inputs from and write outputs to, besides --spool; repeat for several. Without it any path is allowed')
+    parser.add_argument('--spool', default=DEFAULT_SPOOL_FOLDER, help=f'Folder for uploads and for the outputs of jobs without an output folder (default: {DEFAULT_SPOOL_FOLDER})')
+    parser.add_argument('--max-upload-mb', type=int, default=DEFAULT_MAX_UPLOAD_MB, help=f'Largest accepted upload (default: {DEFAULT_MAX_UPLOAD_MB})')
+    parser.add_argument('--keep-jobs', type=int, default=DEFAULT_KEEP_JOBS, help=f'Finished jobs remembered before the oldest are dropped with their spool files (default: {DEFAULT_KEEP_JOBS})')
+    parser.add_argument('--cache', nargs='?', const=ocrcache.DEFAULT_CACHE_PATH, default=None, help=f'Share this SQLite OCR cache across all jobs (default path: {ocrcache.DEFAULT_CACHE_PATH})')
+    parser.add_argument('--cache-size-mb', type=int, default=ocrcache.DEFAULT_CACHE_SIZE_MB, help=f'Maximum cache size (default: {ocrcache.DEFAULT_CACHE_SIZE_MB})')
+
+def run(args):
+    if args.socket and not hasattr(asyncio, 'start_unix_server'):
+        sys.exit("error: Unix sockets are not available on this platform, use --host/--port")
+
+    workers = args.workers or os.cpu_count() or 1
+    # Pool processes start on demand and inherit this, so it holds for every warm pool
+    os.environ.setdefault('OMP_THREAD_LIMIT', str(autotune.default_threads_per_worker(workers)))
+
+    if not args.socket and args.host not in LOCAL_HOSTS and not args.roots:
+        print(f"Warning: listening on {args.host} without --root lets anyone who can reach the port read and write any file this user can")
+
+    cache = ocrcache.OCRCache(args.cache, args.cache_size_mb) if args.cache else None
+    server = JobServer(workers, args.jobs, args.engine, cache, args.spool, args.max_upload_mb, args.keep_jobs, args.max_pools,
+                       progress.ConsoleReporter(), args.roots)
+    try:
+        asyncio.run(server.serve_forever(args.host, args.port, args.socket))
+    except KeyboardInterrupt:
+        print("Shutting down")
+    finally:
+        server.close()
+        if cache is not None:
+            cache.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Local OCR job server: queue PDF, DOCX and image jobs over HTTP and run them on warm worker pools')
+    add_arguments(parser)
+    run(parser.parse_args())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import os
+import json
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+JOURNAL_NAME = '.word2txt_journal.sqlite3'
+
+IN_FLIGHT = 'in_flight'
+DONE = 'done'
+FAILED = 'failed'
+
+def journal_path(output_folder):
+    return os.path.join(output_folder, JOURNAL_NAME)
+
+def file_signature(path, *settings):
+    # Changing the input file or any setting that affects the text makes the page due again
+    stat = os.stat(path)
+    return ':'.join([str(stat.st_size), str(stat.st_mtime_ns)] + [str(s) for s in settings])
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def atomic_write_text(path, text):
+    # Readers and resumed jobs only ever see the old file or the complete new one
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_path, 'w', encoding='utf-8', errors='replace') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+class Journal:
+    def __init__(self, path):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS pages (item TEXT PRIMARY KEY, state TEXT NOT NULL, signature TEXT NOT NULL, output TEXT, attempts INTEGER NOT NULL DEFAULT 0, error TEXT, updated REAL NOT NULL)')
+        # Whole input files (DOCX, images) and the outputs made from them, for incremental re-runs
+        self.conn.execute('CREATE TABLE IF NOT EXISTS sources (source TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, sha256 TEXT NOT NULL, settings TEXT NOT NULL, outputs TEXT NOT NULL, updated REAL NOT NULL)')
+        # Content hashes of input images, reused while their size and mtime stay the same
+        self.conn.execute('CREATE TABLE IF NOT EXISTS hashes (path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, sha256 TEXT NOT NULL)')
+        self.conn.commit()
+
+    def is_done(self, item, signature):
+        with self.lock:
+            row = self.conn.execute('SELECT state, signature, output FROM pages WHERE item = ?', (item,)).fetchone()
+
+        if row is None or row[0] != DONE or row[1] != signature:
+            return False
+        # A deleted output means the page has to be produced again
+        return row[2] is not None and os.path.exists(row[2])
+
+    def done_items(self, signature):
+        with self.lock:
+            rows = self.conn.execute('SELECT item, output FROM pages WHERE state = ? AND signature = ?', (DONE, signature)).fetchall()
+        return {item for item, output in rows if output is not None and os.path.exists(output)}
+
+    def record(self, item, state, signature, output=None, error=None):
+        with self.lock:
+            self.conn.execute('INSERT INTO pages (item, state, signature, output, attempts, error, updated) VALUES (?, ?, ?, ?, ?, ?, ?) '
+                              'ON CONFLICT(item) DO UPDATE SET state = excluded.state, signature = excluded.signature, output = excluded.output, '
+                              'attempts = pages.attempts + excluded.attempts, error = excluded.error, updated = excluded.updated',
+                              (item, state, signature, output, 1 if state == IN_FLIGHT else 0, error, time.time()))
+            self.conn.commit()
+
+    def start(self, item, signature):
+        self.record(item, IN_FLIGHT, signature)
+
+    def done(self, item, signature, output=None):
+        self.record(item, DONE, signature, output)
+
+    def failed(self, item, signature, error):
+        self.record(item, FAILED, signature, error=str(error))
+
+    def source_outputs(self, source, settings=''):
+        # The outputs recorded for an unchanged source, or None when it has to be processed again.
+        # Size and mtime decide in constant time; a touched file of the same size is hashed before it counts as changed
+        path = os.path.abspath(source)
+        with self.lock:
+            row = self.conn.execute('SELECT size, mtime_ns, sha256, settings, outputs FROM sources WHERE source = ?', (path,)).fetchone()
+        if row is None or row[3] != str(settings):
+            return None
+
+        stat = os.stat(path)
+        outputs = json.loads(row[4])
+        if stat.st_size != row[0] or not all(os.path.exists(output) for output in outputs):
+            return None
+
+        if stat.st_mtime_ns != row[1]:
+            if file_sha256(path) != row[2]:
+                return None
+            with self.lock:
+                self.conn.execute('UPDATE sources SET mtime_ns = ?, updated = ? WHERE source = ?', (stat.st_mtime_ns, time.time(), path))
+                self.conn.commit()
+
+        return outputs
+
+    def record_source(self, source, outputs, settings=''):
+        path = os.path.abspath(source)
+        stat = os.stat(path)
+        sha256 = file_sha256(path)
+        with self.lock:
+            self.conn.execute('INSERT OR REPLACE INTO sources (source, size, mtime_ns, sha256, settings, outputs, updated) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                              (path, stat.st_size, stat.st_mtime_ns, sha256, str(settings), json.dumps([os.path.abspath(o) for o in outputs]), time.time()))
+            self.conn.commit()
+
+    def recorded_outputs(self, source):
+        # Outputs of the previous run, whatever its settings, so a changed source can replace them instead of adding _01 copies
+        with self.lock:
+            row = self.conn.execute('SELECT outputs FROM sources WHERE source = ?', (os.path.abspath(source),)).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def cached_sha256(self, path):
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with self.lock:
+            row = self.conn.execute('SELECT size, mtime_ns, sha256 FROM hashes WHERE path = ?', (path,)).fetchone()
+        if row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return row[2]
+
+        sha256 = file_sha256(path)
+        with self.lock:
+            self.conn.execute('INSERT OR REPLACE INTO hashes (path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?)', (path, stat.st_size, stat.st_mtime_ns, sha256))
+            self.conn.commit()
+        return sha256
+
+    def summary(self):
+        with self.lock:
+            return dict(self.conn.execute('SELECT state, COUNT(*) FROM pages GROUP BY state').fetchall())
+
+    def reset(self):
+        with self.lock:
+            self.conn.execute('DELETE FROM pages')
+            self.conn.execute('DELETE FROM sources')
+            self.conn.execute('DELETE FROM hashes')
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,177 @@
+import os
+import glob
+import json
+import shutil
+import platform
+import subprocess
+from pathlib import Path
+import Journal as jnl
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'word2txt', 'languages.json')
+CACHE_VERSION = 1
+IGNORED = ('osd', 'equ')
+PAIRS = ('vie', 'fra', 'spa', 'deu')
+
+def candidate_tessdata_dirs():
+    # Everything that can be found without starting tesseract: environment, PATH and the usual install locations
+    paths = set()
+
+    for env_var in ['TESSDATA_PREFIX', 'TESSERACT_PREFIX', 'TESSERACT_TESSDATA']:
+        path = os.environ.get(env_var)
+        if path and os.path.exists(path):
+            paths.add(path)
+            if not path.endswith('tessdata'):
+                paths.add(os.path.join(path, 'tessdata'))
+
+    for path_dir in os.environ.get('PATH', '').split(os.pathsep):
+        if 'tesseract' in path_dir.lower():
+            parent_dir = os.path.dirname(path_dir)
+            paths.update([
+                os.path.join(path_dir, 'tessdata'),
+                os.path.join(parent_dir, 'tessdata'),
+                os.path.join(parent_dir, 'share', 'tessdata'),
+                os.path.join(parent_dir, 'Tesseract-OCR', 'tessdata'),
+            ])
+
+    system = platform.system()
+    if system == "Windows":
+        common_paths = [
+            os.path.join(os.environ.get('ProgramFiles', ''), 'Tesseract-OCR', 'tessdata'),
+            os.path.join(os.environ.get('ProgramFiles(x86)', ''), 'Tesseract-OCR', 'tessdata'),
+            os.path.join(os.environ.get('APPDATA', ''), 'Tesseract-OCR', 'tessdata'),
+            os.path.join(os.environ.get('LOCALAPPDATA', ''), 'Tesseract-OCR', 'tessdata'),
+        ]
+    elif system == "Linux":
+        common_paths = [
+            '/usr/share/tesseract-ocr/tessdata',
+            '/usr/share/tesseract-ocr/4.00/tessdata',
+            '/usr/share/tesseract-ocr/5/tessdata',
+            '/usr/local/share/tessdata',
+            '/usr/share/tessdata',
+        ]
+    elif system == "Darwin":
+        common_paths = [
+            '/usr/local/share/tessdata',
+            '/opt/homebrew/share/tessdata',
+            '/usr/local/Cellar/tesseract/*/share/tessdata',
+        ]
+    else:
+        common_paths = []
+
+    for path in common_paths:
+        if '*' in path:
+            paths.update(glob.glob(path))
+        else:
+            paths.add(path)
+
+    return {path for path in paths if os.path.isdir(path)}
+
+def traineddata_languages(tessdata_path):
+    languages = set()
+    for file in os.listdir(tessdata_path):
+        if file.endswith('.traineddata'):
+            lang_code = file[:-len('.traineddata')]
+            if lang_code not in IGNORED:
+                languages.add(lang_code)
+    return languages
+
+def scan_languages():
+    # The slow path: asks tesseract itself, then lists every tessdata folder. Returns (languages, tessdata folders)
+    languages = set()
+    tessdata_paths = set()
+
+    try:
+        result = subprocess.run(['tesseract', '--list-langs'], capture_output=True, text=True, timeout=10)
+        if result.returncode == 0:
+            for line in result.stdout.strip().split('\n')[1:]:
+                lang = line.strip()
+                if lang:
+                    languages.add(lang)
+
+            result = subprocess.run(['tesseract', '--print-parameters'], capture_output=True, text=True, timeout=10)
+            for line in result.stdout.split('\n'):
+                if 'tessdata-dir' in line.lower():
+                    parts = line.split()
+                    if len(parts) > 1:
+                        tessdata_paths.add(parts[1])
+    except Exception:
+        pass
+
+    tessdata_paths = {path for path in tessdata_paths if os.path.isdir(path)} | candidate_tessdata_dirs()
+
+    for tessdata_path in tessdata_paths:
+        try:
+            languages.update(traineddata_languages(tessdata_path))
+        except OSError:
+            continue
+
+    if tessdata_paths and not languages:
+        for tessdata_path in tessdata_paths:
+            for root, _, _ in os.walk(tessdata_path):
+                try:
+                    languages.update(traineddata_languages(root))
+                except OSError:
+                    continue
+
+    return language_choices(languages), tessdata_paths
+
+def language_choices(languages):
+    lang_list = sorted(languages)
+    for lang in PAIRS:
+        if lang in languages and 'eng' in languages:
+            lang_list.extend([f'{lang}+eng', f'eng+{lang}'])
+    return lang_list or ['eng']
+
+def mtime_ns(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def stamp(tessdata_paths):
+    # Installing or removing a .traineddata file changes its folder's mtime; a reinstalled tesseract changes the binary's
+    binary = shutil.which('tesseract')
+    return {
+        'version': CACHE_VERSION,
+        'binary': [binary, mtime_ns(binary) if binary else None],
+        'dirs': {path: mtime_ns(path) for path in sorted(tessdata_paths)},
+    }
+
+def load_cache(cache_path):
+    try:
+        with open(cache_path, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get('version') != CACHE_VERSION or not isinstance(data.get('dirs'), dict):
+        return None
+    return data
+
+def cached_languages(cache_path=DEFAULT_CACHE_PATH):
+    # Only stats a handful of folders; None when the cache is missing or out of date
+    data = load_cache(cache_path)
+    if data is None:
+        return None
+    current = stamp(set(data['dirs']) | candidate_tessdata_dirs())
+    if current['binary'] != data.get('binary') or current['dirs'] != data['dirs']:
+        return None
+    return data.get('languages') or None
+
+def available_languages(cache_path=DEFAULT_CACHE_PATH, refresh=False):
+    if not refresh:
+        languages = cached_languages(cache_path)
+        if languages is not None:
+            return languages
+
+    languages, tessdata_paths = scan_languages()
+    data = stamp(tessdata_paths)
+    data['languages'] = languages
+    try:
+        Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+        jnl.atomic_write_text(cache_path, json.dumps(data, indent=2))
+    except OSError:
+        pass
+    return languages
+
+if __name__ == "__main__":
+    print("\n".join(available_languages(refresh=True)))
@@ -0,0 +1,100 @@
+import os
+import sqlite3
+import hashlib
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'word2txt', 'ocr_cache.sqlite3')
+DEFAULT_CACHE_SIZE_MB = 512
+# The size bound is soft: it is only enforced every EVICT_CHECK_INTERVAL puts and on close, so the cache can run over it in between
+EVICT_CHECK_INTERVAL = 64
+
+def image_key(img, language, config=''):
+    h = hashlib.sha256()
+    h.update(f"{img.mode}:{img.size[0]}x{img.size[1]}\0".encode())
+    h.update(img.tobytes())
+    h.update(f"\0{language}\0{config}".encode())
+    return h.hexdigest()
+
+class OCRCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_size_mb=DEFAULT_CACHE_SIZE_MB):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.lock = threading.Lock()
+        self.puts_since_check = 0
+
+        # One connection shared by all threads; several processes may open the same file
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS ocr_cache (key TEXT PRIMARY KEY, text TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS ocr_cache_last_used ON ocr_cache (last_used)')
+        self.conn.commit()
+
+    def get(self, key):
+        with self.lock:
+            row = self.conn.execute('SELECT text FROM ocr_cache WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+
+            self.conn.execute('UPDATE ocr_cache SET last_used = ? WHERE key = ?', (time.time(), key))
+            self.conn.commit()
+            return row[0]
+
+    def put(self, key, text):
+        size = len(key) + len(text.encode('utf-8'))
+
+        with self.lock:
+            self.conn.execute('INSERT OR REPLACE INTO ocr_cache (key, text, size, last_used) VALUES (?, ?, ?, ?)', (key, text, size, time.time()))
+            self.conn.commit()
+
+            self.puts_since_check += 1
+            if self.puts_since_check >= EVICT_CHECK_INTERVAL:
+                self.puts_since_check = 0
+                self.evict()
+
+    def evict(self):
+        total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM ocr_cache').fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+
+        # Trim to 90% so the next few puts don't trigger another pass
+        target = self.max_bytes * 0.9
+        stale_keys = []
+        for key, size in self.conn.execute('SELECT key, size FROM ocr_cache ORDER BY last_used ASC'):
+            if total <= target:
+                break
+            stale_keys.append((key,))
+            total -= size
+
+        self.conn.executemany('DELETE FROM ocr_cache WHERE key = ?', stale_keys)
+        self.conn.commit()
+        return len(stale_keys)
+
+    def close(self):
+        with self.lock:
+            self.evict()
+            self.conn.close()
+
+def cached_ocr(img, language, config, cache, ocr_func, timings=None):
+    if cache is None:
+        return ocr_func(img), False
+
+    start = time.perf_counter()
+    key = image_key(img, language, config)
+    text = cache.get(key)
+    lookup_time = time.perf_counter() - start
+
+    if text is not None:
+        if timings is not None:
+            timings['cache'] = lookup_time
+        return text, True
+
+    text = ocr_func(img)
+
+    start = time.perf_counter()
+    cache.put(key, text)
+    if timings is not None:
+        timings['cache'] = lookup_time + time.perf_counter() - start
+    return text, False
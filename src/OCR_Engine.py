@@ -0,0 +1,156 @@
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
+import pytesseract
+import OCR_Cache as ocrcache
+import Preprocess as pre
+import Sinks as snk
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+# State owned by each pool process, set once by init_worker
+_api = None
+_language = 'eng'
+_config = ''
+_cache = None
+_preprocess = False
+
+def has_tesserocr():
+    return tesserocr is not None
+
+def tesserocr_options(config):
+    # (constructor arguments, variables) for tesserocr, or None when the config has options only the CLI understands
+    options = {}
+    variables = {}
+    parts = config.split()
+    i = 0
+    while i < len(parts):
+        part = parts[i]
+        value = parts[i + 1] if i + 1 < len(parts) else None
+        if part in ('--psm', '--oem') and value is not None:
+            try:
+                options[part[2:]] = int(value)
+            except ValueError:
+                return None
+        elif part == '-c' and value is not None and '=' in value:
+            name, _, setting = value.partition('=')
+            variables[name] = setting
+        else:
+            return None
+        i += 2
+    return options, variables
+
+def init_worker(language, config='', cache_path=None, cache_size_mb=ocrcache.DEFAULT_CACHE_SIZE_MB, preprocess=False):
+    global _api, _language, _config, _cache, _preprocess
+    _language = language
+    _config = config
+    _preprocess = preprocess
+
+    if cache_path:
+        _cache = ocrcache.OCRCache(cache_path, cache_size_mb)
+
+    if tesserocr is None:
+        return
+
+    parsed = tesserocr_options(config)
+    if parsed is None:
+        return
+
+    options, variables = parsed
+    try:
+        _api = tesserocr.PyTessBaseAPI(lang=language, **options)
+        for name, value in variables.items():
+            if not _api.SetVariable(name, value):
+                raise ValueError(f"Unknown tesseract variable: {name}")
+    except Exception:
+        # Missing tessdata for tesserocr's build or a setting it rejects, fall back to the CLI
+        _api = None
+
+def prepare_image(img, timings):
+    start = time.perf_counter()
+    if _preprocess:
+        return pre.preprocess(img, timings)
+
+    if img.mode in ('P', 'RGBA', 'LA'):
+        img = img.convert('RGB')
+    timings['convert'] = time.perf_counter() - start
+    return img
+
+def tesseract_worker(img, timings):
+    img = prepare_image(img, timings)
+    start = time.perf_counter()
+
+    if _api is not None:
+        _api.SetImage(img)
+        text = _api.GetUTF8Text()
+    else:
+        text = pytesseract.image_to_string(img, config=_config, lang=_language)
+
+    timings['tesseract'] = time.perf_counter() - start
+    return text.strip()
+
+def tesseract_layout_worker(img, timings):
+    img = prepare_image(img, timings)
+    start = time.perf_counter()
+
+    # Word boxes come from the CLI's TSV output, which is what the hOCR/ALTO sinks consume
+    data = pytesseract.image_to_data(img, config=_config, lang=_language, output_type=pytesseract.Output.DICT)
+
+    timings['tesseract'] = time.perf_counter() - start
+    return snk.data_layout(data)
+
+def text_cache_config():
+    # tesserocr and the CLI can return slightly different text for the same image, so their results are cached apart
+    config = pre.cache_config(_config, _preprocess)
+    return f"{config} backend=tesserocr" if _api is not None else config
+
+def ocr_with_worker(img, timings):
+    text, cached = ocrcache.cached_ocr(img, _language, text_cache_config(), _cache, lambda im: tesseract_worker(im, timings), timings)
+    return text, cached, timings
+
+def ocr_image_file(image_path):
+    timings = {}
+    start = time.perf_counter()
+
+    with Image.open(image_path) as img:
+        img.load()
+        timings['decode'] = time.perf_counter() - start
+        return ocr_with_worker(img, timings)
+
+def ocr_image_file_layout(image_path):
+    timings = {}
+    start = time.perf_counter()
+
+    with Image.open(image_path) as img:
+        img.load()
+        timings['decode'] = time.perf_counter() - start
+        layout, cached = ocrcache.cached_ocr(img, _language, snk.layout_cache_config(pre.cache_config(_config, _preprocess)), _cache,
+                                             lambda im: json.dumps(tesseract_layout_worker(im, timings)), timings)
+        return json.loads(layout), cached, timings
+
+def ocr_image_bytes(mode, size, data):
+    timings = {}
+    start = time.perf_counter()
+    img = Image.frombytes(mode, size, data)
+    timings['decode'] = time.perf_counter() - start
+    return ocr_with_worker(img, timings)
+
+def ocr_image_bytes_pdf(mode, size, data):
+    timings = {}
+    start = time.perf_counter()
+    img = Image.frombytes(mode, size, data)
+    timings['decode'] = time.perf_counter() - start
+    # Imported here so image OCR doesn't need PyMuPDF
+    import SearchablePDF as searchable
+    text, text_pdf, cached = searchable.cached_text_pdf(img, _language, _config, _cache,
+                                                        lambda im: searchable.ocr_text_pdf(im, _language, _config, timings), timings)
+    return text, text_pdf, cached, timings
+
+def create_ocr_pool(language, max_workers=None, config='', cache=None, preprocess=False):
+    cache_path = cache.path if cache is not None else None
+    cache_size_mb = cache.max_bytes / (1024 * 1024) if cache is not None else ocrcache.DEFAULT_CACHE_SIZE_MB
+    return ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker, initargs=(language, config, cache_path, cache_size_mb, preprocess))
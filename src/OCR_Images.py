@@ -1,12 +1,83 @@
 import os
+import io
+import json
+import zipfile
 import argparse
 from pathlib import Path
 import sys
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from collections import deque
+from contextlib import closing
 import time
 import threading
 from PIL import Image
 import pytesseract
+import OCR_Engine as ocrengine
+import Autotune as autotune
+import Preprocess as pre
+import Journal as jnl
+import Dedup as dd
+import Sinks as snk
+import Word2PNG as wp
+import OCR_Cache as ocrcache
+import Progress as progress
+import Report as rpt
+
+def prepare_image(img, timings=None, preprocess=False):
+    start = time.perf_counter()
+    if preprocess:
+        return pre.preprocess(img, timings)
+
+    if img.mode in ('P', 'RGBA', 'LA'):
+        img = img.convert('RGB')
+    if timings is not None:
+        timings['convert'] = time.perf_counter() - start
+    return img
+
+def ocr_image(img, language='eng', config='', timings=None, preprocess=False):
+    img = prepare_image(img, timings, preprocess)
+    start = time.perf_counter()
+
+    text = pytesseract.image_to_string(img, config=config, lang=language)
+
+    if timings is not None:
+        timings['tesseract'] = time.perf_counter() - start
+    return text.strip()
+
+def ocr_image_layout(img, language='eng', config='', timings=None, preprocess=False):
+    img = prepare_image(img, timings, preprocess)
+    start = time.perf_counter()
+
+    data = pytesseract.image_to_data(img, config=config, lang=language, output_type=pytesseract.Output.DICT)
+
+    if timings is not None:
+        timings['tesseract'] = time.perf_counter() - start
+    return snk.data_layout(data)
+
+def ocr_image_file(image_path, language='eng', config='', cache=None, preprocess=False):
+    timings = {}
+    start = time.perf_counter()
+
+    with Image.open(image_path) as img:
+        img.load()
+        timings['decode'] = time.perf_counter() - start
+        text, cached = ocrcache.cached_ocr(img, language, pre.cache_config(config, preprocess), cache,
+                                           lambda im: ocr_image(im, language, config, timings, preprocess), timings)
+
+    return text, cached, timings
+
+def ocr_image_file_layout(image_path, language='eng', config='', cache=None, preprocess=False):
+    timings = {}
+    start = time.perf_counter()
+
+    # The cache stores text, so layouts are kept as JSON under their own key
+    with Image.open(image_path) as img:
+        img.load()
+        timings['decode'] = time.perf_counter() - start
+        layout, cached = ocrcache.cached_ocr(img, language, snk.layout_cache_config(pre.cache_config(config, preprocess)), cache,
+                                             lambda im: json.dumps(ocr_image_layout(im, language, config, timings, preprocess)), timings)
+
+    return json.loads(layout), cached, timings
 
 def process_single_image(args):
     image_path, output_folder, language = args
@@ -38,7 +109,135 @@ def process_single_image(args):
     except Exception as e:
         return image_file, f"error: {str(e)}", 0, 0
 
-def fast_ocr_images(input_folder, output_folder, language='eng', max_workers=None):
+def iter_ocr(paths, language='eng', max_workers=None, engine='threads', ordered=False, cache=None, preprocess=False, config=''):
+    workers = max_workers or os.cpu_count() or 1
+
+    if engine == 'processes':
+        executor = ocrengine.create_ocr_pool(language, workers, config, cache, preprocess)
+        submit = lambda path: executor.submit(ocrengine.ocr_image_file, path)
+    else:
+        executor = ThreadPoolExecutor(max_workers=workers)
+        submit = lambda path: executor.submit(ocr_image_file, path, language, config, cache, preprocess)
+
+    def result_of(path, future):
+        try:
+            text, cached, timings = future.result()
+        except Exception as e:
+            return path, None, {'error': str(e)}
+
+        timings['total'] = sum(timings.values())
+        return path, text, {'cached': cached, 'chars': len(text), 'timings': timings}
+
+    # Only a couple of pages per worker are in flight, so a lazy input is never read far ahead
+    paths = iter(paths)
+    pending = deque()
+    limit = workers * 2
+
+    # tesseract reads the limit when it starts, so it stays set process-wide until the generator finishes.
+    # Callers that may stop early must close the generator (contextlib.closing) instead of leaving it to garbage collection.
+    with autotune.omp_thread_limit(autotune.default_threads_per_worker(workers)):
+        try:
+            while True:
+                while len(pending) < limit:
+                    path = next(paths, None)
+                    if path is None:
+                        break
+                    pending.append((path, submit(path)))
+
+                if not pending:
+                    return
+
+                if ordered:
+                    path, future = pending.popleft()
+                    yield result_of(path, future)
+                    continue
+
+                done, _ = wait([future for _, future in pending], return_when=FIRST_COMPLETED)
+                for path, future in [entry for entry in pending if entry[1] in done]:
+                    pending.remove((path, future))
+                    yield result_of(path, future)
+        finally:
+            # Stopping early cancels the pages that haven't started yet
+            for _, future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+def ocr_docx(docx_path, output_folder, language='eng', max_workers=None, engine='threads', cache=None, events=None, cancel_event=None, preprocess=False, dedup=True):
+    # OCR the images embedded in a DOCX straight from memory, without extracting them to disk first
+    if events is None:
+        events = progress.ConsoleReporter()
+
+    Path(output_folder).mkdir(parents=True, exist_ok=True)
+
+    try:
+        with zipfile.ZipFile(docx_path, 'r') as docx_zip:
+            total_files = len(wp.media_entries(docx_zip))
+    except (OSError, zipfile.BadZipFile) as e:
+        progress.emit(events, progress.ERROR, f"Error opening DOCX: {e}", item=docx_path, status='error', error=str(e))
+        return 0
+
+    if not total_files:
+        progress.emit(events, progress.FINISHED, "No images found in the document.")
+        return 0
+
+    workers = os.cpu_count() if max_workers in (None, autotune.AUTO) else max_workers
+    header = [f"Found {total_files} images in {os.path.basename(docx_path)}, OCR'd from memory",
+              f"Using {workers} {'worker processes' if engine == 'processes' else 'threads'}", f"Language: {language}", "-" * 50]
+    progress.emit(events, progress.STARTED, "\n".join(header), item=docx_path, total=total_files, workers=workers)
+
+    start_time = time.time()
+    copies = {}
+    texts = {}
+    success_count = 0
+    completed_count = 0
+
+    def sources():
+        for name, data, original in wp.iter_docx_images(docx_path, dedup):
+            if cancel_event is not None and cancel_event.is_set():
+                progress.emit(events, progress.INFO, "Cancelled")
+                return
+            if data is None:
+                copies.setdefault(original, []).append(name)
+                continue
+            source = io.BytesIO(data)
+            source.name = name
+            yield source
+
+    def write_text(name, text, stats, message):
+        nonlocal success_count, completed_count
+        completed_count += 1
+        safe_name = name.encode('ascii', 'replace').decode('ascii')
+        if text is None:
+            progress.emit(events, progress.ERROR, f"[{completed_count}/{total_files}] {safe_name} - error: {stats['error']}",
+                          item=name, done=completed_count, total=total_files, status='error', error=stats['error'])
+            return
+
+        jnl.atomic_write_text(os.path.join(output_folder, f"{Path(name).stem}.txt"), text)
+        success_count += 1
+        progress.emit(events, progress.PAGE_DONE, f"[{completed_count}/{total_files}] {safe_name} - {message}",
+                      item=name, done=completed_count, total=total_files, status=stats.get('status', 'success'),
+                      timings=stats.get('timings'), chars=len(text))
+
+    with closing(iter_ocr(sources(), language, workers, engine, cache=cache, preprocess=preprocess)) as results:
+        for source, text, stats in results:
+            texts[source.name] = (text, stats)
+            stats['status'] = 'cached' if stats.get('cached') else 'success'
+            write_text(source.name, text, stats, f"{len(text or '')} chars{' (cached)' if stats.get('cached') else ''}")
+
+    # Repeats are only known once the whole document has been read, so their text is copied at the end
+    for original, names in copies.items():
+        text, stats = texts.get(original, (None, {'error': 'original image was not processed'}))
+        for name in names:
+            write_text(name, text, {'status': 'duplicate', 'error': stats.get('error')}, f"duplicate of {original}")
+
+    progress.emit(events, progress.FINISHED, done=completed_count, total=total_files,
+                  elapsed=time.time() - start_time, success=success_count)
+    return success_count
+
+def fast_ocr_images(input_folder, output_folder, language='eng', max_workers=None, engine='threads', cache=None, events=None, cancel_event=None, threads_per_worker=None, preprocess=False, resume=True, formats=(snk.TXT,), document_name=None, dedup=True, dedup_similar=False, dedup_distance=dd.DEFAULT_MAX_DISTANCE, ocr_pool=None, page_numbers=None, text_pages=()):
+    if events is None:
+        events = progress.ConsoleReporter()
+
     Path(output_folder).mkdir(parents=True, exist_ok=True)
 
     image_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.gif'}
@@ -48,91 +247,265 @@ def fast_ocr_images(input_folder, output_folder, language='eng', max_workers=Non
         if os.path.splitext(f)[1].lower() in image_extensions:
             image_paths.append(os.path.join(input_folder, f))
 
-    if not image_paths:
-        print("No image files found")
-        return 0
+    if page_numbers is not None:
+        # Rendered PDF pages: only this render's images, numbered by their page in the document
+        image_paths = [path for path in image_paths if os.path.basename(path) in page_numbers]
 
-    image_paths.sort()
-    total_files = len(image_paths)
+    if not image_paths and not text_pages:
+        progress.emit(events, progress.FINISHED, "No image files found")
+        return 0
 
-    actual_workers = max_workers if max_workers is not None else os.cpu_count()
-    print(f"Found {total_files} images for TRUE FAST parallel OCR")
-    print(f"Using {actual_workers} threads")
-    print(f"Language: {language}")
-    print("-" * 50)
+    journal = jnl.Journal(jnl.journal_path(output_folder))
+    if not resume:
+        journal.reset()
+
+    # Each unique image is OCR'd once and its text is copied to every repeat
+    pages, duplicates = dd.plan_pages(input_folder, image_paths, dedup, dedup_similar, dedup_distance, journal)
+    copies = dd.copies_of(duplicates)
+    image_paths = [path for path in pages if path not in duplicates]
+    total_files = len(pages)
+
+    # A pool passed in is already sized and warm, so there is nothing to tune
+    tuner = autotune.AutoTuner(len(image_paths)) if max_workers == autotune.AUTO and ocr_pool is None else None
+    actual_workers = os.cpu_count() if max_workers in (None, autotune.AUTO) else max_workers
+    if threads_per_worker is None and tuner is None:
+        threads_per_worker = autotune.default_threads_per_worker(actual_workers)
+
+    header = [f"Found {total_files} images for TRUE FAST parallel OCR"]
+    if tuner is not None:
+        header.append(f"Auto-tuning workers and threads per worker on the first pages ({actual_workers} CPUs)")
+    elif engine == 'processes' or ocr_pool is not None:
+        backend = "tesserocr" if ocrengine.has_tesserocr() else "pytesseract"
+        header.append(f"Using {actual_workers} persistent worker processes ({backend}), {threads_per_worker} OpenMP threads each")
+    else:
+        header.append(f"Using {actual_workers} threads, {threads_per_worker} OpenMP threads per tesseract")
+    header.append(f"Language: {language}")
+    if preprocess:
+        header.append("Preprocessing: grayscale, crop, deskew, downscale, binarize")
+    if cache is not None:
+        header.append(f"OCR cache: {cache.path}")
+    if duplicates:
+        header.append(f"{len(duplicates)} duplicate images will reuse the text of their originals")
+    header.append("-" * 50)
+    progress.emit(events, progress.STARTED, "\n".join(header), total=total_files, workers=actual_workers)
 
     start_time = time.time()
     success_count = 0
     completed_count = 0
+    cached_count = 0
+    skipped_count = 0
     lock = threading.Lock()
+    pool = None
+
+    page_index = {path: (page_numbers or {}).get(os.path.basename(path), i) for i, path in enumerate(pages, 1)}
+    with_layout = snk.needs_layout(formats)
+    sinks = snk.open_sinks(output_folder, formats, document_name or Path(input_folder).resolve().name)
+    snk.write_text_pages(sinks, text_pages)
+    # Document-level outputs need every page, so only per-page TXT output can skip finished pages
+    skip_done = not sinks
+
+    def ocr_file(image_path):
+        # In process mode the threads only wait on the pool and write results
+        if pool is not None:
+            sent = time.perf_counter()
+            worker_func = ocrengine.ocr_image_file_layout if with_layout else ocrengine.ocr_image_file
+            result, cached, timings = pool.submit(worker_func, image_path).result()
+            timings['ipc'] = max(0.0, time.perf_counter() - sent - sum(timings.values()))
+        elif with_layout:
+            result, cached, timings = ocr_image_file_layout(image_path, language, cache=cache, preprocess=preprocess)
+        else:
+            result, cached, timings = ocr_image_file(image_path, language, cache=cache, preprocess=preprocess)
+
+        if with_layout:
+            return snk.layout_text(result), result, cached, timings
+        return result, None, cached, timings
+
+    def fan_out(image_path, signature, text=None, layout=None, error=None):
+        # Repeats of an image get its result without another OCR run
+        nonlocal success_count, completed_count
+        for duplicate in copies.get(image_path, []):
+            duplicate_file = os.path.basename(duplicate)
+            safe_duplicate = duplicate_file.encode('ascii', 'replace').decode('ascii')
+            original_file = os.path.basename(image_path)
+            try:
+                if error is not None:
+                    raise error
+
+                if snk.TXT in formats:
+                    duplicate_txt_path = os.path.join(output_folder, f"{Path(duplicate_file).stem}.txt")
+                    jnl.atomic_write_text(duplicate_txt_path, text)
+                    journal.done(duplicate_file, signature, duplicate_txt_path)
+                else:
+                    journal.done(duplicate_file, signature)
+                snk.write_all(sinks, page_index[duplicate], duplicate_file, text,
+                              {'status': 'duplicate', 'original': original_file, 'chars': len(text), 'words': len(text.split())}, layout)
+
+                with lock:
+                    success_count += 1
+                    completed_count += 1
+                    progress.emit(events, progress.PAGE_DONE, f"[{completed_count}/{total_files}] {safe_duplicate} - duplicate of {original_file}",
+                                  item=duplicate_file, done=completed_count, total=total_files, status='duplicate', chars=len(text), original=original_file)
+
+            except Exception as e:
+                if signature is not None:
+                    journal.failed(duplicate_file, signature, e)
+                snk.write_all(sinks, page_index[duplicate], duplicate_file, None, {'status': 'error', 'error': str(e)})
+                with lock:
+                    completed_count += 1
+                    progress.emit(events, progress.ERROR, f"[{completed_count}/{total_files}] {safe_duplicate} - error: {str(e)}",
+                                  item=duplicate_file, done=completed_count, total=total_files, status='error', error=str(e))
 
     def process_image_thread(args):
-        nonlocal success_count, completed_count
-        image_path, output_folder, language = args
+        nonlocal success_count, completed_count, cached_count, skipped_count
+        image_path, output_folder, language, submitted = args
+
+        if cancel_event is not None and cancel_event.is_set():
+            return
+
+        image_file = os.path.basename(image_path)
+        safe_file = image_file.encode('ascii', 'replace').decode('ascii')
+        item_start = time.perf_counter()
+        queue_wait = item_start - submitted
 
+        signature = None
         try:
-            image_file = os.path.basename(image_path)
             image_stem = Path(image_file).stem
             output_txt_path = os.path.join(output_folder, f"{image_stem}.txt")
+            signature = jnl.file_signature(image_path, language, pre.cache_config('', preprocess))
 
-            if os.path.exists(output_txt_path):
+            done_files = [image_file] + [os.path.basename(duplicate) for duplicate in copies.get(image_path, [])]
+            if skip_done and all(journal.is_done(done_file, signature) for done_file in done_files):
+                # Pages finished by an earlier run still have their output, so they count as successes
                 with lock:
-                    completed_count += 1
-                    safe_file = image_file.encode('ascii', 'replace').decode('ascii')
-                    print(f"[{completed_count}/{total_files}] {safe_file} - already processed")
+                    for done_file in done_files:
+                        success_count += 1
+                        completed_count += 1
+                        skipped_count += 1
+                        progress.emit(events, progress.PAGE_DONE, f"[{completed_count}/{total_files}] {done_file.encode('ascii', 'replace').decode('ascii')} - already processed",
+                                      item=done_file, done=completed_count, total=total_files, status='skipped')
                 return
 
-            with Image.open(image_path) as img:
-                if img.mode in ('P', 'RGBA', 'LA'):
-                    img = img.convert('RGB')
-
-                text = pytesseract.image_to_string(img, lang=language)
-                text = text.strip()
-
-            with open(output_txt_path, 'w', encoding='utf-8', errors='replace') as f:
-                f.write(text)
-
+            journal.start(image_file, signature)
+            text, layout, cached, timings = ocr_file(image_path)
             char_count = len(text)
+            status = 'cached' if cached else 'success'
+
+            write_start = time.perf_counter()
+            if snk.TXT in formats:
+                jnl.atomic_write_text(output_txt_path, text)
+                journal.done(image_file, signature, output_txt_path)
+            else:
+                journal.done(image_file, signature)
+            snk.write_all(sinks, page_index[image_path], image_file, text,
+                          {'status': status, 'chars': char_count, 'words': len(text.split()), 'timings': dict(timings)}, layout)
+            timings['write'] = time.perf_counter() - write_start
+            timings['queue_wait'] = queue_wait
+            timings['total'] = time.perf_counter() - item_start
+            suffix = " (cached)" if cached else ""
 
             with lock:
                 success_count += 1
                 completed_count += 1
-                safe_file = image_file.encode('ascii', 'replace').decode('ascii')
-                print(f"[{completed_count}/{total_files}] {safe_file} - {char_count} chars")
+                if cached:
+                    cached_count += 1
+                progress.emit(events, progress.PAGE_DONE, f"[{completed_count}/{total_files}] {safe_file} - {char_count} chars{suffix}",
+                              item=image_file, done=completed_count, total=total_files, status=status,
+                              timings=timings, chars=char_count)
 
         except Exception as e:
+            if signature is not None:
+                journal.failed(image_file, signature, e)
+            snk.write_all(sinks, page_index[image_path], image_file, None, {'status': 'error', 'error': str(e)})
             with lock:
                 completed_count += 1
-                safe_file = image_file.encode('ascii', 'replace').decode('ascii')
-                print(f"[{completed_count}/{total_files}] {safe_file} - error: {str(e)}")
-
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = [executor.submit(process_image_thread, (img_path, output_folder, language)) 
-                  for img_path in image_paths]
-
-        for future in as_completed(futures):
-            future.result()
+                progress.emit(events, progress.ERROR, f"[{completed_count}/{total_files}] {safe_file} - error: {str(e)}",
+                              item=image_file, done=completed_count, total=total_files, status='error', error=str(e))
+            fan_out(image_path, signature, error=e)
+            return
+
+        fan_out(image_path, signature, text, layout)
+
+    def run_phase(paths, workers, threads):
+        nonlocal pool
+        with autotune.omp_thread_limit(threads):
+            # Pool processes copy OMP_THREAD_LIMIT when they start, so each phase gets its own pool
+            if ocr_pool is not None:
+                pool = ocr_pool
+            elif engine == 'processes':
+                pool = ocrengine.create_ocr_pool(language, workers, cache=cache, preprocess=preprocess)
+            try:
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    futures = [executor.submit(process_image_thread, (img_path, output_folder, language, time.perf_counter()))
+                              for img_path in paths]
+
+                    for future in as_completed(futures):
+                        future.result()
+            finally:
+                if pool is not None and pool is not ocr_pool:
+                    pool.shutdown()
+                pool = None
+
+    next_index = 0
+    try:
+        if tuner is not None:
+            while True:
+                probe = tuner.next_probe()
+                if probe is None or (cancel_event is not None and cancel_event.is_set()):
+                    break
+
+                workers, threads, size = probe
+                probe_start = time.perf_counter()
+                run_phase(image_paths[next_index:next_index + size], workers, threads)
+                rate = tuner.record(workers, threads, size, time.perf_counter() - probe_start)
+                next_index += size
+                progress.emit(events, progress.INFO, f"Auto-tune: {workers} workers x {threads} threads - {rate:.2f} images/second")
+
+            actual_workers, threads_per_worker = tuner.best()
+            progress.emit(events, progress.INFO, f"Auto-tune picked {actual_workers} workers x {threads_per_worker} threads",
+                          workers=actual_workers, threads_per_worker=threads_per_worker, probes=tuner.results)
+
+        if next_index < total_files:
+            run_phase(image_paths[next_index:], actual_workers, threads_per_worker)
+    finally:
+        journal.close()
+        snk.close_all(sinks)
 
     end_time = time.time()
     processing_time = end_time - start_time
 
-    print("-" * 50)
-    print(f"Total processing time: {processing_time:.2f} seconds")
-    print(f"Average: {processing_time/total_files:.2f} seconds per image")
-    print(f"Speed: {total_files/processing_time:.2f} images/second")
+    processed = completed_count - skipped_count
+    footer = ["-" * 50,
+              f"Total processing time: {processing_time:.2f} seconds"]
+    if processed:
+        footer.append(f"Average: {processing_time/processed:.2f} seconds per image")
+        footer.append(f"Speed: {processed/processing_time:.2f} images/second")
+    if skipped_count:
+        footer.append(f"Already done in an earlier run: {skipped_count} images")
+    if cache is not None:
+        footer.append(f"Cache hits: {cached_count}/{total_files}")
+    progress.emit(events, progress.FINISHED, "\n".join(footer), done=completed_count, total=total_files,
+                  elapsed=processing_time, success=success_count, skipped=skipped_count)
 
     return success_count
 
-def main():
-    parser = argparse.ArgumentParser(description='Fast parallel OCR with language support', formatter_class=argparse.RawDescriptionHelpFormatter)
-
-    parser.add_argument('-i', '--input', required=True, help='Input folder with images')
-    parser.add_argument('-o', '--output', required=True, help='Output folder for TXT files')
-    parser.add_argument('--workers', type=int, required=True, help='Number of parallel workers (e.g., 4)')
+def add_arguments(parser, required=True):
+    parser.add_argument('-i', '--input', required=required, help='Input folder with images, or a DOCX file to OCR its embedded images without extracting them')
+    parser.add_argument('-o', '--output', required=required, help='Output folder for TXT files')
+    parser.add_argument('--workers', type=autotune.parse_workers, required=required, help='Number of parallel workers (e.g., 4), or "auto" to measure the fastest split on the first pages')
+    parser.add_argument('--threads-per-worker', type=int, default=None, help='OpenMP threads each tesseract may use (default: CPU count / workers, at most 4)')
     parser.add_argument('--lang', default='eng', help='OCR language (vie, eng, vie+eng, etc. Default: eng)')
-
-    args = parser.parse_args()
-
+    parser.add_argument('--engine', choices=['threads', 'processes'], default='threads', help='threads: one tesseract call per image; processes: persistent workers that load the language once (default: threads)')
+    parser.add_argument('--preprocess', action='store_true', help='Grayscale, crop, deskew, downscale and binarize images before OCR (faster, often more accurate on scans)')
+    parser.add_argument('--format', type=snk.parse_formats, default=(snk.TXT,), help=f'Comma separated outputs: {", ".join(snk.FORMATS)} (default: txt, one file per image)')
+    parser.add_argument('--no-resume', dest='resume', action='store_false', help='Redo every image instead of skipping the ones the job journal already records as done')
+    parser.add_argument('--no-dedup', dest='dedup', action='store_false', help='OCR byte-identical images separately instead of once')
+    parser.add_argument('--dedup-similar', action='store_true', help='Also treat near-identical images (re-encoded or re-scaled copies, by perceptual hash) as repeats')
+    parser.add_argument('--dedup-distance', type=int, default=dd.DEFAULT_MAX_DISTANCE, help=f'Most differing perceptual hash bits (of {dd.DHASH_SIZE * dd.DHASH_SIZE}) still counted as the same image (default: {dd.DEFAULT_MAX_DISTANCE})')
+    parser.add_argument('--cache', nargs='?', const=ocrcache.DEFAULT_CACHE_PATH, default=None, help=f'Reuse OCR results for identical images from this SQLite cache (default path: {ocrcache.DEFAULT_CACHE_PATH})')
+    parser.add_argument('--cache-size-mb', type=int, default=ocrcache.DEFAULT_CACHE_SIZE_MB, help=f'Maximum cache size before least recently used entries are evicted (default: {ocrcache.DEFAULT_CACHE_SIZE_MB})')
+    parser.add_argument('--report', default=None, help='Write a JSON run report with throughput, latency percentiles and per-stage timings to this path')
+
+def run(args):
     if not os.path.exists(args.input):
         print(f"Input folder doesn't exist: {args.input}")
         sys.exit(1)
@@ -140,7 +513,22 @@ def main():
     print(f"Input: {args.input}")
     print(f"Output: {args.output}")
 
-    success_count = fast_ocr_images(args.input, args.output, args.lang, args.workers)
+    report = rpt.RunReport('OCR_Images', vars(args)) if args.report else None
+    events = progress.MultiSink(progress.ConsoleReporter(), report)
+
+    cache = ocrcache.OCRCache(args.cache, args.cache_size_mb) if args.cache else None
+    try:
+        if os.path.isfile(args.input) and args.input.lower().endswith('.docx'):
+            success_count = ocr_docx(args.input, args.output, args.lang, args.workers, args.engine, cache, events, preprocess=args.preprocess, dedup=args.dedup)
+        else:
+            success_count = fast_ocr_images(args.input, args.output, args.lang, args.workers, args.engine, cache, events, threads_per_worker=args.threads_per_worker, preprocess=args.preprocess, resume=args.resume, formats=args.format, dedup=args.dedup, dedup_similar=args.dedup_similar, dedup_distance=args.dedup_distance)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    if report is not None:
+        report.write(args.report)
+        print(f"Run report: {args.report}")
 
     if success_count > 0:
         print(f"Successfully processed {success_count} files")
@@ -148,5 +536,10 @@ def main():
         print("No files processed")
         sys.exit(1)
 
+def main():
+    parser = argparse.ArgumentParser(description='Fast parallel OCR with language support', formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    run(parser.parse_args())
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,11 +1,23 @@
 import os
+import json
 import argparse
 from pathlib import Path
 import sys
+import time
 from PIL import Image
 import pytesseract
+import OCR_Cache as ocrcache
+import Progress as progress
+import Preprocess as pre
+import Journal as jnl
+import Dedup as dd
+import Sinks as snk
+import Report as rpt
+
+def ocr_images_to_individual_files(input_folder, output_folder, language='eng', cache=None, events=None, cancel_event=None, preprocess=False, resume=True, formats=(snk.TXT,), document_name=None, dedup=True, dedup_similar=False, dedup_distance=dd.DEFAULT_MAX_DISTANCE, page_numbers=None, text_pages=()):
+    if events is None:
+        events = progress.ConsoleReporter()
 
-def ocr_images_to_individual_files(input_folder, output_folder, language='eng'):
     Path(output_folder).mkdir(parents=True, exist_ok=True)
 
     image_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.gif', '.webp'}
@@ -16,65 +28,194 @@ def ocr_images_to_individual_files(input_folder, output_folder, language='eng'):
         if os.path.isfile(file_path) and os.path.splitext(f)[1].lower() in image_extensions:
             image_files.append(f)
 
-    if not image_files:
-        print("No image files found in the input folder")
+    if page_numbers is not None:
+        # Rendered PDF pages: only this render's images, numbered by their page in the document
+        image_files = [f for f in image_files if f in page_numbers]
+
+    if not image_files and not text_pages:
+        progress.emit(events, progress.FINISHED, "No image files found in the input folder")
         return 0
 
-    image_files.sort()
+    journal = jnl.Journal(jnl.journal_path(output_folder))
+    if not resume:
+        journal.reset()
 
-    print(f"Found {len(image_files)} images for OCR processing")
-    print(f"Language: {language}")
-    print("-" * 50)
+    # Each unique image is OCR'd once and its text is copied to every repeat
+    pages, duplicates = dd.plan_pages(input_folder, [os.path.join(input_folder, f) for f in image_files], dedup, dedup_similar, dedup_distance, journal)
+    pages = [os.path.basename(path) for path in pages]
+    copies = {os.path.basename(original): [os.path.basename(d) for d in repeats] for original, repeats in dd.copies_of(duplicates).items()}
+    image_files = [f for f in pages if os.path.join(input_folder, f) not in duplicates]
+    page_index = {f: (page_numbers or {}).get(f, i) for i, f in enumerate(pages, 1)}
+    total_files = len(pages)
+
+    header = [f"Found {total_files} images for OCR processing", f"Language: {language}"]
+    if preprocess:
+        header.append("Preprocessing: grayscale, crop, deskew, downscale, binarize")
+    if cache is not None:
+        header.append(f"OCR cache: {cache.path}")
+    if duplicates:
+        header.append(f"{len(duplicates)} duplicate images will reuse the text of their originals")
+    header.append("-" * 50)
+    progress.emit(events, progress.STARTED, "\n".join(header), total=total_files, workers=1)
+
+    with_layout = snk.needs_layout(formats)
+
+    def ocr_uncached(img, timings):
+        start = time.perf_counter()
+        if preprocess:
+            img = pre.preprocess(img, timings)
+        else:
+            if img.mode in ('P', 'RGBA', 'LA'):
+                img = img.convert('RGB')
+            timings['convert'] = time.perf_counter() - start
+        converted = time.perf_counter()
+
+        # With hOCR/ALTO output the cached value is the word layout as JSON instead of plain text
+        if with_layout:
+            result = json.dumps(snk.data_layout(pytesseract.image_to_data(img, lang=language, output_type=pytesseract.Output.DICT)))
+        else:
+            result = pytesseract.image_to_string(img, lang=language).strip()
+        timings['tesseract'] = time.perf_counter() - converted
+        return result
 
+    cache_config = pre.cache_config('', preprocess)
+    if with_layout:
+        cache_config = snk.layout_cache_config(cache_config)
+
+    sinks = snk.open_sinks(output_folder, formats, document_name or Path(input_folder).resolve().name)
+    snk.write_text_pages(sinks, text_pages)
+    # Document-level outputs need every page, so only per-page TXT output can skip finished pages
+    skip_done = not sinks
+
+    start_time = time.time()
     success_count = 0
-    for i, image_file in enumerate(image_files, 1):
+    done_count = 0
+    skipped_count = 0
+    for image_file in image_files:
+        if cancel_event is not None and cancel_event.is_set():
+            progress.emit(events, progress.INFO, "Cancelled")
+            break
+
+        i = page_index[image_file]
+        safe_image_file = image_file.encode('ascii', 'replace').decode('ascii')
+        item_start = time.perf_counter()
+        timings = {}
+        repeats = copies.get(image_file, [])
+
+        signature = None
         try:
             image_path = os.path.join(input_folder, image_file)
 
             image_stem = Path(image_file).stem
             output_txt_file = f"{image_stem}.txt"
             output_txt_path = os.path.join(output_folder, output_txt_file)
+            signature = jnl.file_signature(image_path, language, pre.cache_config('', preprocess))
 
-            with Image.open(image_path) as img:
-                if img.mode in ('P', 'RGBA', 'LA'):
-                    img = img.convert('RGB')
-
-                text = pytesseract.image_to_string(img, lang=language)
-                text = text.strip()
+            if skip_done and all(journal.is_done(f, signature) for f in [image_file] + repeats):
+                # Pages finished by an earlier run still have their output, so they count as successes
+                for f in [image_file] + repeats:
+                    success_count += 1
+                    done_count += 1
+                    skipped_count += 1
+                    progress.emit(events, progress.PAGE_DONE, f"Skipped {done_count}/{total_files}: {f.encode('ascii', 'replace').decode('ascii')} - already processed",
+                                  item=f, done=done_count, total=total_files, status='skipped')
+                continue
 
-            with open(output_txt_path, 'w', encoding='utf-8', errors='replace') as f:
-                f.write(text)
+            journal.start(image_file, signature)
+            with Image.open(image_path) as img:
+                img.load()
+                timings['decode'] = time.perf_counter() - item_start
+                result, cached = ocrcache.cached_ocr(img, language, cache_config, cache, lambda im: ocr_uncached(im, timings), timings)
 
+            layout = json.loads(result) if with_layout else None
+            text = snk.layout_text(layout) if with_layout else result
             char_count = len(text)
             word_count = len(text.split()) if text else 0
 
-            safe_image_file = image_file.encode('ascii', 'replace').decode('ascii')
-            safe_txt_file = output_txt_file.encode('ascii', 'replace').decode('ascii')
-            print(f"Processed {i}/{len(image_files)}: {safe_image_file} -> {safe_txt_file}")
-            print(f"   {char_count} characters, {word_count} words")
+            write_start = time.perf_counter()
+            if snk.TXT in formats:
+                jnl.atomic_write_text(output_txt_path, text)
+                journal.done(image_file, signature, output_txt_path)
+            else:
+                journal.done(image_file, signature)
+            snk.write_all(sinks, i, image_file, text,
+                          {'status': 'cached' if cached else 'success', 'chars': char_count, 'words': word_count, 'timings': dict(timings)}, layout)
+            timings['write'] = time.perf_counter() - write_start
+            timings['total'] = time.perf_counter() - item_start
+            suffix = " (cached)" if cached else ""
 
+            safe_txt_file = output_txt_file.encode('ascii', 'replace').decode('ascii')
             success_count += 1
+            done_count += 1
+            progress.emit(events, progress.PAGE_DONE,
+                          f"Processed {done_count}/{total_files}: {safe_image_file} -> {safe_txt_file}\n   {char_count} characters, {word_count} words{suffix}",
+                          item=image_file, done=done_count, total=total_files, status='cached' if cached else 'success',
+                          timings=timings, chars=char_count, words=word_count)
 
-        except UnicodeEncodeError as e:
-            safe_image_file = image_file.encode('ascii', 'replace').decode('ascii')
-            print(f"Processed {i}/{len(image_files)}: {safe_image_file} -> {output_txt_file}")
-            print(f"   Note: Contains special characters that can't be displayed in console")
-            success_count += 1
         except Exception as e:
-            error_msg = f"Failed to process {image_file}: {e}"
-            print(error_msg)
+            if signature is not None:
+                journal.failed(image_file, signature, e)
+            snk.write_all(sinks, i, image_file, None, {'status': 'error', 'error': str(e)})
+            done_count += 1
+            progress.emit(events, progress.ERROR, f"Failed to process {safe_image_file}: {e}",
+                          item=image_file, done=done_count, total=total_files, status='error', error=str(e))
+            # The repeats would fail the same way
+            for duplicate_file in repeats:
+                if signature is not None:
+                    journal.failed(duplicate_file, signature, e)
+                snk.write_all(sinks, page_index[duplicate_file], duplicate_file, None, {'status': 'error', 'error': str(e)})
+                done_count += 1
+                progress.emit(events, progress.ERROR, f"Failed to process {duplicate_file.encode('ascii', 'replace').decode('ascii')}: {e}",
+                              item=duplicate_file, done=done_count, total=total_files, status='error', error=str(e))
+            continue
 
-    return success_count
+        # Repeats of this image get its text without another OCR run
+        for duplicate_file in repeats:
+            duplicate_txt_file = f"{Path(duplicate_file).stem}.txt"
+            try:
+                if snk.TXT in formats:
+                    duplicate_txt_path = os.path.join(output_folder, duplicate_txt_file)
+                    jnl.atomic_write_text(duplicate_txt_path, text)
+                    journal.done(duplicate_file, signature, duplicate_txt_path)
+                else:
+                    journal.done(duplicate_file, signature)
+                snk.write_all(sinks, page_index[duplicate_file], duplicate_file, text,
+                              {'status': 'duplicate', 'original': image_file, 'chars': char_count, 'words': word_count}, layout)
+                success_count += 1
+                done_count += 1
+                progress.emit(events, progress.PAGE_DONE,
+                              f"Processed {done_count}/{total_files}: {duplicate_file.encode('ascii', 'replace').decode('ascii')} -> {duplicate_txt_file.encode('ascii', 'replace').decode('ascii')}\n   duplicate of {safe_image_file}",
+                              item=duplicate_file, done=done_count, total=total_files, status='duplicate', chars=char_count, words=word_count, original=image_file)
+            except Exception as e:
+                journal.failed(duplicate_file, signature, e)
+                snk.write_all(sinks, page_index[duplicate_file], duplicate_file, None, {'status': 'error', 'error': str(e)})
+                done_count += 1
+                progress.emit(events, progress.ERROR, f"Failed to process {duplicate_file.encode('ascii', 'replace').decode('ascii')}: {e}",
+                              item=duplicate_file, done=done_count, total=total_files, status='error', error=str(e))
 
-def main():
-    parser = argparse.ArgumentParser(description='Single-thread OCR with language support', formatter_class=argparse.RawDescriptionHelpFormatter)
+    journal.close()
+    snk.close_all(sinks)
+    progress.emit(events, progress.FINISHED, done=done_count, total=total_files,
+                  elapsed=time.time() - start_time, success=success_count, skipped=skipped_count)
 
-    parser.add_argument('-i', '--input', required=True, help='Input folder containing images')
-    parser.add_argument('-o', '--output', required=True, help='Output folder for TXT files')
+    return success_count
+
+def add_arguments(parser, required=True):
+    parser.add_argument('-i', '--input', required=required, help='Input folder containing images')
+    parser.add_argument('-o', '--output', required=required, help='Output folder for TXT files')
     parser.add_argument('--lang', default='eng', help='OCR language (vie, eng, vie+eng, etc. Default: eng)')
 
-    args = parser.parse_args()
+    parser.add_argument('--preprocess', action='store_true', help='Grayscale, crop, deskew, downscale and binarize images before OCR (faster, often more accurate on scans)')
+    parser.add_argument('--format', type=snk.parse_formats, default=(snk.TXT,), help=f'Comma separated outputs: {", ".join(snk.FORMATS)} (default: txt, one file per image)')
+    parser.add_argument('--no-resume', dest='resume', action='store_false', help='Redo every image instead of skipping the ones the job journal already records as done')
+    parser.add_argument('--no-dedup', dest='dedup', action='store_false', help='OCR byte-identical images separately instead of once')
+    parser.add_argument('--dedup-similar', action='store_true', help='Also treat near-identical images (re-encoded or re-scaled copies, by perceptual hash) as repeats')
+    parser.add_argument('--dedup-distance', type=int, default=dd.DEFAULT_MAX_DISTANCE, help=f'Most differing perceptual hash bits (of {dd.DHASH_SIZE * dd.DHASH_SIZE}) still counted as the same image (default: {dd.DEFAULT_MAX_DISTANCE})')
+    parser.add_argument('--cache', nargs='?', const=ocrcache.DEFAULT_CACHE_PATH, default=None, help=f'Reuse OCR results for identical images from this SQLite cache (default path: {ocrcache.DEFAULT_CACHE_PATH})')
+    parser.add_argument('--cache-size-mb', type=int, default=ocrcache.DEFAULT_CACHE_SIZE_MB, help=f'Maximum cache size before least recently used entries are evicted (default: {ocrcache.DEFAULT_CACHE_SIZE_MB})')
+    parser.add_argument('--report', default=None, help='Write a JSON run report with throughput, latency percentiles and per-stage timings to this path')
 
+def run(args):
     if not os.path.exists(args.input):
         print(f"Error: Input folder does not exist: {args.input}")
         sys.exit(1)
@@ -84,7 +225,19 @@ def main():
     print(f"OCR Language: {args.lang}")
     print("-" * 50)
 
-    success_count = ocr_images_to_individual_files(args.input, args.output, args.lang)
+    report = rpt.RunReport('OCR_Images_slow', vars(args)) if args.report else None
+    events = progress.MultiSink(progress.ConsoleReporter(), report)
+
+    cache = ocrcache.OCRCache(args.cache, args.cache_size_mb) if args.cache else None
+    try:
+        success_count = ocr_images_to_individual_files(args.input, args.output, args.lang, cache, events, preprocess=args.preprocess, resume=args.resume, formats=args.format, dedup=args.dedup, dedup_similar=args.dedup_similar, dedup_distance=args.dedup_distance)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    if report is not None:
+        report.write(args.report)
+        print(f"Run report: {args.report}")
 
     print("-" * 50)
     if success_count > 0:
@@ -107,5 +260,10 @@ def main():
         print("No images were processed successfully")
         sys.exit(1)
 
+def main():
+    parser = argparse.ArgumentParser(description='Single-thread OCR with language support', formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    run(parser.parse_args())
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -2,49 +2,237 @@ import os
 import sys
 import argparse
 from pathlib import Path
+import math
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import time
 import fitz
+import Batch as batch
+import Raster as raster
+import PageDPI as pdpi
+import Progress as progress
+import Report as rpt
+
+def page_text_layer(page, min_text_chars=50):
+    text = page.get_text('text').strip()
+    # Count only visible characters so layout whitespace can't pass the threshold
+    if sum(1 for c in text if not c.isspace()) >= min_text_chars:
+        return text
+    return None
+
+def render_page(page, page_number, output_folder, dpi, text_layer=False, min_text_chars=50, text_output_folder=None, max_pixmap_bytes=None, dpi_range=(pdpi.MIN_DPI, pdpi.MAX_DPI)):
+    start = time.perf_counter()
+
+    if text_layer:
+        text = page_text_layer(page, min_text_chars)
+        if text is not None:
+            extracted = time.perf_counter()
+            text_filename = f"page_{page_number:03d}.txt"
+            with open(os.path.join(text_output_folder, text_filename), 'w', encoding='utf-8', errors='replace') as f:
+                f.write(text)
+            end = time.perf_counter()
+            timings = {'text_layer': extracted - start, 'write': end - extracted, 'total': end - start}
+            return {'page': page_number, 'file': text_filename, 'kind': 'text', 'timings': timings}
+
+    # Only pages that get rasterized pay for choosing their resolution
+    matrix, page_dpi, dpi_source = pdpi.page_matrix(page, dpi, dpi_range)
+    chosen = time.perf_counter()
+    timings = {'choose_dpi': chosen - start} if dpi == pdpi.AUTO else {}
+    record = {'page': page_number, 'file': f"page_{page_number:03d}.png", 'kind': 'image', 'timings': timings, 'dpi': page_dpi, 'dpi_source': dpi_source}
+    output_path = os.path.join(output_folder, record['file'])
+
+    if max_pixmap_bytes and raster.pixmap_bytes(page, matrix) > max_pixmap_bytes:
+        # Too big for one pixmap: render bands and stream them into the PNG
+        record['bands'] = raster.save_png_banded(page, matrix, output_path, max_pixmap_bytes)
+        end = time.perf_counter()
+        timings.update({'render_banded': end - chosen, 'total': end - start})
+        return record
+
+    pix = page.get_pixmap(matrix=matrix)
+    rendered = time.perf_counter()
+    pix.save(output_path)
+    end = time.perf_counter()
+    timings.update({'render': rendered - chosen, 'encode_write': end - rendered, 'total': end - start})
+    return record
+
+def emit_page(events, record, done, total):
+    message = f"Text layer: {record['file']}" if record['kind'] == 'text' else f"Saved: {record['file']}"
+    if record.get('dpi_source', 'fixed') != 'fixed' and record['kind'] == 'image':
+        message += f" at {record['dpi']} DPI"
+    if record.get('bands', 1) > 1:
+        message += f" ({record['bands']} bands)"
+    progress.emit(events, progress.PAGE_DONE, message, item=record['file'], done=done, total=total,
+                  status=record['kind'], timings=record['timings'], page=record['page'], dpi=record.get('dpi'))
+
+def render_page_range(pdf_path, output_folder, dpi, start, stop, text_layer=False, min_text_chars=50, text_output_folder=None, events=None, cancel_event=None, max_pixmap_mb=raster.DEFAULT_MAX_PIXMAP_MB, dpi_range=(pdpi.MIN_DPI, pdpi.MAX_DPI)):
+    max_pixmap_bytes = int(max_pixmap_mb * 1024 * 1024) if max_pixmap_mb else None
+    records = []
+
+    # Each worker opens its own handle because fitz documents can't be shared
+    with fitz.open(pdf_path) as pdf:
+        for index in range(start, stop):
+            if cancel_event is not None and cancel_event.is_set():
+                progress.emit(events, progress.INFO, "Cancelled")
+                break
+
+            record = render_page(pdf[index], index + 1, output_folder, dpi, text_layer, min_text_chars, text_output_folder, max_pixmap_bytes, dpi_range)
+            records.append(record)
+            # Pool workers have no sink; their records are reported by the parent
+            emit_page(events, record, index - start + 1, stop - start)
+
+    return records
+
+def page_ranges(page_count, workers):
+    # Several small ranges per worker keep every process busy until the end
+    chunk_size = max(1, math.ceil(page_count / (workers * 4)))
+    return [(start, min(start + chunk_size, page_count)) for start in range(0, page_count, chunk_size)]
+
+def extract_images_from_pdf(pdf_path, output_folder, dpi=200, text_layer=False, min_text_chars=50, text_output_folder=None, workers=1, events=None, cancel_event=None, max_pixmap_mb=raster.DEFAULT_MAX_PIXMAP_MB, dpi_range=(pdpi.MIN_DPI, pdpi.MAX_DPI)):
+    if events is None:
+        events = progress.ConsoleReporter()
 
-def extract_images_from_pdf(pdf_path, output_folder, dpi=200):
     if not os.path.exists(pdf_path):
-        print(f"PDF file not found: {pdf_path}")
+        progress.emit(events, progress.ERROR, f"PDF file not found: {pdf_path}", item=pdf_path, status='error')
         return 0
 
     Path(output_folder).mkdir(parents=True, exist_ok=True)
-
-    print(f"Converting PDF with PyMuPDF at {dpi} DPI...")
+    if text_layer:
+        text_output_folder = text_output_folder or output_folder
+        Path(text_output_folder).mkdir(parents=True, exist_ok=True)
 
     try:
-        pdf = fitz.open(pdf_path)
-        zoom = dpi / 72.0
-        matrix = fitz.Matrix(zoom, zoom)
-
-        for i, page in enumerate(pdf, 1):
-            pix = page.get_pixmap(matrix=matrix)
-            output_filename = f"page_{i:03d}.png"
-            output_path = os.path.join(output_folder, output_filename)
-            pix.save(output_path)
-            print(f"Saved: {output_filename}")
-
-        page_count = len(pdf)
-        pdf.close()
-        print(f"Successfully extracted {page_count} pages")
-        return page_count
+        start_time = time.time()
+        with fitz.open(pdf_path) as pdf:
+            page_count = len(pdf)
+
+        workers = workers if workers is not None else os.cpu_count()
+        workers = max(1, min(workers, page_count))
+        header = f"Converting PDF with PyMuPDF at {pdpi.dpi_label(dpi, dpi_range)} DPI..."
+        if workers > 1:
+            header += f"\nUsing {workers} processes"
+        progress.emit(events, progress.STARTED, header, item=pdf_path, total=page_count, workers=workers)
+
+        records = []
+
+        if workers == 1:
+            records = render_page_range(pdf_path, output_folder, dpi, 0, page_count, text_layer, min_text_chars, text_output_folder, events, cancel_event, max_pixmap_mb, dpi_range)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(render_page_range, pdf_path, output_folder, dpi, start, stop, text_layer, min_text_chars, text_output_folder, max_pixmap_mb=max_pixmap_mb, dpi_range=dpi_range)
+                           for start, stop in page_ranges(page_count, workers)]
+
+                for future in as_completed(futures):
+                    if future.cancelled():
+                        continue
+
+                    for record in future.result():
+                        records.append(record)
+                        emit_page(events, record, len(records), page_count)
+
+                    # Ranges already running finish, the rest are dropped
+                    if cancel_event is not None and cancel_event.is_set():
+                        for pending in futures:
+                            pending.cancel()
+
+        done_count = len(records)
+        text_page_count = sum(1 for record in records if record['kind'] == 'text')
+        footer = []
+        if text_layer:
+            footer.append(f"Used the existing text layer for {text_page_count} of {page_count} pages")
+        footer.append(f"Successfully extracted {done_count} pages")
+        progress.emit(events, progress.FINISHED, "\n".join(footer), item=pdf_path, done=done_count, total=page_count,
+                      elapsed=time.time() - start_time, success=done_count)
+        return done_count
 
     except Exception as e:
-        print(f"Error processing PDF: {e}")
+        progress.emit(events, progress.ERROR, f"Error processing PDF: {e}", item=pdf_path, status='error', error=str(e))
         return 0
 
-def main():
-    parser = argparse.ArgumentParser(description='Extract images from PDF to PNG files.', prog='PDF2PNG')
-    parser.add_argument('-i', '--input', required=True, help='Path to the input PDF file')
-    parser.add_argument( '-o', '--output', required=True, help='Path to the output folder for PNG images')
-    parser.add_argument('--dpi', type=int, default=200, help='Resolution for output images in DPI (default: 200)')
+def extract_images_from_pdfs(jobs, dpi=200, text_layer=False, min_text_chars=50, workers=None, events=None, max_pixmap_mb=raster.DEFAULT_MAX_PIXMAP_MB, dpi_range=(pdpi.MIN_DPI, pdpi.MAX_DPI)):
+    if events is None:
+        events = progress.ConsoleReporter()
+
+    workers = workers if workers is not None else os.cpu_count()
+    task_lists = []
+    page_counts = {}
+
+    for pdf_path, output_folder in jobs:
+        try:
+            with fitz.open(pdf_path) as pdf:
+                page_count = len(pdf)
+        except Exception as e:
+            progress.emit(events, progress.ERROR, f"Skipping {pdf_path}: {e}", item=pdf_path, status='error', error=str(e))
+            continue
+
+        Path(output_folder).mkdir(parents=True, exist_ok=True)
+        page_counts[pdf_path] = page_count
+        task_lists.append([(pdf_path, output_folder, start, stop) for start, stop in page_ranges(page_count, workers)])
+
+    if not task_lists:
+        progress.emit(events, progress.FINISHED, "No PDF files to convert")
+        return 0
+
+    start_time = time.time()
+    total_pages = sum(page_counts.values())
+    progress.emit(events, progress.STARTED, f"Converting {len(task_lists)} PDFs ({total_pages} pages) with PyMuPDF at {pdpi.dpi_label(dpi, dpi_range)} DPI using {workers} processes...",
+                  total=total_pages, workers=workers)
+
+    # Round-robin across documents so small files are not stuck behind a huge one
+    tasks = batch.interleave(task_lists)
+    failed = set()
+    done_count = 0
 
-    args = parser.parse_args()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(render_page_range, pdf_path, output_folder, dpi, start, stop, text_layer, min_text_chars, output_folder, max_pixmap_mb=max_pixmap_mb, dpi_range=dpi_range): (pdf_path, output_folder)
+                   for pdf_path, output_folder, start, stop in tasks}
 
-    print(f"PDF2PNG - Processing: {args.input}")
+        for future in as_completed(futures):
+            pdf_path, output_folder = futures[future]
+            try:
+                for record in future.result():
+                    done_count += 1
+                    record['file'] = os.path.join(os.path.basename(output_folder), record['file'])
+                    emit_page(events, record, done_count, total_pages)
+            except Exception as e:
+                progress.emit(events, progress.ERROR, f"Error processing {pdf_path}: {e}", item=pdf_path, status='error', error=str(e))
+                failed.add(pdf_path)
 
-    count = extract_images_from_pdf(args.input, args.output, args.dpi, args.use_pymupdf)
+    page_count = sum(count for pdf_path, count in page_counts.items() if pdf_path not in failed)
+    progress.emit(events, progress.FINISHED, f"Successfully extracted {page_count} pages from {len(page_counts) - len(failed)} PDFs",
+                  done=done_count, total=total_pages, elapsed=time.time() - start_time, success=page_count)
+    return page_count
+
+def add_arguments(parser, required=True):
+    parser.add_argument('-i', '--input', help='Path to the input PDF file, a folder of PDFs, or a glob such as "scans/*.pdf"')
+    parser.add_argument( '-o', '--output', required=required, help='Path to the output folder for PNG images (one subfolder per PDF in batch mode)')
+    parser.add_argument('--manifest', default=None, help='JSON or CSV list of PDFs with optional per-file output folders')
+    parser.add_argument('--dpi', type=pdpi.parse_dpi, default=200, help='Resolution for output images in DPI, or "auto" to pick one per page from its text size (default: 200)')
+    parser.add_argument('--min-dpi', type=int, default=pdpi.MIN_DPI, help=f'Lowest resolution --dpi auto may pick (default: {pdpi.MIN_DPI})')
+    parser.add_argument('--max-dpi', type=int, default=pdpi.MAX_DPI, help=f'Highest resolution --dpi auto may pick (default: {pdpi.MAX_DPI})')
+    parser.add_argument('--text-layer', action='store_true', help='Write TXT directly for pages that already contain text instead of rendering them')
+    parser.add_argument('--min-text-chars', type=int, default=50, help='Minimum characters for a page text layer to be used (default: 50)')
+    parser.add_argument('--text-output', default=None, help='Folder for text layer TXT files (default: the output folder)')
+    parser.add_argument('--workers', type=int, default=1, help='Number of processes rendering pages in parallel (default: 1)')
+    parser.add_argument('--max-pixmap-mb', type=int, default=raster.DEFAULT_MAX_PIXMAP_MB, help=f'Largest bitmap rendered in one piece; bigger pages are rendered in bands (default: {raster.DEFAULT_MAX_PIXMAP_MB}, 0 = no limit)')
+    parser.add_argument('--report', default=None, help='Write a JSON run report with throughput, latency percentiles and per-stage timings to this path')
+
+def run(args):
+    if not args.input and not args.manifest:
+        sys.exit("error: either --input or --manifest is required")
+
+    report = rpt.RunReport('PDF2PNG', vars(args)) if args.report else None
+    events = progress.MultiSink(progress.ConsoleReporter(), report)
+
+    if batch.is_batch_input(args.input, args.manifest):
+        jobs = batch.build_jobs(args.input, args.output, {'.pdf'}, args.manifest)
+        print(f"PDF2PNG - Batch of {len(jobs)} PDFs")
+        count = extract_images_from_pdfs(jobs, args.dpi, args.text_layer, args.min_text_chars, args.workers, events, args.max_pixmap_mb, (args.min_dpi, args.max_dpi))
+    else:
+        print(f"PDF2PNG - Processing: {args.input}")
+        count = extract_images_from_pdf(args.input, args.output, args.dpi, args.text_layer, args.min_text_chars, args.text_output, args.workers, events, max_pixmap_mb=args.max_pixmap_mb, dpi_range=(args.min_dpi, args.max_dpi))
+
+    if report is not None:
+        report.write(args.report)
+        print(f"Run report: {args.report}")
 
     if count > 0:
         print(f"Successfully converted {count} pages.")
@@ -53,5 +241,10 @@ def main():
         print("Conversion failed.")
         sys.exit(1)
 
+def main():
+    parser = argparse.ArgumentParser(description='Extract images from PDF to PNG files.', prog='PDF2PNG')
+    add_arguments(parser)
+    run(parser.parse_args())
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
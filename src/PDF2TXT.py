@@ -0,0 +1,363 @@
+import os
+import sys
+import argparse
+from pathlib import Path
+import queue
+import threading
+import time
+import fitz
+from PIL import Image
+import OCR_Images as ocrfast
+import OCR_Engine as ocrengine
+import PDF2PNG as pp
+import OCR_Cache as ocrcache
+import Preprocess as pre
+import Journal as jnl
+import Raster as raster
+import PageDPI as pdpi
+import SearchablePDF as searchable
+import Progress as progress
+import Report as rpt
+
+def render_pages_to_queue(pdf_path, dpi, page_queue, stop_event, text_layer=False, min_text_chars=50, skip_pages=None, max_pixmap_mb=raster.DEFAULT_MAX_PIXMAP_MB, dpi_range=(pdpi.MIN_DPI, pdpi.MAX_DPI)):
+    max_pixmap_bytes = int(max_pixmap_mb * 1024 * 1024) if max_pixmap_mb else None
+
+    with fitz.open(pdf_path) as pdf:
+        for i, page in enumerate(pdf, 1):
+            if stop_event.is_set():
+                break
+
+            if skip_pages and i in skip_pages:
+                continue
+
+            start = time.perf_counter()
+
+            if text_layer:
+                text = pp.page_text_layer(page, min_text_chars)
+                if text is not None:
+                    page_queue.put((i, 1, 1, text, None, None, {'text_layer': time.perf_counter() - start}, time.perf_counter()))
+                    continue
+
+            matrix, page_dpi, _ = pdpi.page_matrix(page, dpi, dpi_range)
+
+            # Pages over the memory cap are OCR'd band by band; cuts fall on blank rows so lines stay whole
+            bands = raster.band_rows(page, matrix, max_pixmap_bytes)
+            for band, (top, bottom) in enumerate(bands, 1):
+                if stop_event.is_set():
+                    break
+
+                clip = raster.band_clip(page, matrix, top, bottom) if len(bands) > 1 else None
+                pix = page.get_pixmap(matrix=matrix, clip=clip, alpha=False)
+                img = Image.frombytes('RGB', (pix.width, pix.height), pix.samples)
+                pix = None
+                timings = {'render': time.perf_counter() - start}
+
+                page_queue.put((i, band, len(bands), img, clip, page_dpi, timings, time.perf_counter()))
+                start = time.perf_counter()
+
+def pdf_to_text(pdf_path, output_folder, language='eng', dpi=200, max_workers=None, queue_size=None, engine='threads', text_layer=False, min_text_chars=50, cache=None, events=None, cancel_event=None, preprocess=False, resume=True, searchable_pdf=None, max_pixmap_mb=raster.DEFAULT_MAX_PIXMAP_MB, dpi_range=(pdpi.MIN_DPI, pdpi.MAX_DPI), ocr_pool=None):
+    if events is None:
+        events = progress.ConsoleReporter()
+
+    if not os.path.exists(pdf_path):
+        progress.emit(events, progress.ERROR, f"PDF file not found: {pdf_path}", item=pdf_path, status='error')
+        return 0
+
+    Path(output_folder).mkdir(parents=True, exist_ok=True)
+
+    try:
+        with fitz.open(pdf_path) as pdf:
+            total_pages = len(pdf)
+    except Exception as e:
+        progress.emit(events, progress.ERROR, f"Error opening PDF: {e}", item=pdf_path, status='error', error=str(e))
+        return 0
+
+    if total_pages == 0:
+        progress.emit(events, progress.FINISHED, "PDF has no pages", item=pdf_path)
+        return 0
+
+    if searchable_pdf and preprocess:
+        # Cropping and deskewing would move the words away from where they are on the page
+        progress.emit(events, progress.INFO, "Preprocessing is turned off for searchable PDF output so the text lines up with the page")
+        preprocess = False
+
+    actual_workers = max_workers if max_workers is not None else os.cpu_count()
+    # Each queued item is a decoded bitmap of at most max_pixmap_mb, so at most (queue size + workers) bands are in memory
+    page_queue = queue.Queue(maxsize=queue_size if queue_size else actual_workers * 2)
+    stop_event = cancel_event if cancel_event is not None else threading.Event()
+
+    header = [f"Streaming {total_pages} pages at {pdpi.dpi_label(dpi, dpi_range)} DPI into OCR"]
+    if engine == 'processes' or ocr_pool is not None:
+        backend = "tesserocr" if ocrengine.has_tesserocr() else "pytesseract"
+        header.append(f"Using {actual_workers} persistent worker processes ({backend})")
+    else:
+        header.append(f"Using {actual_workers} threads")
+    header.append(f"Language: {language}")
+    if preprocess:
+        header.append("Preprocessing: grayscale, crop, deskew, downscale, binarize")
+    if cache is not None:
+        header.append(f"OCR cache: {cache.path}")
+    if searchable_pdf:
+        header.append(f"Searchable PDF: {searchable_pdf}")
+    header.append("-" * 50)
+    progress.emit(events, progress.STARTED, "\n".join(header), item=pdf_path, total=total_pages, workers=actual_workers)
+
+    journal = jnl.Journal(jnl.journal_path(output_folder))
+    if not resume:
+        journal.reset()
+
+    # Every page shares one signature: the PDF file plus the settings that change its text
+    signature = jnl.file_signature(pdf_path, pdpi.dpi_label(dpi, dpi_range), language, text_layer, min_text_chars, pre.cache_config('', preprocess))
+    done_pages = {int(item[len('page_'):-len('.txt')]) for item in journal.done_items(signature)}
+    # The searchable PDF is rebuilt from scratch, so it needs every page again
+    if searchable_pdf:
+        done_pages = set()
+    if done_pages:
+        progress.emit(events, progress.INFO, f"Resuming: {len(done_pages)} of {total_pages} pages already done",
+                      item=pdf_path, done=len(done_pages), total=total_pages)
+
+    start_time = time.time()
+    # Pages finished by an earlier run still have their TXT file, so they count as successes
+    success_count = len(done_pages)
+    completed_count = len(done_pages)
+    text_layer_count = 0
+    lock = threading.Lock()
+
+    writer = None
+    if searchable_pdf:
+        try:
+            writer = searchable.SearchablePdfWriter(pdf_path, searchable_pdf)
+        except Exception as e:
+            journal.close()
+            progress.emit(events, progress.ERROR, f"Error creating searchable PDF: {e}", item=pdf_path, status='error', error=str(e))
+            return 0
+
+    # A caller that keeps a warm pool across jobs passes it in and stays its owner
+    pool = ocr_pool
+    if pool is None and engine == 'processes':
+        pool = ocrengine.create_ocr_pool(language, actual_workers, cache=cache, preprocess=preprocess)
+
+    def ocr_page(img, timings):
+        if pool is not None:
+            sent = time.perf_counter()
+            if writer is not None:
+                text, text_pdf, cached, worker_timings = pool.submit(ocrengine.ocr_image_bytes_pdf, img.mode, img.size, img.tobytes()).result()
+            else:
+                text_pdf = None
+                text, cached, worker_timings = pool.submit(ocrengine.ocr_image_bytes, img.mode, img.size, img.tobytes()).result()
+            worker_timings['ipc'] = max(0.0, time.perf_counter() - sent - sum(worker_timings.values()))
+            timings.update(worker_timings)
+            return text, text_pdf, cached
+
+        if writer is not None:
+            return searchable.cached_text_pdf(img, language, '', cache, lambda im: searchable.ocr_text_pdf(im, language, '', timings), timings)
+
+        text, cached = ocrcache.cached_ocr(img, language, pre.cache_config('', preprocess), cache,
+                                           lambda im: ocrfast.ocr_image(im, language, timings=timings, preprocess=preprocess), timings)
+        return text, None, cached
+
+    def producer():
+        try:
+            render_pages_to_queue(pdf_path, dpi, page_queue, stop_event, text_layer, min_text_chars, done_pages, max_pixmap_mb, dpi_range)
+        except Exception as e:
+            progress.emit(events, progress.ERROR, f"Error rendering PDF: {e}", item=pdf_path, status='error', error=str(e))
+        finally:
+            for _ in range(actual_workers):
+                page_queue.put(None)
+
+    partial_pages = {}
+
+    def collect_band(page_number, band, band_count, result):
+        # Returns every band's result once the last one arrives, or None while the page is incomplete
+        if band_count == 1:
+            return {1: result}
+
+        with lock:
+            parts = partial_pages.setdefault(page_number, {})
+            parts[band] = result
+            if len(parts) < band_count:
+                return None
+            return partial_pages.pop(page_number)
+
+    def consumer():
+        nonlocal success_count, completed_count, text_layer_count
+
+        while True:
+            item = page_queue.get()
+            if item is None:
+                return
+
+            page_number, band, band_count, page, clip, page_dpi, timings, queued = item
+            output_filename = f"page_{page_number:03d}.txt"
+            item_start = time.perf_counter()
+            timings['queue_wait'] = item_start - queued
+
+            # Drain pages that were already rendered when the job was cancelled
+            if stop_event.is_set():
+                continue
+
+            from_text_layer = isinstance(page, str)
+
+            try:
+                if band == 1:
+                    journal.start(output_filename, signature)
+                if from_text_layer:
+                    text, cached = page, False
+                else:
+                    text, text_pdf, cached = ocr_page(page, timings)
+                    page.close()
+                    if text_pdf is not None:
+                        writer.add_text_layer(page_number, text_pdf, clip)
+                timings['total'] = time.perf_counter() - item_start
+            except Exception as e:
+                text, cached = None, False
+                error = e
+            else:
+                error = None
+
+            parts = collect_band(page_number, band, band_count, (text, cached, timings, error))
+            if parts is None:
+                continue
+
+            errors = [part[3] for part in parts.values() if part[3] is not None]
+            try:
+                if errors:
+                    raise errors[0]
+
+                text = "\n".join(parts[b][0] for b in sorted(parts))
+                timings = {}
+                for part in parts.values():
+                    for stage, seconds in part[2].items():
+                        timings[stage] = timings.get(stage, 0.0) + seconds
+
+                if from_text_layer:
+                    status = 'text_layer'
+                else:
+                    status = 'cached' if all(part[1] for part in parts.values()) else 'success'
+
+                write_start = time.perf_counter()
+                output_path = os.path.join(output_folder, output_filename)
+                jnl.atomic_write_text(output_path, text)
+                journal.done(output_filename, signature, output_path)
+                timings['write'] = time.perf_counter() - write_start
+                # Rendering happens on the producer thread, so it is not part of the worker latency
+                timings['total'] += timings['write']
+
+                suffix = {'text_layer': " (text layer)", 'cached': " (cached)"}.get(status, "")
+                if dpi == pdpi.AUTO and page_dpi is not None:
+                    suffix += f" at {page_dpi} DPI"
+                if band_count > 1:
+                    suffix += f" ({band_count} bands)"
+
+                with lock:
+                    success_count += 1
+                    completed_count += 1
+                    if from_text_layer:
+                        text_layer_count += 1
+                    progress.emit(events, progress.PAGE_DONE, f"[{completed_count}/{total_pages}] {output_filename} - {len(text)} chars{suffix}",
+                                  item=output_filename, done=completed_count, total=total_pages, status=status,
+                                  timings=timings, page=page_number, chars=len(text), bands=band_count, dpi=page_dpi)
+
+            except Exception as e:
+                journal.failed(output_filename, signature, e)
+                with lock:
+                    completed_count += 1
+                    progress.emit(events, progress.ERROR, f"[{completed_count}/{total_pages}] {output_filename} - error: {str(e)}",
+                                  item=output_filename, done=completed_count, total=total_pages, status='error', page=page_number, error=str(e))
+
+    threads = [threading.Thread(target=producer, daemon=True)]
+    threads += [threading.Thread(target=consumer, daemon=True) for _ in range(actual_workers)]
+
+    for thread in threads:
+        thread.start()
+
+    complete = False
+    try:
+        for thread in threads:
+            thread.join()
+        complete = not stop_event.is_set() and success_count == total_pages
+    except KeyboardInterrupt:
+        # Consumers drain the queue once stopped; wait for them so none writes to the journal after it is closed
+        stop_event.set()
+        for thread in threads:
+            thread.join()
+        raise
+    finally:
+        if pool is not None and pool is not ocr_pool:
+            pool.shutdown()
+        journal.close()
+        if writer is not None:
+            searchable_path = writer.close(complete)
+
+    processing_time = time.time() - start_time
+
+    footer = ["-" * 50]
+    if text_layer:
+        footer.append(f"Used the existing text layer for {text_layer_count} of {total_pages} pages")
+    footer.append(f"Total processing time: {processing_time:.2f} seconds")
+    processed = completed_count - len(done_pages)
+    if processed:
+        footer.append(f"Speed: {processed/processing_time:.2f} pages/second")
+    if done_pages:
+        footer.append(f"Already done in an earlier run: {len(done_pages)} pages")
+    if writer is not None:
+        if complete:
+            footer.append(f"Searchable PDF: {searchable_path}")
+        else:
+            footer.append(f"Searchable PDF is incomplete (cancelled or some pages failed), kept as {searchable_path}")
+    progress.emit(events, progress.FINISHED, "\n".join(footer), item=pdf_path, done=completed_count, total=total_pages,
+                  elapsed=processing_time, success=success_count, skipped=len(done_pages), searchable_pdf=searchable_path if writer is not None else None)
+
+    return success_count
+
+def add_arguments(parser, required=True):
+    parser.add_argument('-i', '--input', required=required, help='Path to the input PDF file')
+    parser.add_argument('-o', '--output', required=required, help='Output folder for TXT files')
+    parser.add_argument('--dpi', type=pdpi.parse_dpi, default=200, help='Render resolution in DPI, or "auto" to pick one per page from its text size (default: 200)')
+    parser.add_argument('--min-dpi', type=int, default=pdpi.MIN_DPI, help=f'Lowest resolution --dpi auto may pick (default: {pdpi.MIN_DPI})')
+    parser.add_argument('--max-dpi', type=int, default=pdpi.MAX_DPI, help=f'Highest resolution --dpi auto may pick (default: {pdpi.MAX_DPI})')
+    parser.add_argument('--workers', type=int, default=None, help='Number of OCR workers (default: CPU count)')
+    parser.add_argument('--lang', default='eng', help='OCR language (vie, eng, vie+eng, etc. Default: eng)')
+    parser.add_argument('--engine', choices=['threads', 'processes'], default='threads', help='threads: one tesseract call per page; processes: persistent workers that load the language once (default: threads)')
+    parser.add_argument('--text-layer', action='store_true', help='Use the text already in the PDF and only OCR pages without one')
+    parser.add_argument('--min-text-chars', type=int, default=50, help='Minimum characters for a page text layer to be used (default: 50)')
+    parser.add_argument('--preprocess', action='store_true', help='Grayscale, crop, deskew, downscale and binarize pages before OCR (faster, often more accurate on scans)')
+    parser.add_argument('--searchable-pdf', default=None, help='Also write a copy of the PDF with the OCR text as an invisible, selectable layer')
+    parser.add_argument('--max-pixmap-mb', type=int, default=raster.DEFAULT_MAX_PIXMAP_MB, help=f'Largest bitmap rendered in one piece; bigger pages are OCR\'d in bands. This caps each band, not the whole run: up to --queue-size bands wait for OCR and each worker holds one more (default: {raster.DEFAULT_MAX_PIXMAP_MB}, 0 = no limit)')
+    parser.add_argument('--no-resume', dest='resume', action='store_false', help='Redo every page instead of skipping the ones the job journal already records as done')
+    parser.add_argument('--cache', nargs='?', const=ocrcache.DEFAULT_CACHE_PATH, default=None, help=f'Reuse OCR results for identical pages from this SQLite cache (default path: {ocrcache.DEFAULT_CACHE_PATH})')
+    parser.add_argument('--cache-size-mb', type=int, default=ocrcache.DEFAULT_CACHE_SIZE_MB, help=f'Maximum cache size before least recently used entries are evicted (default: {ocrcache.DEFAULT_CACHE_SIZE_MB})')
+    parser.add_argument('--queue-size', type=int, default=None, help='Maximum rendered pages or bands waiting for OCR (default: 2 per worker)')
+    parser.add_argument('--report', default=None, help='Write a JSON run report with throughput, latency percentiles and per-stage timings to this path')
+
+def run(args):
+    print(f"PDF2TXT - Processing: {args.input}")
+    print(f"Output: {args.output}")
+
+    report = rpt.RunReport('PDF2TXT', vars(args)) if args.report else None
+    events = progress.MultiSink(progress.ConsoleReporter(), report)
+
+    cache = ocrcache.OCRCache(args.cache, args.cache_size_mb) if args.cache else None
+    try:
+        success_count = pdf_to_text(args.input, args.output, args.lang, args.dpi, args.workers, args.queue_size, args.engine, args.text_layer, args.min_text_chars, cache, events, preprocess=args.preprocess, resume=args.resume, searchable_pdf=args.searchable_pdf, max_pixmap_mb=args.max_pixmap_mb, dpi_range=(args.min_dpi, args.max_dpi))
+    finally:
+        if cache is not None:
+            cache.close()
+
+    if report is not None:
+        report.write(args.report)
+        print(f"Run report: {args.report}")
+
+    if success_count > 0:
+        print(f"Successfully processed {success_count} pages")
+    else:
+        print("No pages processed")
+        sys.exit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description='OCR a PDF directly, without writing intermediate PNG files', prog='PDF2TXT')
+    add_arguments(parser)
+    run(parser.parse_args())
+
+if __name__ == "__main__":
+    main()
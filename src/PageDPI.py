@@ -0,0 +1,100 @@
+import fitz
+
+AUTO = 'auto'
+DEFAULT_DPI = 200
+MIN_DPI = 100
+MAX_DPI = 600
+DPI_STEP = 25
+
+# About a 20 px x-height, where Tesseract's accuracy levels off; 10 pt text lands at 300 DPI
+TARGET_FONT_PX = 40
+# Fewer characters than this and the font sizes say little about the page
+MIN_FONT_CHARS = 20
+
+PROBE_DPI = 72
+INK_MAX = 160
+MIN_PROBE_LINES = 3
+
+def parse_dpi(value):
+    if str(value).lower() == AUTO:
+        return AUTO
+    dpi = int(value)
+    if dpi <= 0:
+        raise ValueError("DPI must be a positive number")
+    return dpi
+
+def dpi_label(dpi, dpi_range=(MIN_DPI, MAX_DPI)):
+    if dpi == AUTO:
+        return f"adaptive {dpi_range[0]}-{dpi_range[1]}"
+    return str(dpi)
+
+def font_size(page):
+    # Character-weighted median of the span sizes, in points
+    sizes = []
+    for block in page.get_text('dict')['blocks']:
+        for line in block.get('lines', []):
+            for span in line['spans']:
+                chars = sum(1 for c in span['text'] if not c.isspace())
+                if chars and span['size'] > 0:
+                    sizes.append((span['size'], chars))
+
+    total = sum(chars for _, chars in sizes)
+    if total < MIN_FONT_CHARS:
+        return None
+
+    seen = 0
+    for size, chars in sorted(sizes):
+        seen += chars
+        if seen * 2 >= total:
+            return size
+
+def probe_font_size(page):
+    # Scans have no fonts: the height of the ink row runs on a coarse render is roughly the font size
+    zoom = PROBE_DPI / 72.0
+    probe = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY, alpha=False)
+    samples = probe.samples
+    stride = probe.stride
+
+    runs = []
+    run = 0
+    for r in range(probe.height):
+        if min(samples[r * stride:r * stride + probe.width], default=255) < INK_MAX:
+            run += 1
+        elif run:
+            runs.append(run)
+            run = 0
+    if run:
+        runs.append(run)
+
+    # Single rows are rules or specks, and very tall runs are pictures
+    runs = sorted(r for r in runs if 2 <= r <= probe.height // 4)
+    if len(runs) < MIN_PROBE_LINES:
+        return None
+    return runs[len(runs) // 2] * 72.0 / PROBE_DPI
+
+def choose_dpi(size, dpi_range=(MIN_DPI, MAX_DPI), target=TARGET_FONT_PX):
+    low, high = dpi_range
+    dpi = target * 72.0 / size
+    # Round up to a step so nearby sizes share a resolution and text is never rendered too small
+    dpi = -(-int(dpi) // DPI_STEP) * DPI_STEP
+    return max(low, min(high, dpi))
+
+def page_dpi(page, dpi_range=(MIN_DPI, MAX_DPI), fallback=DEFAULT_DPI):
+    # Returns (dpi, source) where source is 'fonts', 'probe' or 'default'
+    size = font_size(page)
+    if size is not None:
+        return choose_dpi(size, dpi_range), 'fonts'
+
+    size = probe_font_size(page)
+    if size is not None:
+        return choose_dpi(size, dpi_range), 'probe'
+
+    return max(dpi_range[0], min(dpi_range[1], fallback)), 'default'
+
+def page_matrix(page, dpi, dpi_range=(MIN_DPI, MAX_DPI)):
+    # Returns (matrix, dpi, source); a fixed dpi is used as is
+    source = 'fixed'
+    if dpi == AUTO:
+        dpi, source = page_dpi(page, dpi_range)
+    zoom = dpi / 72.0
+    return fitz.Matrix(zoom, zoom), dpi, source
@@ -0,0 +1,152 @@
+import os
+import shutil
+from pathlib import Path
+import PDF2PNG as pp
+import PDF2TXT as pt
+import Word2PNG as wp
+import JPEG2PNG as jp
+import OCR_Images as ocrfast
+import OCR_Images_slow as ocrslow
+import Autotune as autotune
+import Dedup as dd
+import PageDPI as pdpi
+import Raster as raster
+import Sinks as snk
+import Progress as progress
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.jpe', '.jfif', '.png', '.bmp', '.tiff', '.gif', '.webp'}
+
+# Everything the run pipeline needs; a job is these settings with some of them overridden
+DEFAULTS = {
+    'source': 'auto',
+    'lang': 'eng',
+    'workers': None,
+    'engine': 'threads',
+    'preprocess': False,
+    'format': (snk.TXT,),
+    'dpi': 200,
+    'min_dpi': pdpi.MIN_DPI,
+    'max_dpi': pdpi.MAX_DPI,
+    'text_layer': False,
+    'min_text_chars': 50,
+    'max_pixmap_mb': raster.DEFAULT_MAX_PIXMAP_MB,
+    'keep_images': False,
+    'convert': False,
+    'profile': jp.DEFAULT_PROFILE,
+    'dedup': True,
+    'incremental': False,
+    'resume': True,
+}
+
+# Settings that only take one of a few values
+CHOICES = {
+    'source': ('auto', 'pdf', 'docx', 'images'),
+    'engine': ('threads', 'processes', 'slow'),
+    'profile': tuple(jp.PROFILES),
+}
+
+def source_kind(path, source='auto'):
+    if source != 'auto':
+        return source
+    if os.path.isdir(path):
+        return 'images'
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.pdf':
+        return 'pdf'
+    if extension == '.docx':
+        return 'docx'
+    raise ValueError(f"Can't tell what {path} is; use --from pdf, docx or images")
+
+def cpu_workers(workers):
+    # Stages other than fast OCR have no auto-tuner
+    return os.cpu_count() if workers in (None, autotune.AUTO) else workers
+
+def convert_stage(folder, staged_folder, settings, events, cancel_event):
+    # OCR reads a single folder, so the other images are copied next to the converted JPEGs
+    jp.convert_jpeg_to_png(folder, staged_folder, events=events, cancel_event=cancel_event, workers=cpu_workers(settings['workers']),
+                           profile=settings['profile'], incremental=settings['incremental'])
+
+    for name in os.listdir(folder):
+        extension = os.path.splitext(name)[1].lower()
+        if extension in IMAGE_EXTENSIONS and extension not in jp.JPEG_EXTENSIONS:
+            shutil.copy2(os.path.join(folder, name), os.path.join(staged_folder, name))
+
+    png_name = lambda name: Path(name).stem + '.png' if os.path.splitext(name)[1].lower() in jp.JPEG_EXTENSIONS else name
+    duplicates = dd.load_duplicates(folder)
+    if duplicates:
+        dd.save_duplicates(staged_folder, {png_name(name): png_name(original) for name, original in duplicates.items()})
+    return staged_folder
+
+def render_stage(pdf_path, images_folder, output_folder, settings, events, cancel_event):
+    # Returns {image name: page number} for the rendered pages and (page number, name, text) for the text layer pages
+    rendered = []
+    pp.extract_images_from_pdf(pdf_path, images_folder, settings['dpi'], settings['text_layer'], settings['min_text_chars'], output_folder,
+                               cpu_workers(settings['workers']), progress.MultiSink(events, rendered.append), cancel_event, settings['max_pixmap_mb'],
+                               (settings['min_dpi'], settings['max_dpi']))
+
+    page_numbers = {}
+    text_pages = []
+    for event in rendered:
+        if event.kind != progress.PAGE_DONE:
+            continue
+        if event.status == 'text':
+            with open(os.path.join(output_folder, event.item), encoding='utf-8') as f:
+                text_pages.append((event.extra['page'], event.item, f.read()))
+        else:
+            page_numbers[event.item] = event.extra['page']
+    return page_numbers, sorted(text_pages)
+
+def ocr_stage(folder, output_folder, settings, cache, events, cancel_event, document_name, ocr_pool=None, page_numbers=None, text_pages=()):
+    if settings['engine'] == 'slow':
+        return ocrslow.ocr_images_to_individual_files(folder, output_folder, settings['lang'], cache, events, cancel_event,
+                                                      preprocess=settings['preprocess'], resume=settings['resume'], formats=settings['format'],
+                                                      document_name=document_name, dedup=settings['dedup'], page_numbers=page_numbers, text_pages=text_pages)
+
+    return ocrfast.fast_ocr_images(folder, output_folder, settings['lang'], settings['workers'], settings['engine'], cache, events, cancel_event,
+                                   preprocess=settings['preprocess'], resume=settings['resume'], formats=settings['format'],
+                                   document_name=document_name, dedup=settings['dedup'], ocr_pool=ocr_pool, page_numbers=page_numbers, text_pages=text_pages)
+
+def run_pipeline(input_path, output_folder, settings=None, cache=None, events=None, cancel_event=None, ocr_pool=None):
+    # pdf | docx | images -> optional JPEG to PNG -> OCR -> TXT and the other sinks; returns the number of pages with text
+    settings = dict(DEFAULTS, **(settings or {}))
+    if events is None:
+        events = progress.ConsoleReporter()
+
+    kind = source_kind(input_path, settings['source'])
+    if kind != 'images' and not os.path.isfile(input_path):
+        raise FileNotFoundError(f"Input not found: {input_path}")
+
+    Path(output_folder).mkdir(parents=True, exist_ok=True)
+    document_name = Path(input_path).stem if kind != 'images' else Path(input_path).resolve().name
+    dpi_range = (settings['min_dpi'], settings['max_dpi'])
+    engine = 'threads' if settings['engine'] == 'slow' else settings['engine']
+
+    if kind == 'pdf' and tuple(settings['format']) == (snk.TXT,) and not settings['keep_images'] and not settings['convert']:
+        # Plain TXT output streams pages straight from the renderer into OCR
+        progress.emit(events, progress.INFO, f"== OCR {input_path} ==")
+        return pt.pdf_to_text(input_path, output_folder, settings['lang'], settings['dpi'], cpu_workers(settings['workers']), None, engine,
+                              settings['text_layer'], settings['min_text_chars'], cache, events, cancel_event, settings['preprocess'], settings['resume'],
+                              max_pixmap_mb=settings['max_pixmap_mb'], dpi_range=dpi_range, ocr_pool=ocr_pool)
+
+    images_folder = os.path.join(output_folder, 'images')
+    page_numbers = None
+    text_pages = []
+    if kind == 'pdf':
+        progress.emit(events, progress.INFO, f"== Render {input_path} ==")
+        page_numbers, text_pages = render_stage(input_path, images_folder, output_folder, settings, events, cancel_event)
+    elif kind == 'docx':
+        progress.emit(events, progress.INFO, f"== Extract images from {input_path} ==")
+        wp.extract_images_zip_method(input_path, images_folder, events, cancel_event, settings['dedup'], settings['incremental'])
+    else:
+        images_folder = input_path
+
+    if cancel_event is not None and cancel_event.is_set():
+        return 0
+
+    if settings['convert']:
+        progress.emit(events, progress.INFO, "== Convert JPEG to PNG ==")
+        images_folder = convert_stage(images_folder, os.path.join(output_folder, 'png'), settings, events, cancel_event)
+
+    progress.emit(events, progress.INFO, f"== OCR {images_folder} ==")
+    # Text layer pages go into the merged, JSONL, hOCR and ALTO outputs with the OCR'd pages
+    return ocr_stage(images_folder, output_folder, settings, cache, events, cancel_event, document_name, ocr_pool, page_numbers, text_pages) + len(text_pages)
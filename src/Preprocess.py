@@ -0,0 +1,195 @@
+import time
+from PIL import Image
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Bump when the pipeline changes so cached OCR results from older versions are not reused
+PREPROCESS_VERSION = 1
+
+# Text line height (ascender to descender) that tesseract reads best, in pixels
+TARGET_LINE_HEIGHT = 40
+MIN_SCALE = 0.25
+MAX_SKEW_DEGREES = 5.0
+SKEW_STEP_DEGREES = 0.5
+SKEW_PROBE_WIDTH = 800
+CROP_MARGIN = 20
+
+def has_numpy():
+    return np is not None
+
+def cache_config(config, preprocess):
+    if not preprocess:
+        return config
+    return f"{config} preprocess=v{PREPROCESS_VERSION}".strip()
+
+def to_grayscale(img):
+    if img.mode == 'L':
+        return img
+
+    # Transparent areas become white paper instead of black
+    if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+        rgba = img.convert('RGBA')
+        background = Image.new('RGBA', rgba.size, (255, 255, 255, 255))
+        img = Image.alpha_composite(background, rgba)
+
+    return img.convert('L')
+
+def otsu_threshold(gray):
+    histogram = gray.histogram()
+    total = sum(histogram)
+    sum_all = sum(i * count for i, count in enumerate(histogram))
+
+    sum_background = 0
+    weight_background = 0
+    best_threshold = 128
+    best_variance = 0.0
+    for i, count in enumerate(histogram):
+        weight_background += count
+        if weight_background == 0:
+            continue
+        weight_foreground = total - weight_background
+        if weight_foreground == 0:
+            break
+
+        sum_background += i * count
+        mean_background = sum_background / weight_background
+        mean_foreground = (sum_all - sum_background) / weight_foreground
+        variance = weight_background * weight_foreground * (mean_background - mean_foreground) ** 2
+        if variance > best_variance:
+            best_variance = variance
+            best_threshold = i
+
+    return best_threshold
+
+def ink_mask(gray, threshold):
+    # 255 where there is ink, so getbbox() and row averages measure text
+    return gray.point(lambda v: 255 if v <= threshold else 0)
+
+def row_profile(mask):
+    # Averaging down to one column is done in C by PIL, no per-pixel Python loop
+    return list(mask.resize((1, mask.height), Image.BOX).getdata())
+
+def autocrop(gray, threshold, margin=CROP_MARGIN):
+    bbox = ink_mask(gray, threshold).getbbox()
+    if bbox is None:
+        return gray
+
+    left, top, right, bottom = bbox
+    bbox = (max(0, left - margin), max(0, top - margin), min(gray.width, right + margin), min(gray.height, bottom + margin))
+    if bbox == (0, 0, gray.width, gray.height):
+        return gray
+    return gray.crop(bbox)
+
+def profile_score(profile):
+    # Sharp jumps between text lines and gaps are largest when lines are horizontal
+    return sum((b - a) ** 2 for a, b in zip(profile, profile[1:]))
+
+def estimate_skew(gray, threshold, max_angle=MAX_SKEW_DEGREES, step=SKEW_STEP_DEGREES):
+    mask = ink_mask(gray, threshold)
+    if mask.width > SKEW_PROBE_WIDTH:
+        mask = mask.resize((SKEW_PROBE_WIDTH, max(1, mask.height * SKEW_PROBE_WIDTH // mask.width)), Image.BOX)
+
+    best_angle = 0.0
+    best_score = profile_score(row_profile(mask))
+    steps = int(max_angle / step)
+    for i in range(-steps, steps + 1):
+        angle = i * step
+        if angle == 0:
+            continue
+        score = profile_score(row_profile(mask.rotate(angle, resample=Image.NEAREST, fillcolor=0)))
+        if score > best_score:
+            best_score = score
+            best_angle = angle
+
+    return best_angle
+
+def deskew(gray, threshold):
+    angle = estimate_skew(gray, threshold)
+    if abs(angle) < SKEW_STEP_DEGREES:
+        return gray
+    return gray.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=255)
+
+def estimate_line_height(mask):
+    # Median height of the row runs that contain ink, roughly one text line each
+    profile = row_profile(mask)
+    runs = []
+    run = 0
+    for value in profile:
+        if value > 1:
+            run += 1
+        elif run:
+            runs.append(run)
+            run = 0
+    if run:
+        runs.append(run)
+
+    runs = sorted(r for r in runs if r >= 3)
+    if len(runs) < 3:
+        return None
+    return runs[len(runs) // 2]
+
+def downscale(gray, line_height, target=TARGET_LINE_HEIGHT):
+    if not line_height:
+        return gray
+
+    scale = max(MIN_SCALE, target / line_height)
+    # Only shrink; upscaling small text is left to tesseract
+    if scale >= 0.9:
+        return gray
+    return gray.resize((max(1, int(gray.width * scale)), max(1, int(gray.height * scale))), Image.LANCZOS)
+
+def adaptive_threshold(gray, block_size, offset=10):
+    # Mean of the surrounding block, so uneven lighting doesn't swallow text. Summed one axis at a time in uint32 to keep
+    # at most three page-sized arrays alive; a running sum may wrap, but the difference of two is still the exact block sum
+    pixels = np.array(gray, dtype=np.uint32)
+    height, width = pixels.shape
+    radius = block_size // 2
+
+    y0 = np.clip(np.arange(height) - radius, 0, height)
+    y1 = np.clip(np.arange(height) + radius + 1, 0, height)
+    x0 = np.clip(np.arange(width) - radius, 0, width)
+    x1 = np.clip(np.arange(width) + radius + 1, 0, width)
+
+    running = np.zeros((height + 1, width), dtype=np.uint32)
+    np.cumsum(pixels, axis=0, out=running[1:])
+    columns = running.take(y1, axis=0)
+    columns -= running.take(y0, axis=0)
+    del running
+
+    running = np.zeros((height, width + 1), dtype=np.uint32)
+    np.cumsum(columns, axis=1, out=running[:, 1:])
+    del columns
+    sums = running.take(x1, axis=1)
+    sums -= running.take(x0, axis=1)
+    del running
+
+    # pixel > mean - offset, without dividing: (pixel + offset) * count > sum
+    pixels += offset
+    pixels *= (y1 - y0).astype(np.uint32)[:, None]
+    pixels *= (x1 - x0).astype(np.uint32)[None, :]
+    binary = np.where(pixels > sums, np.uint8(255), np.uint8(0))
+    return Image.fromarray(binary, 'L')
+
+def binarize(gray, block_size=TARGET_LINE_HEIGHT * 2 + 1):
+    if np is not None:
+        return adaptive_threshold(gray, block_size)
+
+    threshold = otsu_threshold(gray)
+    return gray.point(lambda v: 255 if v > threshold else 0)
+
+def preprocess(img, timings=None):
+    start = time.perf_counter()
+
+    gray = to_grayscale(img)
+    threshold = otsu_threshold(gray)
+    gray = autocrop(gray, threshold)
+    gray = deskew(gray, threshold)
+    gray = downscale(gray, estimate_line_height(ink_mask(gray, threshold)))
+    result = binarize(gray)
+
+    if timings is not None:
+        timings['preprocess'] = time.perf_counter() - start
+    return result
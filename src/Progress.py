@@ -0,0 +1,91 @@
+import sys
+import threading
+import time
+
+STARTED = 'started'
+INFO = 'info'
+PAGE_DONE = 'page_done'
+ERROR = 'error'
+FINISHED = 'finished'
+
+class ProgressEvent:
+    def __init__(self, kind, message='', item=None, done=0, total=0, status=None, timings=None, **extra):
+        self.kind = kind
+        self.message = message
+        self.item = item
+        self.done = done
+        self.total = total
+        self.status = status
+        self.timings = timings or {}
+        self.extra = extra
+        self.time = time.time()
+
+    def __repr__(self):
+        return f"ProgressEvent({self.kind!r}, item={self.item!r}, done={self.done}, total={self.total})"
+
+def emit(events, kind, message='', **kwargs):
+    if events is not None:
+        events(ProgressEvent(kind, message, **kwargs))
+
+class ConsoleReporter:
+    # flush_interval > 0 batches lines into one write, so workers don't wait on the console
+    def __init__(self, stream=None, flush_interval=0.0):
+        self.stream = stream
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.pending = []
+        self.last_flush = time.time()
+
+    def __call__(self, event):
+        if not event.message:
+            return
+
+        with self.lock:
+            self.pending.append(event.message)
+            now = time.time()
+            if event.kind in (FINISHED, ERROR) or now - self.last_flush >= self.flush_interval:
+                self.flush_locked(now)
+
+    def flush(self):
+        with self.lock:
+            self.flush_locked(time.time())
+
+    def flush_locked(self, now):
+        if self.pending:
+            stream = self.stream or sys.stdout
+            stream.write("\n".join(self.pending) + "\n")
+            stream.flush()
+            self.pending = []
+        self.last_flush = now
+
+class ThrottledSink:
+    # Forwards at most one page_done per interval; every other event passes straight through
+    def __init__(self, sink, interval=0.1):
+        self.sink = sink
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.last_sent = 0.0
+        self.held = None
+
+    def __call__(self, event):
+        with self.lock:
+            if event.kind == PAGE_DONE:
+                now = time.time()
+                if now - self.last_sent < self.interval:
+                    self.held = event
+                    return
+                self.last_sent = now
+                self.held = None
+            elif self.held is not None:
+                held, self.held = self.held, None
+                self.sink(held)
+
+            self.sink(event)
+
+class MultiSink:
+    def __init__(self, *sinks):
+        self.sinks = [sink for sink in sinks if sink is not None]
+
+    def __call__(self, event):
+        for sink in self.sinks:
+            sink(event)
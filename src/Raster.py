@@ -0,0 +1,146 @@
+import os
+import struct
+import zlib
+import fitz
+
+DEFAULT_MAX_PIXMAP_MB = 256
+
+# Low resolution render used only to find blank rows to cut between
+PROBE_ZOOM = 1.0
+PROBE_MAX_PIXELS = 4 * 1024 * 1024
+BLANK_ROW_MIN = 250
+# How far above a nominal cut we look for a blank row, as a share of the band height
+CUT_SEARCH_SHARE = 0.125
+
+def pixmap_bytes(page, matrix, channels=3):
+    rect = page.rect * matrix
+    return int(rect.width) * int(rect.height) * channels
+
+def page_size_px(page, matrix):
+    irect = (page.rect * matrix).irect
+    return irect.width, irect.height
+
+def blank_rows(page, height_px):
+    # Blank rows of the probe, scaled to the full resolution row index
+    zoom = PROBE_ZOOM
+    area = page.rect.width * page.rect.height
+    if area * zoom * zoom > PROBE_MAX_PIXELS:
+        zoom = (PROBE_MAX_PIXELS / area) ** 0.5
+
+    probe = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY, alpha=False)
+    samples = probe.samples
+    stride = probe.stride
+    scale = height_px / probe.height
+
+    rows = []
+    for r in range(probe.height):
+        if min(samples[r * stride:r * stride + probe.width]) >= BLANK_ROW_MIN:
+            rows.append(int(r * scale))
+    return rows
+
+def band_rows(page, matrix, max_bytes, channels=3):
+    # Row ranges (start, stop) in output pixels, each small enough to stay under max_bytes
+    width_px, height_px = page_size_px(page, matrix)
+    if not max_bytes:
+        return [(0, height_px)]
+
+    max_rows = max(1, max_bytes // max(1, width_px * channels))
+    if height_px <= max_rows:
+        return [(0, height_px)]
+
+    blanks = blank_rows(page, height_px)
+    search = max(1, int(max_rows * CUT_SEARCH_SHARE))
+
+    bands = []
+    start = 0
+    while height_px - start > max_rows:
+        cut = start + max_rows
+        # Prefer the lowest blank row just above the nominal cut so no text line is split
+        candidates = [r for r in blanks if cut - search <= r < cut and r > start]
+        if candidates:
+            cut = max(candidates)
+        bands.append((start, cut))
+        start = cut
+    bands.append((start, height_px))
+    return bands
+
+def band_clip(page, matrix, start, stop):
+    rect = page.rect
+    zoom_y = matrix.d
+    return fitz.Rect(rect.x0, rect.y0 + start / zoom_y, rect.x1, rect.y0 + stop / zoom_y)
+
+def render_bands(page, matrix, max_bytes):
+    # Yields (clip, rows, pixmap); only one band is held at a time
+    bands = band_rows(page, matrix, max_bytes)
+    for start, stop in bands:
+        clip = band_clip(page, matrix, start, stop) if len(bands) > 1 else None
+        yield clip, stop - start, page.get_pixmap(matrix=matrix, clip=clip, alpha=False)
+
+def png_chunk(kind, data):
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+class StreamingPngWriter:
+    # Writes an RGB PNG band by band, so the full page bitmap never exists in memory
+    def __init__(self, path, width, height):
+        self.file = open(path, 'wb')
+        self.width = width
+        self.height = height
+        self.rows_written = 0
+        self.compressor = zlib.compressobj(6)
+        self.file.write(b'\x89PNG\r\n\x1a\n')
+        self.file.write(png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)))
+
+    def add_pixmap(self, pix, rows):
+        row_size = self.width * 3
+        white = b'\xff' * row_size
+        data = bytearray()
+        samples = pix.samples
+        stride = pix.stride
+        copy = min(pix.width, self.width) * 3
+
+        # Clip rounding can make a band a pixel wider or taller than planned, so rows are trimmed or padded
+        for r in range(min(rows, self.height - self.rows_written)):
+            data += b'\x00'
+            if r < pix.height:
+                data += samples[r * stride:r * stride + copy]
+                if copy < row_size:
+                    data += white[copy:]
+            else:
+                data += white
+        self.rows_written += min(rows, self.height - self.rows_written)
+
+        compressed = self.compressor.compress(bytes(data))
+        if compressed:
+            self.file.write(png_chunk(b'IDAT', compressed))
+
+    def close(self):
+        white = b'\x00' + b'\xff' * (self.width * 3)
+        while self.rows_written < self.height:
+            compressed = self.compressor.compress(white)
+            if compressed:
+                self.file.write(png_chunk(b'IDAT', compressed))
+            self.rows_written += 1
+
+        self.file.write(png_chunk(b'IDAT', self.compressor.flush()))
+        self.file.write(png_chunk(b'IEND', b''))
+        self.file.close()
+
+    def abort(self):
+        # A PNG cut short would otherwise be padded into a valid-looking page, so the partial file is removed
+        self.file.close()
+        os.remove(self.file.name)
+
+def save_png_banded(page, matrix, path, max_bytes):
+    width, height = page_size_px(page, matrix)
+    writer = StreamingPngWriter(path, width, height)
+    bands = 0
+    try:
+        for clip, rows, pix in render_bands(page, matrix, max_bytes):
+            writer.add_pixmap(pix, rows)
+            pix = None
+            bands += 1
+        writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+    return bands
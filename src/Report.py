@@ -0,0 +1,101 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+import Progress as progress
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * pct / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def summarize(values):
+    if not values:
+        return {'count': 0}
+
+    return {
+        'count': len(values),
+        'total': sum(values),
+        'mean': sum(values) / len(values),
+        'p50': percentile(values, 50),
+        'p95': percentile(values, 95),
+        'p99': percentile(values, 99),
+        'max': max(values),
+    }
+
+class RunReport:
+    # Event sink that aggregates per-item stage timings into a JSON report
+    def __init__(self, tool, options=None):
+        self.tool = tool
+        self.options = options or {}
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.finished = None
+        self.workers = 1
+        self.total = 0
+        self.status_counts = {}
+        self.latencies = []
+        self.stages = {}
+        self.errors = []
+        self.tuning = None
+
+    def __call__(self, event):
+        with self.lock:
+            if event.kind == progress.STARTED:
+                # Batch runs announce the pool size first and then one start per document
+                self.workers = max(self.workers, event.extra.get('workers', 1))
+                self.total += event.total
+            elif event.kind in (progress.PAGE_DONE, progress.ERROR):
+                status = event.status or event.kind
+                self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+                if event.kind == progress.ERROR:
+                    self.errors.append({'item': event.item, 'error': event.extra.get('error', event.message)})
+
+                for stage, seconds in event.timings.items():
+                    if stage == 'total':
+                        self.latencies.append(seconds)
+                    else:
+                        self.stages.setdefault(stage, []).append(seconds)
+            elif event.kind == progress.INFO and 'probes' in event.extra:
+                self.workers = event.extra.get('workers', self.workers)
+                self.tuning = {key: event.extra[key] for key in ('workers', 'threads_per_worker', 'probes') if key in event.extra}
+            elif event.kind == progress.FINISHED:
+                self.finished = event.time
+
+    def to_dict(self):
+        with self.lock:
+            elapsed = (self.finished or time.time()) - self.started
+            items = sum(self.status_counts.values())
+            busy = sum(self.latencies)
+
+            return {
+                'tool': self.tool,
+                'options': self.options,
+                'started': self.started,
+                'elapsed': elapsed,
+                'workers': self.workers,
+                'total': self.total,
+                'items': items,
+                'status': dict(self.status_counts),
+                'throughput': items / elapsed if elapsed > 0 else 0.0,
+                # Share of the available worker time that was spent on items
+                'worker_utilization': busy / (elapsed * self.workers) if elapsed > 0 and self.workers else 0.0,
+                'latency': summarize(self.latencies),
+                'stages': {stage: summarize(values) for stage, values in sorted(self.stages.items())},
+                'errors': list(self.errors),
+                'tuning': self.tuning,
+            }
+
+    def write(self, path):
+        if os.path.dirname(path):
+            Path(os.path.dirname(path)).mkdir(parents=True, exist_ok=True)
+
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, default=str)
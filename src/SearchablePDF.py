@@ -0,0 +1,95 @@
+import os
+import base64
+import threading
+import time
+import fitz
+import pytesseract
+import OCR_Cache as ocrcache
+
+# Pages added between incremental saves; the document is reopened after each save so memory stays flat
+SAVE_EVERY = 25
+
+def textonly_config(config=''):
+    # Tesseract's PDF renderer without the page image: just the invisible, Unicode-safe text layer
+    return f"{config} -c textonly_pdf=1".strip()
+
+def text_pdf_cache_config(config):
+    return f"{config} textpdf".strip()
+
+def ocr_text_pdf(img, language='eng', config='', timings=None):
+    start = time.perf_counter()
+    if img.mode in ('P', 'RGBA', 'LA'):
+        img = img.convert('RGB')
+    converted = time.perf_counter()
+
+    data = pytesseract.image_to_pdf_or_hocr(img, lang=language, config=textonly_config(config), extension='pdf')
+
+    if timings is not None:
+        timings['convert'] = converted - start
+        timings['tesseract'] = time.perf_counter() - converted
+    return data
+
+def pdf_page_text(data):
+    with fitz.open(stream=data, filetype='pdf') as pdf:
+        return pdf[0].get_text('text').strip() if len(pdf) else ''
+
+def cached_text_pdf(img, language, config, cache, ocr_func, timings=None):
+    # The cache stores strings, so the PDF bytes are kept base64 encoded under their own key
+    encoded, cached = ocrcache.cached_ocr(img, language, text_pdf_cache_config(config), cache,
+                                          lambda im: base64.b64encode(ocr_func(im)).decode('ascii'), timings)
+    data = base64.b64decode(encoded)
+    return pdf_page_text(data), data, cached
+
+class SearchablePdfWriter:
+    def __init__(self, pdf_path, output_path, save_every=SAVE_EVERY):
+        self.output_path = output_path
+        self.temp_path = f"{output_path}.tmp"
+        root, extension = os.path.splitext(output_path)
+        self.partial_path = f"{root}.partial{extension}"
+        self.save_every = save_every
+        self.lock = threading.Lock()
+        self.unsaved = 0
+        # Page numbers with a text layer; banded pages add several layers to one page
+        self.pages = set()
+
+        if os.path.dirname(output_path):
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+        # A full rewrite first gives a clean file that always accepts incremental saves
+        with fitz.open(pdf_path) as source:
+            if source.needs_pass:
+                raise ValueError("Encrypted PDFs can't be made searchable")
+            source.save(self.temp_path, garbage=1, deflate=True)
+
+        self.doc = fitz.open(self.temp_path)
+
+    def add_text_layer(self, page_number, text_pdf, rect=None):
+        # rect is the band the text was recognized from, or None for the whole page
+        with fitz.open(stream=text_pdf, filetype='pdf') as layer:
+            with self.lock:
+                page = self.doc[page_number - 1]
+                # The pixmap was rendered upright, so undo the page's display rotation for the overlay
+                page.show_pdf_page(rect or page.rect, layer, 0, keep_proportion=False, overlay=True, rotate=-page.rotation)
+                if page_number not in self.pages:
+                    self.pages.add(page_number)
+                    self.unsaved += 1
+                if self.unsaved >= self.save_every:
+                    self.flush_locked()
+
+    def flush_locked(self):
+        self.doc.saveIncr()
+        self.doc.close()
+        self.doc = fitz.open(self.temp_path)
+        self.unsaved = 0
+
+    def close(self, complete=True):
+        # Only a file with every page's text layer gets the real name; anything less is kept as .partial
+        with self.lock:
+            if self.unsaved:
+                self.doc.saveIncr()
+            self.doc.close()
+            path = self.output_path if complete else self.partial_path
+            os.replace(self.temp_path, path)
+            if complete and os.path.exists(self.partial_path):
+                os.remove(self.partial_path)
+            return path
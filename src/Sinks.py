@@ -0,0 +1,209 @@
+import os
+import json
+import threading
+from html import escape
+
+TXT = 'txt'
+MERGED = 'merged'
+JSONL = 'jsonl'
+HOCR = 'hocr'
+ALTO = 'alto'
+FORMATS = (TXT, MERGED, JSONL, HOCR, ALTO)
+
+# Large buffer so a document is written in a few big chunks instead of one write per page
+WRITE_BUFFER = 1024 * 1024
+
+def parse_formats(value):
+    formats = [f.strip().lower() for f in value.split(',') if f.strip()]
+    unknown = [f for f in formats if f not in FORMATS]
+    if unknown:
+        raise ValueError(f"unknown output format: {', '.join(unknown)} (choose from {', '.join(FORMATS)})")
+    return tuple(formats) or (TXT,)
+
+def needs_layout(formats):
+    return HOCR in formats or ALTO in formats
+
+def layout_cache_config(config):
+    return f"{config} layout".strip()
+
+def data_layout(data):
+    # Nest pytesseract image_to_data rows (level 1 page .. 5 word) into page/blocks/paragraphs/lines/words
+    page = {'box': None, 'blocks': []}
+    block = par = line = None
+
+    for i, level in enumerate(data['level']):
+        left, top = data['left'][i], data['top'][i]
+        box = [left, top, left + data['width'][i], top + data['height'][i]]
+
+        if level == 1:
+            page['box'] = box
+        elif level == 2:
+            block = {'box': box, 'pars': []}
+            page['blocks'].append(block)
+        elif level == 3 and block is not None:
+            par = {'box': box, 'lines': []}
+            block['pars'].append(par)
+        elif level == 4 and par is not None:
+            line = {'box': box, 'words': []}
+            par['lines'].append(line)
+        elif level == 5 and line is not None:
+            text = str(data['text'][i]).strip()
+            if text:
+                line['words'].append({'box': box, 'text': text, 'conf': float(data['conf'][i])})
+
+    return page
+
+def layout_text(layout):
+    blocks = []
+    for block in layout['blocks']:
+        lines = [' '.join(word['text'] for word in line['words']) for par in block['pars'] for line in par['lines']]
+        lines = [line for line in lines if line]
+        if lines:
+            blocks.append('\n'.join(lines))
+    return '\n\n'.join(blocks)
+
+def bbox(box):
+    return ' '.join(str(int(v)) for v in box)
+
+class OrderedSink:
+    # Pages finish out of order in fast mode; hold them until every earlier page has arrived
+    extension = ''
+
+    def __init__(self, output_folder, name):
+        self.path = os.path.join(output_folder, f"{name}{self.extension}")
+        self.temp_path = f"{self.path}.tmp"
+        self.lock = threading.Lock()
+        self.next_index = 1
+        self.held = {}
+        self.file = open(self.temp_path, 'w', encoding='utf-8', errors='replace', buffering=WRITE_BUFFER)
+        self.write_header()
+
+    def write(self, index, page_id, text, meta=None, layout=None):
+        with self.lock:
+            self.held[index] = (page_id, text, meta or {}, layout)
+            while self.next_index in self.held:
+                self.write_page(self.next_index, *self.held.pop(self.next_index))
+                self.next_index += 1
+
+    def close(self):
+        with self.lock:
+            # Pages after a gap (cancelled or never submitted) are still written, in order
+            for index in sorted(self.held):
+                self.write_page(index, *self.held[index])
+            self.held = {}
+            self.write_footer()
+            self.file.close()
+            os.replace(self.temp_path, self.path)
+
+    def write_header(self):
+        pass
+
+    def write_footer(self):
+        pass
+
+    def write_page(self, index, page_id, text, meta, layout):
+        raise NotImplementedError
+
+class MergedTextSink(OrderedSink):
+    extension = '.merged.txt'
+
+    def write_page(self, index, page_id, text, meta, layout):
+        if text is None:
+            return
+        self.file.write(f"===== Page {index}: {page_id} =====\n{text}\n\n")
+
+class JsonlSink(OrderedSink):
+    extension = '.jsonl'
+
+    def write_page(self, index, page_id, text, meta, layout):
+        record = {'page': index, 'id': page_id, 'text': text}
+        record.update(meta)
+        self.file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+class HocrSink(OrderedSink):
+    extension = '.hocr'
+
+    def write_header(self):
+        self.file.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                        '<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN" "http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">\n'
+                        '<html xmlns="http://www.w3.org/1999/xhtml" xml:lang="en" lang="en">\n<head>\n<title></title>\n'
+                        '<meta http-equiv="Content-Type" content="text/html;charset=utf-8"/>\n'
+                        '<meta name="ocr-system" content="Word2TXT (tesseract)"/>\n'
+                        '<meta name="ocr-capabilities" content="ocr_page ocr_carea ocr_par ocr_line ocrx_word"/>\n</head>\n<body>\n')
+
+    def write_footer(self):
+        self.file.write('</body>\n</html>\n')
+
+    def write_page(self, index, page_id, text, meta, layout):
+        if layout is None:
+            return
+
+        out = [f'<div class="ocr_page" id="page_{index}" title="image &quot;{escape(str(page_id))}&quot;; bbox {bbox(layout["box"] or [0, 0, 0, 0])}; ppageno {index - 1}">']
+        for b, block in enumerate(layout['blocks'], 1):
+            out.append(f'<div class="ocr_carea" id="block_{index}_{b}" title="bbox {bbox(block["box"])}">')
+            for p, par in enumerate(block['pars'], 1):
+                out.append(f'<p class="ocr_par" id="par_{index}_{b}_{p}" title="bbox {bbox(par["box"])}">')
+                for l, line in enumerate(par['lines'], 1):
+                    words = ' '.join(f'<span class="ocrx_word" id="word_{index}_{b}_{p}_{l}_{w}" title="bbox {bbox(word["box"])}; x_wconf {int(word["conf"])}">{escape(word["text"])}</span>'
+                                     for w, word in enumerate(line['words'], 1))
+                    out.append(f'<span class="ocr_line" id="line_{index}_{b}_{p}_{l}" title="bbox {bbox(line["box"])}">{words}</span>')
+                out.append('</p>')
+            out.append('</div>')
+        out.append('</div>\n')
+        self.file.write('\n'.join(out))
+
+class AltoSink(OrderedSink):
+    extension = '.alto.xml'
+
+    def write_header(self):
+        self.file.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                        '<alto xmlns="http://www.loc.gov/standards/alto/ns-v3#">\n'
+                        '<Description><MeasurementUnit>pixel</MeasurementUnit>'
+                        '<OCRProcessing ID="OCR_0"><ocrProcessingStep><processingSoftware><softwareName>Word2TXT (tesseract)</softwareName></processingSoftware></ocrProcessingStep></OCRProcessing>'
+                        '</Description>\n<Layout>\n')
+
+    def write_footer(self):
+        self.file.write('</Layout>\n</alto>\n')
+
+    @staticmethod
+    def position(box):
+        left, top, right, bottom = (int(v) for v in box)
+        return f'HPOS="{left}" VPOS="{top}" WIDTH="{right - left}" HEIGHT="{bottom - top}"'
+
+    def write_page(self, index, page_id, text, meta, layout):
+        if layout is None:
+            return
+
+        left, top, right, bottom = (int(v) for v in layout['box'] or [0, 0, 0, 0])
+        out = [f'<Page ID="page_{index}" PHYSICAL_IMG_NR="{index}" WIDTH="{right - left}" HEIGHT="{bottom - top}">',
+               f'<PrintSpace {self.position(layout["box"] or [0, 0, 0, 0])}>']
+        for b, block in enumerate(layout['blocks'], 1):
+            # ALTO has no paragraph level, so lines go straight into the block
+            out.append(f'<TextBlock ID="block_{index}_{b}" {self.position(block["box"])}>')
+            for p, par in enumerate(block['pars'], 1):
+                for l, line in enumerate(par['lines'], 1):
+                    strings = '<SP/>'.join(f'<String CONTENT="{escape(word["text"])}" WC="{max(0.0, word["conf"]) / 100:.2f}" {self.position(word["box"])}/>'
+                                           for word in line['words'])
+                    out.append(f'<TextLine ID="line_{index}_{b}_{p}_{l}" {self.position(line["box"])}>{strings}</TextLine>')
+            out.append('</TextBlock>')
+        out.append('</PrintSpace>\n</Page>\n')
+        self.file.write('\n'.join(out))
+
+SINK_CLASSES = {MERGED: MergedTextSink, JSONL: JsonlSink, HOCR: HocrSink, ALTO: AltoSink}
+
+def open_sinks(output_folder, formats, name):
+    # Per-page TXT files are written by the OCR loops themselves
+    return [SINK_CLASSES[f](output_folder, name) for f in formats if f in SINK_CLASSES]
+
+def write_all(sinks, index, page_id, text, meta=None, layout=None):
+    for sink in sinks:
+        sink.write(index, page_id, text, meta, layout)
+
+def write_text_pages(sinks, text_pages):
+    # Pages whose text came from the PDF itself, at their own place in the document
+    for index, page_id, text in text_pages:
+        write_all(sinks, index, page_id, text, {'status': 'text_layer', 'chars': len(text), 'words': len(text.split())})
+
+def close_all(sinks):
+    for sink in sinks:
+        sink.close()
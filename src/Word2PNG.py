@@ -2,85 +2,263 @@ import zipfile
 import os
 import argparse
 import sys
+import shutil
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import time
+import Batch as batch
+import Dedup as dd
+import Journal as jnl
+import Progress as progress
+import Report as rpt
+
+# Entries are copied in chunks of this size, so a huge embedded scan never sits in memory
+COPY_BUFFER = 1024 * 1024
+
+def sniff_extension(header):
+    if header.startswith(b'\x89PNG\r\n\x1a\n'):
+        return '.png'
+    elif header.startswith(b'\xff\xd8\xff'):
+        return '.jpg'
+    elif header.startswith(b'GIF8'):
+        return '.gif'
+    elif header.startswith(b'BM'):
+        return '.bmp'
+    return '.png'
+
+def media_entries(docx_zip):
+    # One pass over the central directory; nothing is decompressed here
+    return [info for info in docx_zip.infolist() if info.filename.startswith('word/media/') and os.path.basename(info.filename) and not info.is_dir()]
+
+def claim_name(filename, used):
+    # Same numbering as before (name_01.png, name_02.png, ...), resolved in memory instead of probing the disk.
+    # Names are compared case-insensitively because Windows treats them that way
+    stem, extension = os.path.splitext(filename)
+    name = filename
+    counter = 1
+    while name.lower() in used:
+        name = f"{stem}_{counter:02d}{extension}"
+        counter += 1
+    used.add(name.lower())
+    return name
+
+class MediaDeduper:
+    # CRC and size come free with the central directory, so an entry is only hashed when both match an earlier one
+    def __init__(self, docx_zip):
+        self.zip = docx_zip
+        self.groups = {}
+
+    def entry_sha256(self, info):
+        with self.zip.open(info) as f:
+            return dd.sha256_stream(f)
+
+    def original_of(self, info, name, sha256=None):
+        group = self.groups.setdefault((info.CRC, info.file_size), [])
+        for index, (other, other_name, other_sha256) in enumerate(group):
+            if sha256 is None:
+                sha256 = self.entry_sha256(info)
+            if other_sha256 is None:
+                other_sha256 = self.entry_sha256(other)
+                group[index] = (other, other_name, other_sha256)
+            if sha256 == other_sha256:
+                return other_name
+
+        group.append((info, name, sha256))
+        return None
+
+def iter_docx_images(docx_path, dedup=False):
+    # Yields (name, data, original) without writing files: data is the image bytes, or None for a repeat of original
+    with zipfile.ZipFile(docx_path, 'r') as docx_zip:
+        used = set()
+        deduper = MediaDeduper(docx_zip) if dedup else None
+
+        for info in media_entries(docx_zip):
+            data = docx_zip.read(info)
+            filename = os.path.basename(info.filename)
+            file_extension = Path(filename).suffix.lower() or sniff_extension(data[:8])
+            name = claim_name(f"{Path(filename).stem}{file_extension}", used)
+
+            original = deduper.original_of(info, name, dd.sha256_bytes(data)) if deduper is not None else None
+            if original is not None:
+                yield name, None, original
+            else:
+                yield name, data, None
+
+def extract_images_zip_method(docx_path, output_folder, events=None, cancel_event=None, dedup=False, incremental=False):
+    if events is None:
+        events = progress.ConsoleReporter()
 
-def extract_images_zip_method(docx_path, output_folder):
     Path(output_folder).mkdir(parents=True, exist_ok=True)
 
+    journal = jnl.Journal(jnl.journal_path(output_folder)) if incremental else None
+    settings = f"dedup={dedup}"
+    try:
+        if journal is not None and os.path.isfile(docx_path):
+            outputs = journal.source_outputs(docx_path, settings)
+            if outputs is not None:
+                progress.emit(events, progress.FINISHED, f"Unchanged since the last run, skipped ({len(outputs)} images)",
+                              item=docx_path, total=len(outputs), done=len(outputs), success=len(outputs), status='skipped')
+                return len(outputs)
+
+            # A changed document replaces its earlier images instead of getting _01 copies next to them
+            previous = journal.recorded_outputs(docx_path)
+            for output in previous:
+                if os.path.exists(output):
+                    os.remove(output)
+            dd.forget_duplicates(output_folder, [os.path.basename(output) for output in previous])
+
+        return extract_media(docx_path, output_folder, events, cancel_event, dedup, journal, settings)
+    finally:
+        if journal is not None:
+            journal.close()
+
+def extract_media(docx_path, output_folder, events, cancel_event, dedup, journal, settings):
     try:
         with zipfile.ZipFile(docx_path, 'r') as docx_zip:
-            image_files = [f for f in docx_zip.namelist() if f.startswith('word/media/') and os.path.basename(f)]
+            entries = media_entries(docx_zip)
 
-            if not image_files:
-                print("No images found in the document.")
-                return 0, 0
+            if not entries:
+                if journal is not None:
+                    journal.record_source(docx_path, [], settings)
+                progress.emit(events, progress.FINISHED, "No images found in the document.")
+                return 0
 
+            start_time = time.time()
             success_count = 0
-            total_count = len(image_files)
+            deduper = MediaDeduper(docx_zip) if dedup else None
+            duplicates = {}
+            written = []
+            cancelled = False
+            # Existing files are listed once; every later name is checked against this set
+            used = {name.lower() for name in os.listdir(output_folder)}
+            total_count = len(entries)
+
+            progress.emit(events, progress.STARTED, f"Found {total_count} images in document", item=docx_path, total=total_count, workers=1)
+
+            for i, info in enumerate(entries, 1):
+                if cancel_event is not None and cancel_event.is_set():
+                    progress.emit(events, progress.INFO, "Cancelled")
+                    cancelled = True
+                    break
 
-            print(f"Found {total_count} images in document")
+                image_file = info.filename
+                item_start = time.perf_counter()
 
-            for image_file in image_files:
                 try:
-                    filename = os.path.basename(image_file)
-                    file_extension = Path(filename).suffix.lower()
-
-                    if not file_extension:
-                        with docx_zip.open(image_file) as f:
-                            header = f.read(8)
-
-                        if header.startswith(b'\x89PNG\r\n\x1a\n'):
-                            file_extension = '.png'
-                        elif header.startswith(b'\xff\xd8\xff'):
-                            file_extension = '.jpg'
-                        elif header.startswith(b'GIF8'):
-                            file_extension = '.gif'
-                        elif header.startswith(b'BM'):
-                            file_extension = '.bmp'
-                        else:
-                            file_extension = '.png'
-
-                    output_filename = f"{Path(filename).stem}{file_extension}"
-                    output_path = os.path.join(output_folder, output_filename)
-
-                    counter = 1
-                    original_output_path = output_path
-                    while os.path.exists(output_path):
-                        name_part = Path(original_output_path).stem
-                        ext_part = Path(original_output_path).suffix
-                        output_path = os.path.join(output_folder, f"{name_part}_{counter:02d}{ext_part}")
-                        counter += 1
-
-                    with docx_zip.open(image_file) as image_data:
+                    with docx_zip.open(info) as image_data:
+                        filename = os.path.basename(image_file)
+                        file_extension = Path(filename).suffix.lower()
+
+                        header = b''
+                        if not file_extension:
+                            # The sniffed bytes are written out below, so the entry is still read only once
+                            header = image_data.read(8)
+                            file_extension = sniff_extension(header)
+
+                        output_filename = claim_name(f"{Path(filename).stem}{file_extension}", used)
+                        output_path = os.path.join(output_folder, output_filename)
+
+                        if deduper is not None:
+                            # Logos and headers repeat; only the first copy is written and the rest point at it
+                            original = deduper.original_of(info, output_filename)
+                            if original is not None:
+                                duplicates[output_filename] = original
+                                item_time = time.perf_counter() - item_start
+                                progress.emit(events, progress.PAGE_DONE, f"Duplicate: {output_filename} is the same as {original}",
+                                              item=image_file, done=i, total=total_count, status='duplicate',
+                                              timings={'copy': item_time, 'total': item_time}, original=original)
+                                continue
+
                         with open(output_path, 'wb') as f:
-                            f.write(image_data.read())
+                            f.write(header)
+                            shutil.copyfileobj(image_data, f, COPY_BUFFER)
+                        written.append(output_path)
 
-                    file_size = os.path.getsize(output_path)
-                    print(f"Extracted: {output_filename} ({file_size:,} bytes)")
+                    item_time = time.perf_counter() - item_start
+                    file_size = info.file_size
                     success_count += 1
+                    progress.emit(events, progress.PAGE_DONE, f"Extracted: {output_filename} ({file_size:,} bytes)",
+                                  item=image_file, done=i, total=total_count, status='success',
+                                  timings={'copy': item_time, 'total': item_time}, size=file_size)
 
                 except Exception as e:
-                    print(f"Failed to extract {image_file}: {e}")
+                    progress.emit(events, progress.ERROR, f"Failed to extract {image_file}: {e}",
+                                  item=image_file, done=i, total=total_count, status='error', error=str(e))
 
+            footer = ""
+            if duplicates:
+                dd.save_duplicates(output_folder, duplicates)
+                footer = f"Skipped {len(duplicates)} duplicate images (listed in {dd.DUPLICATES_NAME})"
+            # Only a complete, error-free run may be skipped next time
+            if journal is not None and not cancelled and success_count + len(duplicates) == total_count:
+                journal.record_source(docx_path, written, settings)
+            progress.emit(events, progress.FINISHED, footer, item=docx_path, total=total_count, elapsed=time.time() - start_time,
+                          success=success_count, duplicates=len(duplicates))
             return success_count
 
     except zipfile.BadZipFile:
-        print("Error: The file is not a valid DOCX file or is corrupted")
-        return 0, 0
+        progress.emit(events, progress.ERROR, "Error: The file is not a valid DOCX file or is corrupted", item=docx_path, status='error')
+        return 0
     except FileNotFoundError:
-        print(f"Error: File not found: {docx_path}")
-        return 0, 0
+        progress.emit(events, progress.ERROR, f"Error: File not found: {docx_path}", item=docx_path, status='error')
+        return 0
     except Exception as e:
-        print(f"Unexpected error: {e}")
-        return 0, 0
+        progress.emit(events, progress.ERROR, f"Unexpected error: {e}", item=docx_path, status='error', error=str(e))
+        return 0
 
-def main():
-    parser = argparse.ArgumentParser(description='Extract images from DOCX files using zipfile method', formatter_class=argparse.RawDescriptionHelpFormatter)
+def extract_images_from_docxs(jobs, workers=None, events=None, dedup=False, incremental=False):
+    if events is None:
+        events = progress.ConsoleReporter()
+
+    if not jobs:
+        progress.emit(events, progress.FINISHED, "No DOCX files to extract")
+        return 0
+
+    if workers is None:
+        workers = min(32, (os.cpu_count() or 1) + 4)
+
+    progress.emit(events, progress.STARTED, f"Extracting images from {len(jobs)} DOCX files", workers=workers)
+
+    success_count = 0
+    # Zip inflation and file writes release the GIL, so threads are enough here
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(extract_images_zip_method, docx_path, output_folder, events, None, dedup, incremental): docx_path for docx_path, output_folder in jobs}
+
+        for future in as_completed(futures):
+            success_count += future.result()
+
+    return success_count
 
-    parser.add_argument('-i', '--input', required=True, help='Input DOCX file path')
-    parser.add_argument('-o', '--output', required=True, help='Output folder for extracted images')
+def add_arguments(parser, required=True):
+    parser.add_argument('-i', '--input', help='Input DOCX file path, a folder of DOCX files, or a glob such as "docs/*.docx"')
+    parser.add_argument('-o', '--output', required=required, help='Output folder for extracted images (one subfolder per DOCX in batch mode)')
+    parser.add_argument('--manifest', default=None, help='JSON or CSV list of DOCX files with optional per-file output folders')
+    parser.add_argument('--workers', type=int, default=None, help='Number of DOCX files extracted in parallel in batch mode (default: automatic)')
+    parser.add_argument('--dedup', action='store_true', help=f'Write repeated images (logos, headers) once and list the copies in {dd.DUPLICATES_NAME}; OCR still gives every copy its text')
+    parser.add_argument('--incremental', action='store_true', help='Skip documents that are unchanged since the last run (size, mtime and hash are kept in the output folder\'s job journal)')
+    parser.add_argument('--report', default=None, help='Write a JSON run report with throughput, latency percentiles and per-stage timings to this path')
 
-    args = parser.parse_args()
+def run(args):
+    if not args.input and not args.manifest:
+        sys.exit("error: either --input or --manifest is required")
+
+    report = rpt.RunReport('Word2PNG', vars(args)) if args.report else None
+    events = progress.MultiSink(progress.ConsoleReporter(), report)
+
+    if batch.is_batch_input(args.input, args.manifest):
+        jobs = batch.build_jobs(args.input, args.output, {'.docx'}, args.manifest)
+        success_count = extract_images_from_docxs(jobs, args.workers, events, args.dedup, args.incremental)
+        if report is not None:
+            report.write(args.report)
+            print(f"Run report: {args.report}")
+
+        print("-" * 50)
+        if success_count > 0:
+            print(f"Successfully extracted {success_count} images from {len(jobs)} documents to: {args.output}")
+        else:
+            print("No images were extracted")
+            sys.exit(1)
+        return
 
     if not os.path.exists(args.input):
         print(f"Error: Input file does not exist: {args.input}")
@@ -93,16 +271,23 @@ def main():
     print(f"Output folder: {args.output}")
     print("-" * 50)
 
-    success_count, total_count = extract_images_zip_method(args.input, args.output)
+    success_count = extract_images_zip_method(args.input, args.output, events, dedup=args.dedup, incremental=args.incremental)
+
+    if report is not None:
+        report.write(args.report)
+        print(f"Run report: {args.report}")
 
     print("-" * 50)
-    if total_count > 0:
-        if success_count == total_count:
-            print(f"Successfully extracted all {success_count} images to: {args.output}")
-        else:
-            print(f"Extracted {success_count} out of {total_count} images to: {args.output}")
+    if success_count > 0:
+        print(f"Successfully extracted {success_count} images to: {args.output}")
     else:
         print("No images were extracted")
+        sys.exit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description='Extract images from DOCX files using zipfile method', formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    run(parser.parse_args())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
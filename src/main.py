@@ -1,11 +1,19 @@
 import tkinter as tk
+import multiprocessing
 from tkinter import ttk, scrolledtext, messagebox, filedialog
 import os
-import OCR_Images as ocrfast
-import OCR_Images_slow as ocrslow
-import Word2PNG as wp
-import JPEG2PNG as jp
-import PDF2PNG as pp
+import importlib
+import queue
+import threading
+import time
+# Only light modules here; the ones that pull in pytesseract, fitz and PIL are imported where they are used
+import OCR_Cache as ocrcache
+import Progress as progress
+import Autotune as autotune
+import Languages as langs
+
+def cpu_choices():
+    return [str(i) for i in range(1, (os.cpu_count() or 1) + 1)]
 
 class Word2TXTGUI:
     def __init__(self, root):
@@ -18,9 +26,18 @@ class Word2TXTGUI:
 
         self.create_menu_bar()
 
+        self.job_queue = queue.Queue()
+        self.job_thread = None
+        self.job_started = None
+        self.cancel_event = threading.Event()
+
         self.create_left_panel()
         self.create_right_panel()
 
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.after(100, self.poll_job_queue)
+        self.root.after(100, self.start_language_scan)
+
     def create_menu_bar(self):
         menubar = tk.Menu(self.root)
         self.root.config(menu=menubar)
@@ -58,6 +75,8 @@ class Word2TXTGUI:
 
         self.create_ocr_tab(notebook)
 
+        self.create_pdf2txt_tab(notebook)
+
     def create_pdf2png_tab(self, notebook):
         tab = ttk.Frame(notebook)
         notebook.add(tab, text="PDF2PNG")
@@ -85,7 +104,13 @@ class Word2TXTGUI:
         self.pdf_dpi = tk.StringVar(value="200")
         dpi_entry = ttk.Entry(dpi_frame, textvariable=self.pdf_dpi, width=8)
         dpi_entry.pack(side=tk.LEFT, padx=(5, 0))
-        ttk.Label(dpi_frame, text=" (Higher = better quality, larger files)").pack(side=tk.LEFT, padx=(5, 0))
+        ttk.Label(dpi_frame, text=" (Higher = better quality, larger files; \"auto\" = per page)").pack(side=tk.LEFT, padx=(5, 0))
+
+        cpu_frame = ttk.Frame(tab)
+        cpu_frame.pack(fill=tk.X, pady=5)
+        ttk.Label(cpu_frame, text="CPU:").pack(side=tk.LEFT)
+        self.pdf_cpu = tk.StringVar(value="1")
+        ttk.Combobox(cpu_frame, textvariable=self.pdf_cpu, values=cpu_choices(), state="readonly", width=5).pack(side=tk.LEFT, padx=(5, 0))
 
         ttk.Button(tab, text="Convert PDF to Images", command=self.run_pdf2png).pack(pady=10)
 
@@ -110,9 +135,17 @@ class Word2TXTGUI:
         self.docx_output.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(5, 0))
         ttk.Button(output_frame, text="Browse", command=self.browse_docx_output).pack(side=tk.RIGHT, padx=(5, 0))
 
+        self.word_dedup = tk.BooleanVar(value=False)
+        ttk.Checkbutton(tab, text="Write repeated images (logos, headers) only once", variable=self.word_dedup).pack(anchor=tk.W, pady=5)
+        self.word_incremental = tk.BooleanVar(value=False)
+        ttk.Checkbutton(tab, text="Skip documents that haven't changed since the last run", variable=self.word_incremental).pack(anchor=tk.W, pady=5)
+
         ttk.Button(tab, text="Convert DOCX to Images", command=self.run_word2png).pack(pady=10)
 
     def create_jpeg2png_tab(self, notebook):
+        # Only PIL comes with it, which is quick next to fitz and pytesseract
+        import JPEG2PNG as jp
+
         tab = ttk.Frame(notebook)
         notebook.add(tab, text="JPEG2PNG")
 
@@ -140,6 +173,16 @@ class Word2TXTGUI:
         ttk.Radiobutton(conv_frame, text="JPEG to PNG", variable=self.conv_type, value="jpeg2png").pack(side=tk.LEFT, padx=10)
         ttk.Radiobutton(conv_frame, text="PNG to JPEG", variable=self.conv_type, value="png2jpeg").pack(side=tk.LEFT, padx=10)
 
+        profile_frame = ttk.Frame(tab)
+        profile_frame.pack(fill=tk.X, pady=5)
+        ttk.Label(profile_frame, text="Encoder profile:").pack(side=tk.LEFT)
+        self.jpeg_profile = tk.StringVar(value=jp.DEFAULT_PROFILE)
+        ttk.Combobox(profile_frame, textvariable=self.jpeg_profile, values=list(jp.PROFILES), state="readonly", width=10).pack(side=tk.LEFT, padx=(5, 0))
+        ttk.Label(profile_frame, text=" (fast = quickest, small = smallest files)").pack(side=tk.LEFT, padx=(5, 0))
+
+        self.jpeg_incremental = tk.BooleanVar(value=False)
+        ttk.Checkbutton(tab, text="Skip files that haven't changed since the last run", variable=self.jpeg_incremental).pack(anchor=tk.W, pady=5)
+
         ttk.Button(tab, text="Convert Images", command=self.run_jpeg2png).pack(pady=10)
 
     def create_ocr_tab(self, notebook):
@@ -170,12 +213,14 @@ class Word2TXTGUI:
         ttk.Label(lang_frame, text="Language:").pack(side=tk.LEFT)
         self.ocr_lang = tk.StringVar(value="eng")
 
-        available_langs = self.scan_tesseract_languages()
-        lang_combo = ttk.Combobox(lang_frame, textvariable=self.ocr_lang, values=available_langs, state="readonly", width=15)
-        lang_combo.pack(side=tk.LEFT, padx=(5, 0))
+        # A fresh cache only costs a few stats; otherwise the list is filled in once the background scan finishes
+        cached = langs.cached_languages()
+        self.available_langs = cached or ['eng']
+        self.ocr_lang_combo = ttk.Combobox(lang_frame, textvariable=self.ocr_lang, values=self.available_langs, state="readonly", width=15)
+        self.ocr_lang_combo.pack(side=tk.LEFT, padx=(5, 0))
 
-        lang_count_label = ttk.Label(lang_frame, text=f"({len(available_langs)} languages detected)")
-        lang_count_label.pack(side=tk.LEFT, padx=(10, 0))
+        self.lang_count_label = ttk.Label(lang_frame, text=f"({len(self.available_langs)} languages detected)" if cached else "(detecting languages...)")
+        self.lang_count_label.pack(side=tk.LEFT, padx=(10, 0))
 
         input_frame = ttk.Frame(tab)
         input_frame.pack(fill=tk.X, pady=5)
@@ -195,136 +240,91 @@ class Word2TXTGUI:
         cpu_frame.pack(fill=tk.X, pady=5)
         cpu_label = ttk.Label(cpu_frame, text="CPU (recommend for fast export):")
         cpu_label.pack(side=tk.LEFT)
-        self.cpu_count = tk.StringVar(value="4")
-        cpu_combo = ttk.Combobox(cpu_frame, textvariable=self.cpu_count, values=["1", "2", "3", "4", "5", "6", "7", "8", "9", "10", "11", "12", "13", "14", "15", "16"], state="readonly", width=5)
+        self.cpu_count = tk.StringVar(value=autotune.AUTO)
+        cpu_combo = ttk.Combobox(cpu_frame, textvariable=self.cpu_count, values=[autotune.AUTO] + cpu_choices(), state="readonly", width=5)
         cpu_combo.pack(side=tk.LEFT, padx=(5, 0))
 
+        self.ocr_use_cache = tk.BooleanVar(value=False)
+        ttk.Checkbutton(tab, text="Reuse cached results for identical images", variable=self.ocr_use_cache).pack(anchor=tk.W, pady=5)
+
+        self.ocr_preprocess = tk.BooleanVar(value=False)
+        ttk.Checkbutton(tab, text="Clean up images before OCR (grayscale, crop, deskew, binarize)", variable=self.ocr_preprocess).pack(anchor=tk.W, pady=5)
+
         ttk.Button(tab, text="Run OCR", command=self.run_ocr).pack(pady=10)
 
         self.cpu_combo = cpu_combo
         self.cpu_label = cpu_label
 
-    def scan_tesseract_languages(self):
-        import os
-        import platform
-        import subprocess
+    def create_pdf2txt_tab(self, notebook):
+        tab = ttk.Frame(notebook)
+        notebook.add(tab, text="PDF2TXT")
 
-        languages = set()
-        tessdata_paths = set()
+        title_label = ttk.Label(tab, text="OCR PDF pages straight to TXT files", font=('Arial', 12, 'bold'))
+        title_label.pack(pady=10)
 
-        try:
-            result = subprocess.run(['tesseract', '--list-langs'], capture_output=True, text=True, timeout=10)
-            if result.returncode == 0:
-                lines = result.stdout.strip().split('\n')
-                if len(lines) > 1:
-                    for line in lines[1:]:
-                        lang = line.strip()
-                        if lang:
-                            languages.add(lang)
-
-                result = subprocess.run(['tesseract', '--print-parameters'], capture_output=True, text=True, timeout=10)
-                for line in result.stdout.split('\n'):
-                    if 'tessdata-dir' in line.lower():
-                        parts = line.split()
-                        if len(parts) > 1:
-                            tessdata_paths.add(parts[1])
-        except (subprocess.TimeoutExpired, FileNotFoundError, Exception):
-            pass
+        input_frame = ttk.Frame(tab)
+        input_frame.pack(fill=tk.X, pady=5)
+        ttk.Label(input_frame, text="Input your PDF file:").pack(side=tk.LEFT)
+        self.pdf2txt_input = ttk.Entry(input_frame)
+        self.pdf2txt_input.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(5, 0))
+        ttk.Button(input_frame, text="Browse", command=self.browse_pdf2txt_input).pack(side=tk.RIGHT, padx=(5, 0))
+
+        output_frame = ttk.Frame(tab)
+        output_frame.pack(fill=tk.X, pady=5)
+        ttk.Label(output_frame, text="Output your TXT folder:").pack(side=tk.LEFT)
+        self.pdf2txt_output = ttk.Entry(output_frame)
+        self.pdf2txt_output.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(5, 0))
+        ttk.Button(output_frame, text="Browse", command=self.browse_pdf2txt_output).pack(side=tk.RIGHT, padx=(5, 0))
+
+        lang_frame = ttk.Frame(tab)
+        lang_frame.pack(fill=tk.X, pady=5)
+        ttk.Label(lang_frame, text="Language:").pack(side=tk.LEFT)
+        self.pdf2txt_lang = tk.StringVar(value="eng")
+        self.pdf2txt_lang_combo = ttk.Combobox(lang_frame, textvariable=self.pdf2txt_lang, values=self.available_langs, state="readonly", width=15)
+        self.pdf2txt_lang_combo.pack(side=tk.LEFT, padx=(5, 0))
+
+        dpi_frame = ttk.Frame(tab)
+        dpi_frame.pack(fill=tk.X, pady=5)
+        ttk.Label(dpi_frame, text="Image quality (DPI):").pack(side=tk.LEFT)
+        self.pdf2txt_dpi = tk.StringVar(value="200")
+        ttk.Entry(dpi_frame, textvariable=self.pdf2txt_dpi, width=8).pack(side=tk.LEFT, padx=(5, 0))
+        ttk.Label(dpi_frame, text=" (\"auto\" = lowest DPI that suits each page's text size)").pack(side=tk.LEFT, padx=(5, 0))
+
+        cpu_frame = ttk.Frame(tab)
+        cpu_frame.pack(fill=tk.X, pady=5)
+        ttk.Label(cpu_frame, text="CPU:").pack(side=tk.LEFT)
+        self.pdf2txt_cpu = tk.StringVar(value=str(min(4, os.cpu_count() or 1)))
+        ttk.Combobox(cpu_frame, textvariable=self.pdf2txt_cpu, values=cpu_choices(), state="readonly", width=5).pack(side=tk.LEFT, padx=(5, 0))
+
+        self.pdf2txt_text_layer = tk.BooleanVar(value=True)
+        ttk.Checkbutton(tab, text="Use existing PDF text and only OCR scanned pages", variable=self.pdf2txt_text_layer).pack(anchor=tk.W, pady=5)
+
+        self.pdf2txt_preprocess = tk.BooleanVar(value=False)
+        ttk.Checkbutton(tab, text="Clean up pages before OCR (grayscale, crop, deskew, binarize)", variable=self.pdf2txt_preprocess).pack(anchor=tk.W, pady=5)
+
+        self.pdf2txt_searchable = tk.BooleanVar(value=False)
+        ttk.Checkbutton(tab, text="Also write a searchable PDF (copyable text over the original pages)", variable=self.pdf2txt_searchable).pack(anchor=tk.W, pady=5)
+
+        ttk.Button(tab, text="Convert PDF to TXT", command=self.run_pdf2txt).pack(pady=10)
 
-        env_vars = ['TESSDATA_PREFIX', 'TESSERACT_PREFIX', 'TESSERACT_TESSDATA']
-        for env_var in env_vars:
-            path = os.environ.get(env_var)
-            if path and os.path.exists(path):
-                tessdata_paths.add(path)
-                if not path.endswith('tessdata'):
-                    tessdata_paths.add(os.path.join(path, 'tessdata'))
-
-        path_dirs = os.environ.get('PATH', '').split(os.pathsep)
-        for path_dir in path_dirs:
-            if 'tesseract' in path_dir.lower():
-                parent_dir = os.path.dirname(path_dir)
-                possible_paths = [
-                    os.path.join(path_dir, 'tessdata'),
-                    os.path.join(parent_dir, 'tessdata'),
-                    os.path.join(parent_dir, 'share', 'tessdata'),
-                    os.path.join(parent_dir, 'Tesseract-OCR', 'tessdata'),
-                ]
-                for possible_path in possible_paths:
-                    if os.path.exists(possible_path):
-                        tessdata_paths.add(possible_path)
-
-        if platform.system() == "Windows":
-            common_paths = [
-                os.path.join(os.environ.get('ProgramFiles', ''), 'Tesseract-OCR', 'tessdata'),
-                os.path.join(os.environ.get('ProgramFiles(x86)', ''), 'Tesseract-OCR', 'tessdata'),
-                os.path.join(os.environ.get('APPDATA', ''), 'Tesseract-OCR', 'tessdata'),
-                os.path.join(os.environ.get('LOCALAPPDATA', ''), 'Tesseract-OCR', 'tessdata'),
-            ]
-        elif platform.system() == "Linux":
-            common_paths = [
-                '/usr/share/tesseract-ocr/tessdata',
-                '/usr/share/tesseract-ocr/4.00/tessdata',
-                '/usr/share/tesseract-ocr/5/tessdata',
-                '/usr/local/share/tessdata',
-                '/usr/share/tessdata',
-            ]
-        elif platform.system() == "Darwin":
-            common_paths = [
-                '/usr/local/share/tessdata',
-                '/opt/homebrew/share/tessdata',
-                '/usr/local/Cellar/tesseract/*/share/tessdata',
-            ]
-        else:
-            common_paths = []
-
-        for path in common_paths:
-            if '*' in path:
-                import glob
-                expanded_paths = glob.glob(path)
-                for expanded_path in expanded_paths:
-                    if os.path.exists(expanded_path):
-                        tessdata_paths.add(expanded_path)
-            elif os.path.exists(path):
-                tessdata_paths.add(path)
-
-        for tessdata_path in tessdata_paths:
+    def start_language_scan(self):
+        def scan():
             try:
-                if os.path.exists(tessdata_path):
-                    for file in os.listdir(tessdata_path):
-                        if file.endswith('.traineddata'):
-                            lang_code = file.replace('.traineddata', '')
-                            if lang_code not in ('osd', 'equ'):
-                                languages.add(lang_code)
-            except (PermissionError, OSError):
-                continue
-
-        if tessdata_paths and not languages:
-            for tessdata_path in tessdata_paths:
-                try:
-                    for files in os.walk(tessdata_path):
-                        for file in files:
-                            if file.endswith('.traineddata'):
-                                lang_code = file.replace('.traineddata', '')
-                                if lang_code not in ('osd', 'equ'):
-                                    languages.add(lang_code)
-                except (PermissionError, OSError):
-                    continue
-
-        lang_list = sorted(list(languages))
-
-        if 'vie' in languages and 'eng' in languages:
-            lang_list.extend(['vie+eng', 'eng+vie'])
-        if 'fra' in languages and 'eng' in languages:
-            lang_list.extend(['fra+eng', 'eng+fra'])
-        if 'spa' in languages and 'eng' in languages:
-            lang_list.extend(['spa+eng', 'eng+spa'])
-        if 'deu' in languages and 'eng' in languages:
-            lang_list.extend(['deu+eng', 'eng+deu'])
-
-        if not lang_list:
-            lang_list = ['eng']
-
-        return lang_list
+                self.job_queue.put(('languages', langs.available_languages()))
+            except Exception as e:
+                self.log_to_console(f"Could not detect Tesseract languages: {e}")
+
+            # Warm the heavy imports while the user is still filling in the form
+            importlib.import_module('OCR_Images')
+            importlib.import_module('PDF2TXT')
+
+        threading.Thread(target=scan, daemon=True).start()
+
+    def set_languages(self, languages):
+        self.available_langs = languages
+        self.ocr_lang_combo.config(values=languages)
+        self.pdf2txt_lang_combo.config(values=languages)
+        self.lang_count_label.config(text=f"({len(languages)} languages detected)")
 
     def create_right_panel(self):
         right_frame = ttk.LabelFrame(self.main_frame, text="Console Output")
@@ -334,6 +334,16 @@ class Word2TXTGUI:
         self.console_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         self.console_text.config(state=tk.DISABLED)
 
+        progress_frame = ttk.Frame(right_frame)
+        progress_frame.pack(fill=tk.X, padx=5)
+        self.progress_bar = ttk.Progressbar(progress_frame, mode='determinate')
+        self.progress_bar.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.cancel_button = ttk.Button(progress_frame, text="Cancel", command=self.cancel_job, state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.RIGHT, padx=(5, 0))
+
+        self.progress_label = ttk.Label(right_frame, text="Idle")
+        self.progress_label.pack(fill=tk.X, padx=5)
+
         ttk.Button(right_frame, text="Clear Console", command=self.clear_console).pack(pady=5)
 
     def browse_pdf_input(self):
@@ -384,7 +394,22 @@ class Word2TXTGUI:
             self.ocr_output.delete(0, tk.END)
             self.ocr_output.insert(0, folder)
 
+    def browse_pdf2txt_input(self):
+        filename = filedialog.askopenfilename(filetypes=[("PDF files", "*.pdf")])
+        if filename:
+            self.pdf2txt_input.delete(0, tk.END)
+            self.pdf2txt_input.insert(0, filename)
+
+    def browse_pdf2txt_output(self):
+        folder = filedialog.askdirectory()
+        if folder:
+            self.pdf2txt_output.delete(0, tk.END)
+            self.pdf2txt_output.insert(0, folder)
+
     def run_pdf2png(self):
+        import PDF2PNG as pp
+        import PageDPI as pdpi
+
         pdf_file = self.pdf_input.get()
         output_folder = self.pdf_output.get()
         dpi = self.pdf_dpi.get()
@@ -401,24 +426,22 @@ class Word2TXTGUI:
         self.log_to_console(f"Output folder: {output_folder}")
 
         try:
-            dpi_value = int(dpi)
+            dpi_value = pdpi.parse_dpi(dpi)
         except ValueError:
-            self.log_to_console("ERROR: DPI must be a number")
-            messagebox.showerror("Invalid Input", "DPI must be a valid number")
+            self.log_to_console("ERROR: DPI must be a positive number or \"auto\"")
+            messagebox.showerror("Invalid Input", "DPI must be a positive number or \"auto\"")
             return
 
-        if dpi_value <= 0:
-            self.log_to_console("Negative number. Not allowed")
-            messagebox.showerror("Negative number.", "DPI must be a positive number")
-            return
+        if dpi_value != pdpi.AUTO and dpi_value > 1200:
+            self.log_to_console(f"Note: Using high DPI ({dpi_value}); large pages will be rendered in bands")
 
-        if dpi_value > 1200:
-            self.log_to_console(f"Note: Using high DPI ({dpi_value})")
+        self.log_to_console(f"DPI: {pdpi.dpi_label(dpi_value)}")
+        self.log_to_console(f"CPU cores: {self.pdf_cpu.get()}")
 
-        self.log_to_console(f"DPI: {dpi_value}")
+        workers = int(self.pdf_cpu.get())
 
-        try:
-            image_count = pp.extract_images_from_pdf(pdf_file, output_folder, dpi_value)
+        def job(events, cancel_event):
+            image_count = pp.extract_images_from_pdf(pdf_file, output_folder, dpi_value, workers=workers, events=events, cancel_event=cancel_event)
 
             if image_count > 0:
                 self.log_to_console(f"Successfully extracted {image_count} images from PDF")
@@ -426,11 +449,11 @@ class Word2TXTGUI:
             else:
                 self.log_to_console("Failed to extract images from PDF")
 
-        except Exception as e:
-            self.log_to_console(f"Error converting PDF: {e}")
-            messagebox.showerror("Error", f"Failed to process PDF: {e}")
+        self.start_job(job, "Error converting PDF", "Failed to process PDF")
 
     def run_word2png(self):
+        import Word2PNG as wp
+
         docx_file = self.docx_input.get()
         output_folder = self.docx_output.get()
 
@@ -444,20 +467,22 @@ class Word2TXTGUI:
 
         self.log_to_console(f"Running Word2PNG on: {docx_file}")
         self.log_to_console(f"Output folder: {output_folder}")
+        dedup = self.word_dedup.get()
+        incremental = self.word_incremental.get()
 
-        try:
-            success_count = wp.extract_images_zip_method(docx_file, output_folder)
+        def job(events, cancel_event):
+            success_count = wp.extract_images_zip_method(docx_file, output_folder, events, cancel_event, dedup, incremental)
 
             if success_count > 0:
                 self.log_to_console(f"Successfully extracted {success_count} images")
             else:
                 self.log_to_console("No images were extracted")
 
-        except Exception as e:
-            self.log_to_console(f"Error running Word2PNG: {e}")
-            messagebox.showerror("Error", f"Failed to extract images: {e}")
+        self.start_job(job, "Error running Word2PNG", "Failed to extract images")
 
     def run_jpeg2png(self):
+        import JPEG2PNG as jp
+
         input_folder = self.jpeg_input.get()
         output_folder = self.jpeg_output.get()
         conv_type = self.conv_type.get()
@@ -474,22 +499,28 @@ class Word2TXTGUI:
         self.log_to_console(f"Input folder: {input_folder}")
         self.log_to_console(f"Output folder: {output_folder}")
 
-        try:
+        profile = self.jpeg_profile.get()
+        incremental = self.jpeg_incremental.get()
+        workers = os.cpu_count()
+        self.log_to_console(f"Profile: {profile}, {workers} processes")
+
+        def job(events, cancel_event):
             if conv_type == "jpeg2png":
-                success_count = jp.convert_jpeg_to_png(input_folder, output_folder)
+                success_count = jp.convert_jpeg_to_png(input_folder, output_folder, events=events, cancel_event=cancel_event, workers=workers, profile=profile, incremental=incremental)
             else:
-                success_count = jp.convert_png_to_jpeg(input_folder, output_folder)
+                success_count = jp.convert_png_to_jpeg(input_folder, output_folder, events=events, cancel_event=cancel_event, workers=workers, profile=profile, incremental=incremental)
 
             if success_count > 0:
                 self.log_to_console(f"Successfully converted {success_count} images")
             else:
                 self.log_to_console("No images were converted")
 
-        except Exception as e:
-            self.log_to_console(f"Error running image conversion: {e}")
-            messagebox.showerror("Error", f"Failed to convert images: {e}")
+        self.start_job(job, "Error running image conversion", "Failed to convert images")
 
     def run_ocr(self):
+        import OCR_Images as ocrfast
+        import OCR_Images_slow as ocrslow
+
         input_folder = self.ocr_input.get()
         output_folder = self.ocr_output.get()
         mode = self.ocr_mode.get()
@@ -509,31 +540,178 @@ class Word2TXTGUI:
         self.log_to_console(f"Output folder: {output_folder}")
         self.log_to_console(f"Language: {language}")
 
-        available_langs = self.scan_tesseract_languages()
-        self.log_to_console(f"Available languages: {len(available_langs)} detected")
+        self.log_to_console(f"Available languages: {len(self.available_langs)} detected")
+
+        use_cache = self.ocr_use_cache.get()
+        preprocess = self.ocr_preprocess.get()
+        if mode == "fast":
+            self.log_to_console(f"CPU cores: {cpu}")
+
+        def job(events, cancel_event):
+            cache = None
+            try:
+                if use_cache:
+                    cache = ocrcache.OCRCache()
+                    self.log_to_console(f"OCR cache: {cache.path}")
+
+                if mode == "fast":
+                    success_count = ocrfast.fast_ocr_images(input_folder, output_folder, language, autotune.parse_workers(cpu), cache=cache, events=events, cancel_event=cancel_event, preprocess=preprocess)
+                else:
+                    success_count = ocrslow.ocr_images_to_individual_files(input_folder, output_folder, language, cache, events, cancel_event, preprocess)
+
+                if success_count > 0:
+                    self.log_to_console(f"Successfully processed {success_count} images")
+                else:
+                    self.log_to_console("No images were processed")
+            finally:
+                if cache is not None:
+                    cache.close()
+
+        self.start_job(job, "Error running OCR", "Failed to run OCR")
+
+    def run_pdf2txt(self):
+        import PDF2TXT as pt
+        import PageDPI as pdpi
+
+        pdf_file = self.pdf2txt_input.get()
+        output_folder = self.pdf2txt_output.get()
+        language = self.pdf2txt_lang.get()
+        cpu = self.pdf2txt_cpu.get()
+
+        if not pdf_file or not output_folder:
+            messagebox.showerror("Error", "Please provide both input PDF and output folder")
+            return
+
+        if not os.path.exists(pdf_file):
+            messagebox.showerror("Error", f"PDF file not found: {pdf_file}")
+            return
 
         try:
-            if mode == "fast":
-                self.log_to_console(f"CPU cores: {cpu}")
-                success_count = ocrfast.fast_ocr_images(input_folder, output_folder, language, int(cpu))
-            else:
-                success_count = ocrslow.ocr_images_to_individual_files(input_folder, output_folder, language)
+            dpi_value = pdpi.parse_dpi(self.pdf2txt_dpi.get())
+        except ValueError:
+            self.log_to_console("ERROR: DPI must be a positive number or \"auto\"")
+            messagebox.showerror("Invalid Input", "DPI must be a positive number or \"auto\"")
+            return
+
+        self.log_to_console(f"Running PDF2TXT on: {pdf_file}")
+        self.log_to_console(f"Output folder: {output_folder}")
+        self.log_to_console(f"Language: {language}")
+        self.log_to_console(f"DPI: {pdpi.dpi_label(dpi_value)}")
+        self.log_to_console(f"CPU cores: {cpu}")
+        text_layer = self.pdf2txt_text_layer.get()
+        preprocess = self.pdf2txt_preprocess.get()
+        if text_layer:
+            self.log_to_console("Pages with existing text will not be OCR'd")
+
+        searchable_pdf = None
+        if self.pdf2txt_searchable.get():
+            searchable_pdf = os.path.join(output_folder, f"{os.path.splitext(os.path.basename(pdf_file))[0]}.searchable.pdf")
+            self.log_to_console(f"Searchable PDF: {searchable_pdf}")
+
+        def job(events, cancel_event):
+            success_count = pt.pdf_to_text(pdf_file, output_folder, language, dpi_value, int(cpu), text_layer=text_layer, events=events, cancel_event=cancel_event, preprocess=preprocess, searchable_pdf=searchable_pdf)
 
             if success_count > 0:
-                self.log_to_console(f"Successfully processed {success_count} images")
+                self.log_to_console(f"Successfully processed {success_count} pages")
             else:
-                self.log_to_console("No images were processed")
+                self.log_to_console("No pages were processed")
 
-        except Exception as e:
-            self.log_to_console(f"Error running OCR: {e}")
-            messagebox.showerror("Error", f"Failed to run OCR: {e}")
+        self.start_job(job, "Error running PDF2TXT", "Failed to process PDF")
+
+    def start_job(self, job, log_error, dialog_error):
+        if self.job_thread is not None and self.job_thread.is_alive():
+            messagebox.showwarning("Busy", "Another job is still running. Wait for it to finish or cancel it first.")
+            return
+
+        self.cancel_event = threading.Event()
+        self.job_started = time.time()
+        self.progress_bar.config(value=0, maximum=1)
+        self.progress_label.config(text="Starting...")
+        self.cancel_button.config(state=tk.NORMAL)
+        cancel_event = self.cancel_event
+
+        def run():
+            try:
+                job(self.handle_event, cancel_event)
+            except Exception as e:
+                self.log_to_console(f"{log_error}: {e}")
+                self.job_queue.put(('error', "Error", f"{dialog_error}: {e}"))
+            finally:
+                self.job_queue.put(('finished', cancel_event.is_set()))
+
+        self.job_thread = threading.Thread(target=run, daemon=True)
+        self.job_thread.start()
+
+    def handle_event(self, event):
+        # Called from worker threads, so only hand the event over to the Tk thread
+        self.job_queue.put(('event', event))
+
+    def cancel_job(self):
+        self.cancel_event.set()
+        self.cancel_button.config(state=tk.DISABLED)
+        self.progress_label.config(text="Cancelling...")
+
+    def poll_job_queue(self):
+        lines = []
+        last_progress = None
+        finished = None
+        try:
+            while True:
+                event = self.job_queue.get_nowait()
+                kind = event[0]
+
+                if kind == 'log':
+                    lines.append(event[1])
+                elif kind == 'event':
+                    if event[1].message:
+                        lines.append(event[1].message)
+                    if event[1].total and event[1].kind in (progress.PAGE_DONE, progress.ERROR):
+                        last_progress = event[1]
+                elif kind == 'error':
+                    messagebox.showerror(event[1], event[2])
+                elif kind == 'languages':
+                    self.set_languages(event[1])
+                elif kind == 'finished':
+                    finished = event
+        except queue.Empty:
+            pass
+
+        # Only the latest page event matters for the progress bar
+        if last_progress is not None:
+            self.update_progress(last_progress.done, last_progress.total)
+
+        if finished is not None:
+            self.cancel_button.config(state=tk.DISABLED)
+            self.progress_label.config(text="Cancelled" if finished[1] else "Done")
+
+        # One insert per poll instead of one redraw per line
+        if lines:
+            self.console_text.config(state=tk.NORMAL)
+            self.console_text.insert(tk.END, "\n".join(lines) + "\n")
+            self.console_text.see(tk.END)
+            self.console_text.config(state=tk.DISABLED)
+
+        self.root.after(100, self.poll_job_queue)
+
+    def update_progress(self, done, total):
+        self.progress_bar.config(value=done, maximum=max(total, 1))
+
+        elapsed = time.time() - self.job_started
+        if done == 0 or elapsed <= 0:
+            self.progress_label.config(text=f"{done}/{total}")
+            return
+
+        rate = done / elapsed
+        eta = (total - done) / rate
+        self.progress_label.config(text=f"{done}/{total} - {rate:.2f} items/s - ETA {int(eta // 60)}m {int(eta % 60):02d}s")
 
     def log_to_console(self, message):
-        self.console_text.config(state=tk.NORMAL)
-        self.console_text.insert(tk.END, message + "\n")
-        self.console_text.see(tk.END)
-        self.console_text.config(state=tk.DISABLED)
-        self.root.update()
+        # Safe from any thread, the Tk widgets are only touched in poll_job_queue
+        self.job_queue.put(('log', message))
+
+    def on_close(self):
+        self.cancel_event.set()
+        self.root.destroy()
 
     def clear_console(self):
         self.console_text.config(state=tk.NORMAL)
@@ -556,6 +734,7 @@ class Word2TXTGUI:
         messagebox.showinfo("About", "Word2TXT v0.2\n\nA tool designed to convert DOCX files to TXT.\n\nCredits:\nSuperHero2010: Owner and Author of Word2TXT")
 
 def main():
+    multiprocessing.freeze_support()
     root = tk.Tk()
     app = Word2TXTGUI(root)
     root.mainloop()
@@ -0,0 +1,169 @@
+import os
+import sys
+import json
+import argparse
+import multiprocessing
+from pathlib import Path
+import PDF2PNG as pp
+import PDF2TXT as pt
+import Word2PNG as wp
+import JPEG2PNG as jp
+import OCR_Images as ocrfast
+import OCR_Images_slow as ocrslow
+import OCR_Cache as ocrcache
+import OCR_Engine as ocrengine
+import Autotune as autotune
+import Batch as batch
+import PageDPI as pdpi
+import Raster as raster
+import Sinks as snk
+import Pipeline as pl
+import JobServer as js
+import Progress as progress
+import Report as rpt
+
+TOOLS = {
+    'pdf2png': (pp, 'Render PDF pages to PNG files'),
+    'pdf2txt': (pt, 'OCR a PDF directly, without writing intermediate PNG files'),
+    'word2png': (wp, 'Extract the images embedded in DOCX files'),
+    'jpeg2png': (jp, 'Convert images between JPEG and PNG'),
+    'ocr': (ocrfast, 'OCR a folder of images in parallel'),
+    'ocr-slow': (ocrslow, 'OCR a folder of images one at a time'),
+    'serve': (js, 'Run a local job server that queues OCR jobs over HTTP'),
+}
+
+# Options that must come from the command line or --config. argparse can't see the config, so they are checked after parsing
+REQUIRED = {
+    'run': ('output',),
+    'pdf2png': ('output',),
+    'pdf2txt': ('input', 'output'),
+    'word2png': ('output',),
+    'jpeg2png': ('input', 'output'),
+    'ocr': ('input', 'output', 'workers'),
+    'ocr-slow': ('input', 'output'),
+}
+
+def add_pipeline_arguments(parser):
+    parser.add_argument('inputs', nargs='+', help='PDF files, DOCX files or folders of images')
+    parser.add_argument('-o', '--output', help='Output folder, required (one subfolder per input when several are given)')
+    parser.add_argument('--from', dest='source', choices=pl.CHOICES['source'], default='auto', help='Input type (default: from the file extension)')
+    parser.add_argument('--lang', default='eng', help='OCR language (vie, eng, vie+eng, etc. Default: eng)')
+    parser.add_argument('--workers', type=autotune.parse_workers, default=None, help='Workers shared by every stage, or "auto" to tune the OCR stage (default: CPU count)')
+    parser.add_argument('--engine', choices=pl.CHOICES['engine'], default='threads', help='OCR engine: threads, persistent worker processes, or the single-threaded slow mode (default: threads)')
+    parser.add_argument('--preprocess', action='store_true', help='Grayscale, crop, deskew, downscale and binarize images before OCR')
+    parser.add_argument('--format', type=snk.parse_formats, default=(snk.TXT,), help=f'Comma separated outputs: {", ".join(snk.FORMATS)} (default: txt)')
+    parser.add_argument('--dpi', type=pdpi.parse_dpi, default=200, help='PDF render resolution in DPI, or "auto" per page (default: 200)')
+    parser.add_argument('--min-dpi', type=int, default=pdpi.MIN_DPI, help=f'Lowest resolution --dpi auto may pick (default: {pdpi.MIN_DPI})')
+    parser.add_argument('--max-dpi', type=int, default=pdpi.MAX_DPI, help=f'Highest resolution --dpi auto may pick (default: {pdpi.MAX_DPI})')
+    parser.add_argument('--text-layer', action='store_true', help='Use the text already in a PDF and only OCR pages without one')
+    parser.add_argument('--min-text-chars', type=int, default=50, help='Minimum characters for a page text layer to be used (default: 50)')
+    parser.add_argument('--max-pixmap-mb', type=int, default=raster.DEFAULT_MAX_PIXMAP_MB, help=f'Largest bitmap rendered in one piece, per band: streaming OCR keeps up to 3 bands per worker in memory (default: {raster.DEFAULT_MAX_PIXMAP_MB}, 0 = no limit)')
+    parser.add_argument('--keep-images', action='store_true', help='Render PDFs to PNG files in <output>/images and OCR those, instead of streaming pages into OCR')
+    parser.add_argument('--convert', action='store_true', help='Convert JPEG images to PNG (in <output>/png) before OCR')
+    parser.add_argument('--profile', choices=list(jp.PROFILES), default=jp.DEFAULT_PROFILE, help=f'PNG encoder profile for --convert (default: {jp.DEFAULT_PROFILE})')
+    parser.add_argument('--no-dedup', dest='dedup', action='store_false', help='Extract and OCR repeated images separately')
+    parser.add_argument('--incremental', action='store_true', help='Skip DOCX files and images that are unchanged since the last run')
+    parser.add_argument('--no-resume', dest='resume', action='store_false', help='Redo every page instead of resuming from the job journal')
+    parser.add_argument('--cache', nargs='?', const=ocrcache.DEFAULT_CACHE_PATH, default=None, help=f'Reuse OCR results from this SQLite cache (default path: {ocrcache.DEFAULT_CACHE_PATH})')
+    parser.add_argument('--cache-size-mb', type=int, default=ocrcache.DEFAULT_CACHE_SIZE_MB, help=f'Maximum cache size (default: {ocrcache.DEFAULT_CACHE_SIZE_MB})')
+    parser.add_argument('--report', default=None, help='Write a JSON run report covering every stage and input to this path')
+
+def pipeline_settings(args):
+    return {key: getattr(args, key) for key in pl.DEFAULTS}
+
+def run_command(args):
+    report = rpt.RunReport('word2txt run', vars(args)) if args.report else None
+    events = progress.MultiSink(progress.ConsoleReporter(), report)
+    settings = pipeline_settings(args)
+
+    # One cache, one report and, with --engine processes, one warm OCR pool for every input and stage
+    cache = ocrcache.OCRCache(args.cache, args.cache_size_mb) if args.cache else None
+    pool = None
+    total = 0
+    failed = []
+    used_names = set()
+    try:
+        if args.engine == 'processes':
+            pool = ocrengine.create_ocr_pool(args.lang, pl.cpu_workers(args.workers), cache=cache, preprocess=args.preprocess)
+        for input_path in args.inputs:
+            if len(args.inputs) == 1:
+                output_folder = args.output
+            else:
+                output_folder = os.path.join(args.output, batch.unique_name(Path(os.path.abspath(input_path)).stem, used_names))
+            try:
+                count = pl.run_pipeline(input_path, output_folder, settings, cache, events, ocr_pool=pool)
+            except (OSError, ValueError) as e:
+                progress.emit(events, progress.ERROR, f"{input_path}: {e}", item=input_path, status='error', error=str(e))
+                count = 0
+
+            if not count:
+                failed.append(input_path)
+            total += count or 0
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if cache is not None:
+            cache.close()
+
+    if report is not None:
+        report.write(args.report)
+        print(f"Run report: {args.report}")
+
+    print("-" * 50)
+    print(f"OCR'd {total} pages from {len(args.inputs) - len(failed)} of {len(args.inputs)} inputs")
+    if failed:
+        print("Nothing was produced for: " + ", ".join(failed))
+        sys.exit(1)
+
+def load_config(path):
+    # Option defaults as JSON: top-level keys apply to every command, a nested object only to the command it is named after
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+    if not isinstance(config, dict):
+        raise ValueError(f"{path} must contain a JSON object")
+    return config
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='word2txt', description='Word2TXT without the GUI: every tool as a subcommand, plus a run pipeline that chains them')
+    parser.add_argument('--config', default=None, help='JSON file with option defaults, e.g. {"lang": "vie", "ocr": {"workers": 4}}')
+    subparsers = parser.add_subparsers(dest='command', metavar='command')
+    subparsers.required = True
+
+    run_parser = subparsers.add_parser('run', help='pdf | docx | images -> optional convert -> OCR -> outputs',
+                                       description='Run the whole pipeline: render or extract images, optionally convert them, OCR them and write every output format')
+    add_pipeline_arguments(run_parser)
+
+    for name, (module, description) in TOOLS.items():
+        subparser = subparsers.add_parser(name, help=description, description=description)
+        if name in REQUIRED:
+            module.add_arguments(subparser, required=False)
+        else:
+            module.add_arguments(subparser)
+
+    return parser, subparsers
+
+def main(argv=None):
+    multiprocessing.freeze_support()
+    parser, subparsers = build_parser()
+
+    config_parser = argparse.ArgumentParser(add_help=False)
+    config_parser.add_argument('--config', default=None)
+    known, _ = config_parser.parse_known_args(argv)
+    if known.config:
+        config = load_config(known.config)
+        shared = {key: value for key, value in config.items() if not isinstance(value, dict)}
+        for name, subparser in subparsers.choices.items():
+            defaults = dict(shared, **config.get(name, {}))
+            subparser.set_defaults(**defaults)
+
+    args = parser.parse_args(argv)
+    missing = [name for name in REQUIRED.get(args.command, ()) if getattr(args, name) is None]
+    if missing:
+        subparsers.choices[args.command].error("the following arguments are required: " + ", ".join(f"--{name}" for name in missing))
+    if args.command == 'run':
+        run_command(args)
+    else:
+        TOOLS[args.command][0].run(args)
+
+if __name__ == "__main__":
+    main()
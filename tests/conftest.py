@@ -0,0 +1,55 @@
+import os
+import sys
+import random
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+def fake_text(img):
+    return f"page {img.width}x{img.height}"
+
+@pytest.fixture
+def fake_tesseract(monkeypatch):
+    # Deterministic stand-in for the tesseract binary, so OCR paths run without it installed.
+    # Pool processes are forked and inherit the patched module.
+    import fitz
+    import pytesseract
+
+    def image_to_string(img, lang=None, config='', **kwargs):
+        return fake_text(img) + "\n"
+
+    def image_to_data(img, lang=None, config='', output_type=None, **kwargs):
+        words = fake_text(img).split()
+        count = len(words) + 5
+        data = {'level': [1, 2, 3, 4] + [5] * len(words) + [0], 'text': [''] * 4 + words + [''],
+                'conf': [-1] * 4 + [95] * len(words) + [-1]}
+        for key in ('page_num', 'block_num', 'par_num', 'line_num', 'word_num'):
+            data[key] = [1] * count
+        data['word_num'] = [0] * 4 + list(range(1, len(words) + 1)) + [0]
+        data['left'] = [0] * 4 + [10 + 60 * i for i in range(len(words))] + [0]
+        data['top'] = [0] * count
+        data['width'] = [img.width] * 4 + [50] * len(words) + [0]
+        data['height'] = [img.height] * 4 + [20] * len(words) + [0]
+        return data
+
+    def image_to_pdf_or_hocr(img, lang=None, config='', extension='pdf', **kwargs):
+        with fitz.open() as pdf:
+            page = pdf.new_page(width=img.width, height=img.height)
+            page.insert_text((10, 20), fake_text(img), render_mode=3)
+            return pdf.tobytes()
+
+    monkeypatch.setattr(pytesseract, 'image_to_string', image_to_string)
+    monkeypatch.setattr(pytesseract, 'image_to_data', image_to_data)
+    monkeypatch.setattr(pytesseract, 'image_to_pdf_or_hocr', image_to_pdf_or_hocr)
+    return fake_text
+
+@pytest.fixture
+def rng():
+    return random.Random(1234)
+
+@pytest.fixture
+def image_folder(tmp_path, rng):
+    import fixtures
+    return fixtures.write_ocr_pages(str(tmp_path / 'images'), 72, 3, rng)
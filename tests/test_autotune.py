@@ -0,0 +1,51 @@
+import os
+import pytest
+import Autotune as autotune
+
+def test_parse_workers():
+    assert autotune.parse_workers('AUTO') == autotune.AUTO
+    assert autotune.parse_workers('4') == 4
+    with pytest.raises(ValueError):
+        autotune.parse_workers('many')
+
+def test_candidates_split_the_same_cores():
+    assert autotune.candidate_configs(8) == [(8, 1), (4, 2), (2, 4)]
+    assert autotune.candidate_configs(1) == [(1, 1)]
+    assert autotune.default_threads_per_worker(2, cpu_count=16) == autotune.MAX_THREADS_PER_WORKER
+    assert autotune.default_threads_per_worker(8, cpu_count=4) == 1
+
+def test_keeps_the_fastest_split():
+    tuner = autotune.AutoTuner(1000, cpu_count=8)
+    assert tuner.next_probe() == (8, 1, 16)
+    tuner.record(8, 1, 16, 2.0)
+    assert tuner.next_probe() == (4, 2, 8)
+    tuner.record(4, 2, 8, 0.5)
+    assert tuner.next_probe() == (2, 4, 4)
+    tuner.record(2, 4, 4, 1.0)
+
+    assert tuner.next_probe() is None
+    assert tuner.best() == (4, 2)
+    assert tuner.remaining == 1000 - 28
+
+def test_stops_at_the_first_clear_drop():
+    tuner = autotune.AutoTuner(1000, cpu_count=8)
+    tuner.record(*tuner.next_probe(), 2.0)
+    tuner.record(*tuner.next_probe(), 2.0)
+    assert tuner.next_probe() is None
+    assert tuner.best() == (8, 1)
+
+def test_small_jobs_are_not_probed():
+    tuner = autotune.AutoTuner(10, cpu_count=8)
+    assert tuner.next_probe() is None
+    assert tuner.best() == (8, 1)
+
+def test_omp_thread_limit_is_restored(monkeypatch):
+    monkeypatch.setenv('OMP_THREAD_LIMIT', '3')
+    with autotune.omp_thread_limit(1):
+        assert os.environ['OMP_THREAD_LIMIT'] == '1'
+    assert os.environ['OMP_THREAD_LIMIT'] == '3'
+
+    monkeypatch.delenv('OMP_THREAD_LIMIT')
+    with autotune.omp_thread_limit(2):
+        pass
+    assert 'OMP_THREAD_LIMIT' not in os.environ
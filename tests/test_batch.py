@@ -0,0 +1,52 @@
+import os
+import json
+import Batch as batch
+
+def touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'wb').close()
+    return path
+
+def test_batch_input_detection(tmp_path):
+    assert batch.is_batch_input(str(tmp_path))
+    assert batch.is_batch_input('scans/*.pdf')
+    assert batch.is_batch_input(None, 'jobs.json')
+    assert not batch.is_batch_input(str(tmp_path / 'one.pdf'))
+
+def test_collect_documents_filters_and_sorts(tmp_path):
+    b = touch(str(tmp_path / 'b.PDF'))
+    a = touch(str(tmp_path / 'a.pdf'))
+    touch(str(tmp_path / 'notes.txt'))
+    nested = touch(str(tmp_path / 'sub' / 'c.pdf'))
+
+    assert batch.collect_documents(str(tmp_path), {'.pdf'}) == [a, b]
+    assert batch.collect_documents(str(tmp_path / '**' / '*.pdf'), {'.pdf'}) == sorted([a, nested])
+
+def test_json_manifest_paths_are_relative_to_the_manifest(tmp_path):
+    manifest = tmp_path / 'jobs' / 'jobs.json'
+    manifest.parent.mkdir()
+    manifest.write_text(json.dumps({'jobs': ['a.pdf', {'input': 'b.pdf', 'output': 'out/b'}, {'output': 'ignored'}]}))
+
+    base = str(manifest.parent)
+    assert batch.load_manifest(str(manifest)) == [(os.path.join(base, 'a.pdf'), None),
+                                                  (os.path.join(base, 'b.pdf'), os.path.join(base, 'out/b'))]
+
+def test_csv_manifest(tmp_path):
+    manifest = tmp_path / 'jobs.csv'
+    manifest.write_text('input,output\na.docx,\nb.docx,images/b\n,skipped\n')
+    assert batch.load_manifest(str(manifest)) == [(str(tmp_path / 'a.docx'), None), (str(tmp_path / 'b.docx'), str(tmp_path / 'images/b'))]
+
+def test_build_jobs_gives_each_document_its_own_folder(tmp_path):
+    touch(str(tmp_path / 'in' / 'report.pdf'))
+    manifest = tmp_path / 'jobs.json'
+    manifest.write_text(json.dumps(['other/report.pdf', {'input': 'x.pdf', 'output': 'custom'}]))
+
+    jobs = batch.build_jobs(str(tmp_path / 'in'), 'out', {'.pdf'}, str(manifest))
+    assert jobs == [(str(tmp_path / 'other/report.pdf'), os.path.join('out', 'report')),
+                    (str(tmp_path / 'x.pdf'), str(tmp_path / 'custom')),
+                    (str(tmp_path / 'in' / 'report.pdf'), os.path.join('out', 'report_02'))]
+
+def test_unique_name_and_interleave():
+    used = set()
+    assert [batch.unique_name('a', used) for _ in range(3)] == ['a', 'a_02', 'a_03']
+    assert batch.interleave([[1, 2, 3], [4], [5, 6]]) == [1, 4, 5, 2, 6, 3]
@@ -0,0 +1,90 @@
+import os
+import json
+import socket
+import asyncio
+import pytest
+import fixtures
+import JobServer as js
+import word2txt
+
+# One end-to-end run of every subcommand on the synthetic benchmark inputs
+
+def run(*argv):
+    word2txt.main([str(arg) for arg in argv])
+
+def names(folder, extension):
+    return sorted(name for name in os.listdir(folder) if name.endswith(extension))
+
+def test_pdf2png(tmp_path, rng):
+    pdf = fixtures.write_pdf(str(tmp_path / 'doc.pdf'), 3, rng, dpi=40)
+    run('pdf2png', '-i', pdf, '-o', tmp_path / 'png', '--dpi', 50, '--workers', 2, '--report', tmp_path / 'report.json')
+    assert len(names(tmp_path / 'png', '.png')) == 3
+    assert json.loads((tmp_path / 'report.json').read_text())['items'] == 3
+
+def test_pdf2txt(fake_tesseract, tmp_path, rng):
+    pdf = fixtures.write_pdf(str(tmp_path / 'doc.pdf'), 3, rng, dpi=40)
+    run('pdf2txt', '-i', pdf, '-o', tmp_path / 'txt', '--dpi', 50, '--workers', 2, '--text-layer')
+    assert names(tmp_path / 'txt', '.txt') == ['page_001.txt', 'page_002.txt', 'page_003.txt']
+
+def test_word2png(tmp_path, rng):
+    docx = fixtures.write_docx(str(tmp_path / 'doc.docx'), [fixtures.make_text_page(40, rng) for _ in range(3)])
+    run('word2png', '-i', docx, '-o', tmp_path / 'images')
+    assert len(os.listdir(tmp_path / 'images')) == 3
+
+def test_jpeg2png(tmp_path, rng):
+    fixtures.write_jpegs(str(tmp_path / 'jpg'), 3, rng, dpi=30)
+    run('jpeg2png', '-i', tmp_path / 'jpg', '-o', tmp_path / 'png', '--workers', 2, '--profile', 'fast')
+    assert names(tmp_path / 'png', '.png') == ['photo_001.png', 'photo_002.png', 'photo_003.png']
+
+@pytest.mark.parametrize('command', ['ocr', 'ocr-slow'])
+def test_ocr(fake_tesseract, image_folder, tmp_path, command):
+    argv = [command, '-i', image_folder, '-o', tmp_path / 'txt', '--format', 'txt,jsonl']
+    if command == 'ocr':
+        argv += ['--workers', 2]
+    run(*argv)
+    assert names(tmp_path / 'txt', '.txt') == ['page_001.txt', 'page_002.txt', 'page_003.txt']
+    assert len(names(tmp_path / 'txt', '.jsonl')) == 1
+
+def test_run(fake_tesseract, tmp_path, rng):
+    docx = fixtures.write_docx(str(tmp_path / 'doc.docx'), [fixtures.make_text_page(40, rng) for _ in range(2)])
+    run('run', docx, '-o', tmp_path / 'out', '--workers', 2, '--format', 'txt,merged')
+    assert len(names(tmp_path / 'out', '.txt')) == 3
+
+def test_failed_input_exits_with_an_error(tmp_path):
+    with pytest.raises(SystemExit) as exit_info:
+        run('run', tmp_path / 'missing.pdf', '-o', tmp_path / 'out')
+    assert exit_info.value.code == 1
+
+def test_serve(fake_tesseract, image_folder, tmp_path):
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    server = js.JobServer(workers=1, engine='threads', spool_folder=str(tmp_path / 'spool'))
+
+    async def call(method, path, body=b''):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(f"{method} {path} HTTP/1.1\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        return json.loads(response.partition(b'\r\n\r\n')[2])
+
+    async def scenario():
+        serving = asyncio.create_task(server.serve_forever(port=port))
+        await asyncio.sleep(0.2)
+        job = await call('POST', '/jobs', json.dumps({'input': image_folder, 'settings': {'format': 'txt,jsonl'}}).encode())
+        for _ in range(200):
+            status = await call('GET', f"/jobs/{job['id']}")
+            if status['status'] in js.FINAL:
+                break
+            await asyncio.sleep(0.05)
+        result = await call('GET', f"/jobs/{job['id']}/result")
+        serving.cancel()
+        return status, result
+
+    try:
+        status, result = asyncio.run(scenario())
+    finally:
+        server.close()
+    assert status['status'] == js.DONE and status['pages'] == 3
+    assert 'page_001.txt' in result['files'] and any(name.endswith('.jsonl') for name in result['files'])
@@ -0,0 +1,88 @@
+import os
+import shutil
+from PIL import Image, ImageDraw
+import Dedup as dd
+import Journal as jnl
+
+def copy(folder, source, name):
+    path = os.path.join(folder, name)
+    shutil.copyfile(source, path)
+    return path
+
+def test_plan_pages_finds_byte_identical_copies(image_folder):
+    first = os.path.join(image_folder, 'page_001.png')
+    repeat = copy(image_folder, first, 'page_009.png')
+    paths = [os.path.join(image_folder, name) for name in os.listdir(image_folder)]
+
+    pages, duplicates = dd.plan_pages(image_folder, paths)
+    assert pages == sorted(paths)
+    assert duplicates == {repeat: first}
+
+    assert dd.plan_pages(image_folder, paths, exact=False) == (sorted(paths), {})
+
+def test_plan_pages_adds_copies_listed_in_duplicates_json(image_folder):
+    dd.save_duplicates(image_folder, {'logo_2.png': 'page_002.png', 'missing_copy.png': 'gone.png'})
+    paths = [os.path.join(image_folder, name) for name in os.listdir(image_folder) if name.endswith('.png')]
+
+    pages, duplicates = dd.plan_pages(image_folder, paths)
+    logo = os.path.join(image_folder, 'logo_2.png')
+    assert logo in pages
+    assert duplicates == {logo: os.path.join(image_folder, 'page_002.png')}
+
+def test_only_files_that_share_a_size_are_hashed(image_folder, tmp_path, monkeypatch):
+    first = os.path.join(image_folder, 'page_001.png')
+    repeat = copy(image_folder, first, 'page_009.png')
+    paths = [os.path.join(image_folder, name) for name in os.listdir(image_folder)]
+    hashed = []
+    monkeypatch.setattr(jnl, 'file_sha256', lambda path: hashed.append(path) or dd.sha256_file(path))
+
+    journal = jnl.Journal(jnl.journal_path(str(tmp_path / 'out')))
+    try:
+        assert dd.plan_pages(image_folder, paths, journal=journal)[1] == {repeat: first}
+        assert sorted(hashed) == [first, repeat]
+
+        # A resumed run takes the hashes from the journal
+        hashed.clear()
+        assert dd.plan_pages(image_folder, paths, journal=journal)[1] == {repeat: first}
+        assert hashed == []
+    finally:
+        journal.close()
+
+def test_same_size_different_content_is_not_a_duplicate(tmp_path):
+    folder = str(tmp_path)
+    a = os.path.join(folder, 'a.bin')
+    b = os.path.join(folder, 'b.bin')
+    open(a, 'wb').write(b'x' * 100)
+    open(b, 'wb').write(b'y' * 100)
+    assert dd.plan_pages(folder, [a, b]) == ([a, b], {})
+
+def photo(x):
+    # A smooth picture with one shape, like the logos and photos that get re-encoded between documents
+    img = Image.merge('RGB', [Image.linear_gradient('L'), Image.radial_gradient('L'), Image.linear_gradient('L').rotate(90)]).resize((400, 300))
+    ImageDraw.Draw(img).ellipse((x, 50, x + 150, 200), fill=(200, 30, 30))
+    return img
+
+def test_similar_copies_match_by_perceptual_hash(tmp_path):
+    folder = str(tmp_path)
+    original = os.path.join(folder, 'a.png')
+    photo(50).save(original)
+    rescaled = os.path.join(folder, 'b.jpg')
+    photo(50).resize((200, 150), Image.LANCZOS).save(rescaled, quality=70)
+    different = os.path.join(folder, 'c.png')
+    photo(200).save(different)
+    paths = [original, rescaled, different]
+
+    assert dd.plan_pages(folder, paths, similar=False)[1] == {}
+    assert dd.plan_pages(folder, paths, similar=True)[1] == {rescaled: original}
+    assert dd.plan_pages(folder, paths, similar=True, max_distance=0)[1] == {}
+
+def test_dhash_distance():
+    img = Image.linear_gradient('L').resize((64, 64))
+    assert dd.hamming(dd.dhash(img), dd.dhash(img.resize((48, 48)))) <= dd.DEFAULT_MAX_DISTANCE
+    assert dd.hamming(dd.dhash(img), dd.dhash(img.transpose(Image.FLIP_TOP_BOTTOM).rotate(90))) > dd.DEFAULT_MAX_DISTANCE
+    assert dd.hamming(0b1011, 0b0010) == 2
+
+def test_resolve_follows_chains_and_drops_cycles():
+    assert dd.resolve({'c': 'b', 'b': 'a'}) == {'c': 'a', 'b': 'a'}
+    assert dd.resolve({'a': 'b', 'b': 'a'}) == {}
+    assert dd.copies_of({'c': 'a', 'b': 'a', 'e': 'd'}) == {'a': ['b', 'c'], 'd': ['e']}
@@ -0,0 +1,87 @@
+import os
+import json
+import asyncio
+import pytest
+import JobServer as js
+
+def request(server, raw):
+    # One request through handle_connection over a real local socket
+    async def exchange():
+        server.queue = asyncio.PriorityQueue()
+        listener = await asyncio.start_server(server.handle_connection, '127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+        async with listener:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(raw)
+            await writer.drain()
+            writer.write_eof()
+            response = await reader.read()
+            writer.close()
+        return response
+
+    response = asyncio.run(exchange())
+    head, _, body = response.partition(b'\r\n\r\n')
+    status = int(head.split(b' ')[1])
+    headers = dict(line.split(': ', 1) for line in head.decode('latin-1').split('\r\n')[1:])
+    assert int(headers['Content-Length']) == len(body)
+    return status, headers, body
+
+def finished_job(server, output):
+    job = js.Job('job1', str(output), str(output), {}, 0)
+    job.finish(js.DONE)
+    server.jobs[job.id] = job
+    return job
+
+def test_result_files_are_streamed(tmp_path, monkeypatch):
+    monkeypatch.setattr(js, 'DOWNLOAD_CHUNK', 1000)
+    data = os.urandom(5500)
+    (tmp_path / 'scan.searchable.pdf').write_bytes(data)
+    server = js.JobServer(workers=1, spool_folder=str(tmp_path / 'spool'))
+    finished_job(server, tmp_path)
+
+    status, headers, body = request(server, b'GET /jobs/job1/files/scan.searchable.pdf HTTP/1.1\r\n\r\n')
+    assert status == 200
+    assert headers['Content-Type'] == 'application/pdf'
+    assert body == data
+
+    status, _, body = request(server, b'GET /jobs/job1/files/..%2Fsecret HTTP/1.1\r\n\r\n')
+    assert status == 404
+
+def test_roots_limit_job_paths(tmp_path):
+    allowed = tmp_path / 'allowed'
+    allowed.mkdir()
+    (allowed / 'scans').mkdir()
+    server = js.JobServer(workers=1, spool_folder=str(tmp_path / 'spool'), roots=[str(allowed)])
+    server.queue = asyncio.Queue()
+
+    job = server.submit({'input': str(allowed / 'scans'), 'output': str(allowed / 'out')})
+    assert job.output == str(allowed / 'out')
+
+    with pytest.raises(js.HttpError) as error:
+        server.submit({'input': str(allowed / 'scans'), 'output': str(tmp_path / 'elsewhere')})
+    assert error.value.status == 403
+    with pytest.raises(js.HttpError) as error:
+        server.submit({'input': str(allowed / '..' / 'allowed2')})
+    assert error.value.status == 403
+
+def test_json_routes(tmp_path):
+    server = js.JobServer(workers=1, spool_folder=str(tmp_path / 'spool'))
+    status, _, body = request(server, b'GET /health HTTP/1.1\r\n\r\n')
+    assert status == 200 and json.loads(body)['status'] == 'ok'
+
+    status, _, body = request(server, b'GET /jobs/nope HTTP/1.1\r\n\r\n')
+    assert status == 404 and 'nope' in json.loads(body)['error']
+
+def test_uploads_are_written_to_the_spool(tmp_path, monkeypatch):
+    monkeypatch.setattr(js, 'UPLOAD_CHUNK', 1000)
+    data = os.urandom(4500)
+    server = js.JobServer(workers=1, spool_folder=str(tmp_path / 'spool'))
+
+    status, _, body = request(server, b'POST /jobs?filename=scan.pdf HTTP/1.1\r\nContent-Length: 4500\r\n\r\n' + data)
+    assert status == 202
+    job = server.jobs[json.loads(body)['id']]
+    assert open(job.input, 'rb').read() == data
+
+    status, _, _ = request(server, b'POST /jobs?filename=cut.pdf HTTP/1.1\r\nContent-Length: 4500\r\n\r\n' + data[:2000])
+    assert status == 400
+    assert sorted(os.listdir(tmp_path / 'spool')) == [job.id]
@@ -0,0 +1,112 @@
+import os
+import fixtures
+import Journal as jnl
+import OCR_Images as ocrfast
+import OCR_Images_slow as ocrslow
+import PDF2TXT as pt
+import Progress as progress
+
+def touch(path):
+    later = os.stat(path).st_mtime_ns + 5_000_000_000
+    os.utime(path, ns=(later, later))
+
+def test_done_needs_matching_signature_and_output(tmp_path):
+    output = tmp_path / 'page.txt'
+    output.write_text('text')
+    journal = jnl.Journal(jnl.journal_path(str(tmp_path)))
+    try:
+        journal.start('page.png', 'sig')
+        assert not journal.is_done('page.png', 'sig')
+
+        journal.done('page.png', 'sig', str(output))
+        assert journal.is_done('page.png', 'sig')
+        assert not journal.is_done('page.png', 'other settings')
+        assert journal.done_items('sig') == {'page.png'}
+
+        output.unlink()
+        assert not journal.is_done('page.png', 'sig')
+        assert journal.done_items('sig') == set()
+    finally:
+        journal.close()
+
+def test_failed_and_reset(tmp_path):
+    journal = jnl.Journal(jnl.journal_path(str(tmp_path)))
+    try:
+        journal.start('a.png', 'sig')
+        journal.failed('a.png', 'sig', RuntimeError('boom'))
+        assert journal.summary() == {jnl.FAILED: 1}
+        journal.reset()
+        assert journal.summary() == {}
+    finally:
+        journal.close()
+
+def test_file_signature_tracks_file_and_settings(tmp_path):
+    path = tmp_path / 'page.png'
+    path.write_bytes(b'1234')
+    signature = jnl.file_signature(str(path), 'eng', 200)
+
+    assert jnl.file_signature(str(path), 'eng', 200) == signature
+    assert jnl.file_signature(str(path), 'vie', 200) != signature
+    touch(str(path))
+    assert jnl.file_signature(str(path), 'eng', 200) != signature
+
+def test_source_outputs_survive_a_touch_but_not_a_change(tmp_path):
+    source = tmp_path / 'report.docx'
+    source.write_bytes(b'abcd')
+    output = tmp_path / 'image1.png'
+    output.write_bytes(b'png')
+    journal = jnl.Journal(jnl.journal_path(str(tmp_path / 'out')))
+    try:
+        journal.record_source(str(source), [str(output)], 'dedup')
+        assert journal.source_outputs(str(source), 'dedup') == [str(output)]
+        assert journal.source_outputs(str(source), 'no dedup') is None
+
+        touch(str(source))
+        assert journal.source_outputs(str(source), 'dedup') == [str(output)]
+
+        source.write_bytes(b'abce')
+        assert journal.source_outputs(str(source), 'dedup') is None
+        assert journal.recorded_outputs(str(source)) == [str(output)]
+    finally:
+        journal.close()
+
+def test_atomic_write_leaves_no_temp_files(tmp_path):
+    path = str(tmp_path / 'page.txt')
+    jnl.atomic_write_text(path, 'first')
+    jnl.atomic_write_text(path, 'second')
+    assert open(path, encoding='utf-8').read() == 'second'
+    assert os.listdir(str(tmp_path)) == ['page.txt']
+
+def finished(events):
+    return [event for event in events if event.kind == progress.FINISHED][-1]
+
+def test_resumed_fast_run_counts_skipped_pages_as_success(fake_tesseract, image_folder, tmp_path):
+    output = str(tmp_path / 'txt')
+    assert ocrfast.fast_ocr_images(image_folder, output, max_workers=2, events=progress.MultiSink()) == 3
+
+    events = []
+    assert ocrfast.fast_ocr_images(image_folder, output, max_workers=2, events=events.append) == 3
+    assert {event.status for event in events if event.kind == progress.PAGE_DONE} == {'skipped'}
+    assert finished(events).extra['skipped'] == 3
+    assert 'Speed' not in finished(events).message
+
+def test_resumed_slow_run_counts_skipped_pages_as_success(fake_tesseract, image_folder, tmp_path):
+    output = str(tmp_path / 'txt')
+    assert ocrslow.ocr_images_to_individual_files(image_folder, output, events=progress.MultiSink()) == 3
+
+    events = []
+    assert ocrslow.ocr_images_to_individual_files(image_folder, output, events=events.append) == 3
+    assert finished(events).extra['skipped'] == 3
+
+def test_resumed_pdf_run_only_redoes_missing_pages(fake_tesseract, tmp_path, rng):
+    pdf = fixtures.write_pdf(str(tmp_path / 'scan.pdf'), 4, rng, scanned_every=1, dpi=40)
+    output = tmp_path / 'txt'
+    assert pt.pdf_to_text(pdf, str(output), dpi=50, max_workers=2, events=progress.MultiSink()) == 4
+
+    (output / 'page_002.txt').unlink()
+    events = []
+    assert pt.pdf_to_text(pdf, str(output), dpi=50, max_workers=2, events=events.append) == 4
+    assert [event.item for event in events if event.kind == progress.PAGE_DONE] == ['page_002.txt']
+    assert finished(events).extra['skipped'] == 3
+
+    assert pt.pdf_to_text(pdf, str(output), dpi=50, max_workers=2, events=progress.MultiSink(), resume=False) == 4
@@ -0,0 +1,40 @@
+import os
+from PIL import Image, ImageDraw
+import fixtures
+import JPEG2PNG as jp
+
+def photo(path):
+    # A smooth picture; JPEG noise on scanned text leaves zlib little to gain at any level
+    img = Image.merge('RGB', [Image.linear_gradient('L'), Image.radial_gradient('L'), Image.linear_gradient('L').rotate(90)]).resize((800, 600))
+    ImageDraw.Draw(img).ellipse((100, 50, 400, 400), fill=(200, 30, 30))
+    img.save(path, 'JPEG', quality=85)
+    return path
+
+def test_fast_profile_trades_size_for_speed(tmp_path):
+    source = photo(str(tmp_path / 'photo.jpg'))
+    fast = jp.convert_file(source, str(tmp_path / 'fast.png'), profile='fast')
+    small = jp.convert_file(source, str(tmp_path / 'small.png'), profile='small')
+
+    assert fast['output_size'] > small['output_size']
+    with Image.open(str(tmp_path / 'fast.png')) as a, Image.open(str(tmp_path / 'small.png')) as b:
+        assert a.tobytes() == b.tobytes()
+
+def test_max_size_bounds_the_output(tmp_path, rng):
+    source = os.path.join(fixtures.write_jpegs(str(tmp_path / 'jpg'), 1, rng, dpi=60), 'photo_001.jpg')
+    with Image.open(source) as img:
+        width, height = img.size
+
+    jp.convert_file(source, str(tmp_path / 'page.png'), max_size=200)
+    with Image.open(str(tmp_path / 'page.png')) as img:
+        assert max(img.size) == 200
+        assert abs(img.width / img.height - width / height) < 0.02
+
+    png = str(tmp_path / 'page.png')
+    jp.convert_file(png, str(tmp_path / 'page.jpg'), target='jpeg', max_size=120)
+    with Image.open(str(tmp_path / 'page.jpg')) as img:
+        assert max(img.size) == 120
+
+    # Images already within the bound are left alone
+    jp.convert_file(source, str(tmp_path / 'full.png'), max_size=10000)
+    with Image.open(str(tmp_path / 'full.png')) as img:
+        assert img.size == (width, height)
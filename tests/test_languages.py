@@ -0,0 +1,53 @@
+import os
+import Languages as langs
+
+def touch(path):
+    later = os.stat(path).st_mtime_ns + 5_000_000_000
+    os.utime(path, ns=(later, later))
+
+def test_languages_are_cached_until_tesseract_changes(tmp_path, monkeypatch):
+    tessdata = tmp_path / 'tessdata'
+    tessdata.mkdir()
+    (tessdata / 'eng.traineddata').write_bytes(b'')
+    binary = tmp_path / 'tesseract'
+    binary.write_bytes(b'')
+    cache_path = str(tmp_path / 'cache' / 'languages.json')
+
+    scans = []
+    def scan_languages():
+        scans.append(1)
+        return ['eng'], {str(tessdata)}
+
+    monkeypatch.setattr(langs, 'scan_languages', scan_languages)
+    monkeypatch.setattr(langs, 'candidate_tessdata_dirs', set)
+    monkeypatch.setattr(langs.shutil, 'which', lambda name: str(binary))
+
+    assert langs.available_languages(cache_path) == ['eng']
+    assert langs.available_languages(cache_path) == ['eng']
+    assert len(scans) == 1
+    assert langs.load_cache(cache_path)['dirs'] == {str(tessdata): os.stat(tessdata).st_mtime_ns}
+
+    # A language installed into tessdata changes the folder
+    touch(str(tessdata))
+    assert langs.available_languages(cache_path) == ['eng']
+    assert len(scans) == 2
+    assert langs.available_languages(cache_path) == ['eng']
+    assert len(scans) == 2
+
+    # So does reinstalling tesseract, and an explicit refresh always scans
+    touch(str(binary))
+    langs.available_languages(cache_path)
+    assert len(scans) == 3
+    langs.available_languages(cache_path, refresh=True)
+    assert len(scans) == 4
+
+def test_broken_cache_is_ignored(tmp_path):
+    cache_path = tmp_path / 'languages.json'
+    cache_path.write_text('{not json')
+    assert langs.load_cache(str(cache_path)) is None
+    cache_path.write_text('{"version": 0, "dirs": {}}')
+    assert langs.cached_languages(str(cache_path)) is None
+
+def test_language_choices_add_pairs_with_english():
+    assert langs.language_choices({'eng', 'vie'}) == ['eng', 'vie', 'vie+eng', 'eng+vie']
+    assert langs.language_choices(set()) == ['eng']
@@ -0,0 +1,40 @@
+from PIL import Image
+import OCR_Cache as ocrcache
+
+def stored_bytes(cache):
+    return cache.conn.execute('SELECT COALESCE(SUM(size), 0) FROM ocr_cache').fetchone()[0]
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ocrcache.OCRCache(str(tmp_path / 'cache.sqlite3'))
+    cache.max_bytes = 1000
+    try:
+        # 50 bytes per entry, so 20 entries fill the cap
+        for i in range(ocrcache.EVICT_CHECK_INTERVAL - 4):
+            cache.put(f"k{i:03d}", 'x' * 46)
+        assert cache.get('k000') == 'x' * 46
+        for i in range(ocrcache.EVICT_CHECK_INTERVAL - 4, ocrcache.EVICT_CHECK_INTERVAL - 1):
+            cache.put(f"k{i:03d}", 'x' * 46)
+
+        # The bound is only checked every EVICT_CHECK_INTERVAL puts
+        assert stored_bytes(cache) > cache.max_bytes
+        cache.put(f"k{ocrcache.EVICT_CHECK_INTERVAL - 1:03d}", 'x' * 46)
+        assert stored_bytes(cache) <= cache.max_bytes
+
+        assert cache.get('k000') is not None
+        assert cache.get('k001') is None
+        assert cache.get(f"k{ocrcache.EVICT_CHECK_INTERVAL - 1:03d}") is not None
+    finally:
+        cache.close()
+
+def test_cached_ocr_runs_the_engine_once(tmp_path):
+    cache = ocrcache.OCRCache(str(tmp_path / 'cache.sqlite3'))
+    img = Image.new('L', (20, 10), 255)
+    calls = []
+    ocr = lambda im: calls.append(im) or 'text'
+    try:
+        assert ocrcache.cached_ocr(img, 'eng', '', cache, ocr) == ('text', False)
+        assert ocrcache.cached_ocr(img, 'eng', '', cache, ocr) == ('text', True)
+        assert ocrcache.cached_ocr(img, 'vie', '', cache, ocr) == ('text', False)
+        assert len(calls) == 2
+    finally:
+        cache.close()
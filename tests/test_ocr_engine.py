@@ -0,0 +1,44 @@
+import os
+import subprocess
+import sys
+from PIL import Image
+import OCR_Cache as ocrcache
+import OCR_Engine as ocrengine
+
+def test_tesserocr_options():
+    assert ocrengine.tesserocr_options('') == ({}, {})
+    assert ocrengine.tesserocr_options('--psm 6 --oem 1') == ({'psm': 6, 'oem': 1}, {})
+    assert ocrengine.tesserocr_options('--psm 6 -c preserve_interword_spaces=1') == ({'psm': 6}, {'preserve_interword_spaces': '1'})
+    # Anything tesserocr can't take makes the worker use the CLI
+    assert ocrengine.tesserocr_options('--psm x') is None
+    assert ocrengine.tesserocr_options('--dpi 300') is None
+    assert ocrengine.tesserocr_options('--psm') is None
+
+class FakeApi:
+    def SetImage(self, img):
+        self.img = img
+
+    def GetUTF8Text(self):
+        return "from tesserocr\n"
+
+def test_backends_are_cached_apart(fake_tesseract, tmp_path, monkeypatch):
+    cache = ocrcache.OCRCache(str(tmp_path / 'cache.sqlite3'))
+    monkeypatch.setattr(ocrengine, '_cache', cache)
+    img = Image.new('RGB', (40, 30), 'white')
+    try:
+        monkeypatch.setattr(ocrengine, '_api', None)
+        assert ocrengine.ocr_with_worker(img, {})[:2] == ("page 40x30", False)
+
+        monkeypatch.setattr(ocrengine, '_api', FakeApi())
+        assert ocrengine.ocr_with_worker(img, {})[:2] == ("from tesserocr", False)
+        assert ocrengine.ocr_with_worker(img, {})[:2] == ("from tesserocr", True)
+
+        monkeypatch.setattr(ocrengine, '_api', None)
+        assert ocrengine.ocr_with_worker(img, {})[:2] == ("page 40x30", True)
+    finally:
+        cache.close()
+
+def test_image_ocr_does_not_need_pymupdf():
+    src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+    code = "import sys; sys.modules['fitz'] = None; import OCR_Images, OCR_Images_slow, OCR_Engine"
+    subprocess.run([sys.executable, '-c', code], cwd=src, check=True)
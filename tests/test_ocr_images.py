@@ -0,0 +1,75 @@
+import os
+import threading
+import time
+import OCR_Images as ocrfast
+import Autotune as autotune
+
+def image_paths(folder):
+    return sorted(os.path.join(folder, name) for name in os.listdir(folder))
+
+def test_ordered_results_follow_the_input(fake_tesseract, image_folder):
+    paths = image_paths(image_folder) * 3
+    results = list(ocrfast.iter_ocr(paths, max_workers=3, ordered=True))
+
+    assert [path for path, _, _ in results] == paths
+    assert all(text.startswith('page ') and stats['chars'] == len(text) for _, text, stats in results)
+
+def test_unordered_results_yield_every_page_once(fake_tesseract, image_folder):
+    paths = image_paths(image_folder)
+    results = list(ocrfast.iter_ocr(iter(paths), max_workers=2))
+
+    assert sorted(path for path, _, _ in results) == paths
+
+def test_unreadable_image_is_reported_not_raised(fake_tesseract, image_folder, tmp_path):
+    broken = tmp_path / 'broken.png'
+    broken.write_bytes(b'not a png')
+    paths = [str(broken), str(tmp_path / 'missing.png')] + image_paths(image_folder)
+    results = {path: (text, stats) for path, text, stats in ocrfast.iter_ocr(paths, max_workers=2)}
+
+    assert len(results) == 5
+    for path in paths[:2]:
+        text, stats = results[path]
+        assert text is None and stats['error']
+
+def test_lazy_input_is_read_a_few_pages_ahead(fake_tesseract, image_folder):
+    paths = image_paths(image_folder) * 4
+    pulled = 0
+
+    def lazy():
+        nonlocal pulled
+        for path in paths:
+            pulled += 1
+            yield path
+
+    consumed = 0
+    for _ in ocrfast.iter_ocr(lazy(), max_workers=2):
+        assert pulled - consumed <= 2 * 2
+        consumed += 1
+    assert consumed == len(paths)
+
+def test_closing_early_cancels_pending_pages(monkeypatch):
+    monkeypatch.setenv('OMP_THREAD_LIMIT', '7')
+    release = threading.Event()
+    started = []
+
+    def ocr_image_file(path, *args):
+        started.append(path)
+        if path != 'p1':
+            release.wait(5)
+        return 'text', False, {}
+
+    monkeypatch.setattr(ocrfast, 'ocr_image_file', ocr_image_file)
+    results = ocrfast.iter_ocr((f"p{i}" for i in range(1, 11)), max_workers=2, ordered=True)
+
+    assert next(results)[0] == 'p1'
+    assert os.environ['OMP_THREAD_LIMIT'] == str(autotune.default_threads_per_worker(2))
+
+    # p2 and p3 are running, p4 is queued and gets cancelled, p5 onwards were never read
+    for _ in range(500):
+        if len(started) == 3:
+            break
+        time.sleep(0.01)
+    threading.Timer(0.2, release.set).start()
+    results.close()
+    assert sorted(started) == ['p1', 'p2', 'p3']
+    assert os.environ['OMP_THREAD_LIMIT'] == '7'
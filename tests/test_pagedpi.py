@@ -0,0 +1,49 @@
+import fitz
+import pytest
+import fixtures
+import PageDPI as pdpi
+import PDF2PNG as pp
+
+def test_parse_dpi():
+    assert pdpi.parse_dpi('Auto') == pdpi.AUTO
+    assert pdpi.parse_dpi('300') == 300
+    with pytest.raises(ValueError):
+        pdpi.parse_dpi('0')
+    assert pdpi.dpi_label(pdpi.AUTO, (120, 400)) == 'adaptive 120-400'
+
+def test_choose_dpi():
+    # 10 pt text lands at 300 DPI; smaller text gets more, rounded up to a step
+    assert pdpi.choose_dpi(9.6) == 300
+    assert pdpi.choose_dpi(9.5) == 325
+    assert pdpi.choose_dpi(14) == 225
+    assert pdpi.choose_dpi(2) == pdpi.MAX_DPI
+    assert pdpi.choose_dpi(72) == pdpi.MIN_DPI
+    assert pdpi.choose_dpi(12, (100, 200)) == 200
+    assert pdpi.choose_dpi(12) % pdpi.DPI_STEP == 0
+
+def test_page_dpi_from_fonts_probe_and_default(tmp_path, rng):
+    with fitz.open() as doc:
+        page = doc.new_page()
+        for y in range(80, 600, 20):
+            page.insert_text((50, y), "Small print on a born-digital page", fontsize=8)
+        assert pdpi.page_dpi(page) == (pdpi.choose_dpi(8), 'fonts')
+
+        blank = doc.new_page()
+        assert pdpi.page_dpi(blank) == (pdpi.DEFAULT_DPI, 'default')
+        assert pdpi.page_matrix(blank, 150)[1:] == (150, 'fixed')
+
+    pdf = fixtures.write_pdf(str(tmp_path / 'scan.pdf'), 1, rng, scanned_every=1, dpi=100)
+    with fitz.open(pdf) as doc:
+        dpi, source = pdpi.page_dpi(doc[0])
+    assert source == 'probe'
+    assert pdpi.MIN_DPI <= dpi <= pdpi.MAX_DPI
+
+def test_dpi_is_only_chosen_for_rendered_pages(tmp_path, rng, monkeypatch):
+    pdf = fixtures.write_pdf(str(tmp_path / 'doc.pdf'), 4, rng, dpi=40)
+    chosen = []
+    page_dpi = pdpi.page_dpi
+    monkeypatch.setattr(pdpi, 'page_dpi', lambda page, *args: chosen.append(page.number) or page_dpi(page, *args))
+
+    records = pp.render_page_range(pdf, str(tmp_path), pdpi.AUTO, 0, 4, text_layer=True, text_output_folder=str(tmp_path))
+    assert chosen == [1, 3]
+    assert [(r['kind'], 'dpi' in r, 'choose_dpi' in r['timings']) for r in records] == [('text', False, False), ('image', True, True)] * 2
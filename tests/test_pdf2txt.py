@@ -0,0 +1,97 @@
+import os
+import time
+import threading
+import pytest
+import fitz
+import pytesseract
+import fixtures
+import Journal as jnl
+import PDF2TXT as pt
+import SearchablePDF as searchable
+import Progress as progress
+
+def scanned_pdf(tmp_path, rng, pages=3):
+    return fixtures.write_pdf(str(tmp_path / 'scan.pdf'), pages, rng, scanned_every=1, dpi=40)
+
+def test_searchable_pdf_published_when_complete(fake_tesseract, tmp_path, rng):
+    pdf = scanned_pdf(tmp_path, rng)
+    searchable = str(tmp_path / 'out' / 'scan.searchable.pdf')
+
+    assert pt.pdf_to_text(pdf, str(tmp_path / 'out'), dpi=50, max_workers=2, events=progress.MultiSink(), searchable_pdf=searchable) == 3
+    assert os.path.exists(searchable)
+    assert not os.path.exists(searchable + '.tmp')
+    with fitz.open(searchable) as doc:
+        assert all('page' in page.get_text() for page in doc)
+
+def test_searchable_pdf_kept_as_partial_when_a_page_fails(fake_tesseract, monkeypatch, tmp_path, rng):
+    pdf = scanned_pdf(tmp_path, rng)
+    searchable = str(tmp_path / 'out' / 'scan.searchable.pdf')
+    calls = []
+    working = pytesseract.image_to_pdf_or_hocr
+
+    def flaky(img, **kwargs):
+        calls.append(1)
+        if len(calls) == 2:
+            raise RuntimeError("tesseract crashed")
+        return working(img, **kwargs)
+
+    monkeypatch.setattr(pytesseract, 'image_to_pdf_or_hocr', flaky)
+    events = []
+    assert pt.pdf_to_text(pdf, str(tmp_path / 'out'), dpi=50, max_workers=1, events=events.append, searchable_pdf=searchable) == 2
+
+    assert not os.path.exists(searchable)
+    assert os.path.exists(str(tmp_path / 'out' / 'scan.searchable.partial.pdf'))
+    assert events[-1].extra['searchable_pdf'].endswith('.partial.pdf')
+    assert 'incomplete' in events[-1].message
+
+def test_searchable_pdf_not_published_when_cancelled(fake_tesseract, tmp_path, rng):
+    pdf = scanned_pdf(tmp_path, rng)
+    searchable = str(tmp_path / 'out' / 'scan.searchable.pdf')
+    cancel = threading.Event()
+    cancel.set()
+
+    pt.pdf_to_text(pdf, str(tmp_path / 'out'), dpi=50, max_workers=1, events=progress.MultiSink(), cancel_event=cancel, searchable_pdf=searchable)
+    assert not os.path.exists(searchable)
+
+def test_searchable_writer_counts_pages_not_bands(fake_tesseract, tmp_path, rng):
+    pdf = scanned_pdf(tmp_path, rng)
+    layer = pytesseract.image_to_pdf_or_hocr(fixtures.make_text_page(40, rng))
+    writer = searchable.SearchablePdfWriter(pdf, str(tmp_path / 'out.pdf'), save_every=2)
+    saves = []
+    flush = writer.flush_locked
+    writer.flush_locked = lambda: saves.append(sorted(writer.pages)) or flush()
+
+    for band in range(3):
+        writer.add_text_layer(1, layer, fitz.Rect(0, band * 100, 612, band * 100 + 100))
+    assert writer.pages == {1} and saves == []
+    writer.add_text_layer(2, layer)
+    assert saves == [[1, 2]]
+    writer.close()
+
+def test_interrupt_waits_for_consumers_before_closing_the_journal(fake_tesseract, monkeypatch, tmp_path, rng):
+    pdf = scanned_pdf(tmp_path, rng, pages=6)
+    working = pytesseract.image_to_string
+    monkeypatch.setattr(pytesseract, 'image_to_string', lambda img, **kwargs: time.sleep(0.1) or working(img, **kwargs))
+
+    calls = []
+    for name in ('start', 'done', 'close'):
+        method = getattr(jnl.Journal, name)
+        monkeypatch.setattr(jnl.Journal, name, lambda self, *args, name=name, method=method: calls.append(name) or method(self, *args))
+
+    join = threading.Thread.join
+    interrupted = []
+    def interrupt_once(self, *args):
+        if not interrupted:
+            interrupted.append(1)
+            time.sleep(0.05)
+            raise KeyboardInterrupt
+        return join(self, *args)
+
+    monkeypatch.setattr(threading.Thread, 'join', interrupt_once)
+    with pytest.raises(KeyboardInterrupt):
+        pt.pdf_to_text(pdf, str(tmp_path / 'out'), dpi=50, max_workers=2, events=progress.MultiSink())
+    # Anything a consumer still had to write would land after the close
+    for thread in threading.enumerate():
+        if thread is not threading.current_thread():
+            join(thread, 2)
+    assert calls[-1] == 'close' and calls.count('close') == 1
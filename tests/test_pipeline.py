@@ -0,0 +1,66 @@
+import os
+import json
+import pytest
+import fixtures
+import Pipeline as pl
+import Progress as progress
+
+def quiet():
+    return progress.MultiSink()
+
+@pytest.mark.parametrize('engine', pl.CHOICES['engine'])
+def test_images_with_each_engine(fake_tesseract, image_folder, tmp_path, engine):
+    output = str(tmp_path / 'out')
+    count = pl.run_pipeline(image_folder, output, {'engine': engine, 'workers': 2}, events=quiet())
+
+    assert count == 3
+    txts = sorted(name for name in os.listdir(output) if name.endswith('.txt'))
+    assert txts == ['page_001.txt', 'page_002.txt', 'page_003.txt']
+
+@pytest.mark.parametrize('engine', pl.CHOICES['engine'])
+def test_docx_with_each_engine(fake_tesseract, tmp_path, rng, engine):
+    docx = fixtures.write_docx(str(tmp_path / 'doc.docx'), [fixtures.make_text_page(40, rng) for _ in range(3)])
+    output = str(tmp_path / 'out')
+
+    assert pl.run_pipeline(docx, output, {'engine': engine, 'workers': 2}, events=quiet()) == 3
+    assert len(os.listdir(os.path.join(output, 'images'))) == 3
+
+@pytest.mark.parametrize('engine', pl.CHOICES['engine'])
+def test_pdf_with_each_engine(fake_tesseract, tmp_path, rng, engine):
+    pdf = fixtures.write_pdf(str(tmp_path / 'doc.pdf'), 2, rng, dpi=40)
+    output = str(tmp_path / 'out')
+
+    # jsonl output goes through rendered PNGs, plain TXT streams pages straight into OCR
+    assert pl.run_pipeline(pdf, output, {'engine': engine, 'workers': 2, 'dpi': 50, 'format': ('txt', 'jsonl')}, events=quiet()) == 2
+    assert pl.run_pipeline(pdf, str(tmp_path / 'direct'), {'engine': 'threads', 'workers': 2, 'dpi': 50}, events=quiet()) == 2
+
+def test_convert_stage_copies_other_images(fake_tesseract, tmp_path, rng):
+    folder = tmp_path / 'mixed'
+    fixtures.write_jpegs(str(folder), 2, rng, dpi=30)
+    fixtures.make_text_page(30, rng).save(str(folder / 'scan.png'))
+    output = str(tmp_path / 'out')
+
+    assert pl.run_pipeline(str(folder), output, {'convert': True, 'workers': 1}, events=quiet()) == 3
+    assert sorted(os.listdir(os.path.join(output, 'png'))) == ['photo_001.png', 'photo_002.png', 'scan.png']
+
+def test_unknown_input_type(tmp_path):
+    path = tmp_path / 'notes.odt'
+    path.write_text('x')
+    with pytest.raises(ValueError):
+        pl.run_pipeline(str(path), str(tmp_path / 'out'), events=quiet())
+
+@pytest.mark.parametrize('engine', ['threads', 'slow'])
+def test_text_layer_pages_reach_every_output(fake_tesseract, tmp_path, rng, engine):
+    # Pages 1 and 3 have a text layer, page 2 is a scan
+    pdf = fixtures.write_pdf(str(tmp_path / 't.pdf'), 3, rng, dpi=40)
+    output = tmp_path / 'out'
+    settings = {'engine': engine, 'workers': 2, 'dpi': 50, 'text_layer': True, 'format': ('txt', 'merged', 'jsonl')}
+
+    assert pl.run_pipeline(pdf, str(output), settings, events=quiet()) == 3
+    records = [json.loads(line) for line in (output / 't.jsonl').read_text(encoding='utf-8').splitlines()]
+    assert [(r['page'], r['id'], r['status']) for r in records] == [(1, 'page_001.txt', 'text_layer'), (2, 'page_002.png', 'success'), (3, 'page_003.txt', 'text_layer')]
+    assert records[1]['text'].startswith('page ')
+    assert records[0]['text'] == (output / 'page_001.txt').read_text(encoding='utf-8')
+
+    merged = (output / 't.merged.txt').read_text(encoding='utf-8')
+    assert [line for line in merged.splitlines() if line.startswith('=====')] == ['===== Page 1: page_001.txt =====', '===== Page 2: page_002.png =====', '===== Page 3: page_003.txt =====']
@@ -0,0 +1,27 @@
+import numpy as np
+from PIL import Image
+import Preprocess as pre
+
+def reference_threshold(pixels, block_size, offset=10):
+    height, width = pixels.shape
+    radius = block_size // 2
+    out = np.zeros_like(pixels, dtype=np.uint8)
+    for y in range(height):
+        for x in range(width):
+            block = pixels[max(0, y - radius):y + radius + 1, max(0, x - radius):x + radius + 1].astype(np.int64)
+            out[y, x] = 255 if pixels[y, x] > block.mean() - offset else 0
+    return out
+
+def test_adaptive_threshold_matches_block_means():
+    rs = np.random.RandomState(0)
+    pixels = rs.randint(0, 256, size=(23, 37)).astype(np.uint8)
+    for block_size in (3, 9, 81):
+        result = np.asarray(pre.adaptive_threshold(Image.fromarray(pixels, 'L'), block_size))
+        assert np.array_equal(result, reference_threshold(pixels, block_size))
+
+def test_adaptive_threshold_keeps_text_under_uneven_lighting():
+    gradient = np.tile(np.linspace(60, 250, 200), (100, 1))
+    gradient[40:60, 20:180:10] -= 50
+    result = np.asarray(pre.adaptive_threshold(Image.fromarray(gradient.astype(np.uint8), 'L'), 41))
+    assert (result[45:55, 20:180:10] == 0).all()
+    assert (result[5:15, 5:195] == 255).all()
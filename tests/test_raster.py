@@ -0,0 +1,87 @@
+import os
+import fitz
+import pytest
+from PIL import Image, ImageChops
+import Raster as raster
+
+def text_page(doc, width=300, height=900):
+    page = doc.new_page(width=width, height=height)
+    for y in range(40, height - 40, 60):
+        page.insert_text((20, y), f"line at {y}", fontsize=14)
+    return page
+
+def test_band_rows_stay_under_the_cap_and_cover_the_page():
+    with fitz.open() as doc:
+        page = text_page(doc)
+        matrix = fitz.Matrix(2, 2)
+        width, height = raster.page_size_px(page, matrix)
+        max_bytes = width * 3 * 250
+
+        bands = raster.band_rows(page, matrix, max_bytes)
+        assert len(bands) > 1
+        assert bands[0][0] == 0 and bands[-1][1] == height
+        assert all(a[1] == b[0] for a, b in zip(bands, bands[1:]))
+        assert all((stop - start) * width * 3 <= max_bytes for start, stop in bands)
+        assert raster.band_rows(page, matrix, None) == [(0, height)]
+
+def test_banded_png_matches_a_single_render(tmp_path):
+    path = str(tmp_path / 'page.png')
+    with fitz.open() as doc:
+        page = text_page(doc)
+        matrix = fitz.Matrix(1.5, 1.5)
+        width, _ = raster.page_size_px(page, matrix)
+        bands = raster.save_png_banded(page, matrix, path, width * 3 * 200)
+        whole = page.get_pixmap(matrix=matrix, alpha=False)
+        expected = Image.frombytes('RGB', (whole.width, whole.height), whole.samples)
+
+    assert bands > 1
+    with Image.open(path) as img:
+        img.load()
+        assert img.size == expected.size
+        assert ImageChops.difference(img.convert('RGB'), expected).getbbox() is None
+
+def test_writer_pads_short_and_trims_tall_bands(tmp_path):
+    path = str(tmp_path / 'pad.png')
+    with fitz.open() as doc:
+        page = doc.new_page(width=10, height=10)
+        pix = page.get_pixmap(alpha=False)
+
+    writer = raster.StreamingPngWriter(path, 12, 25)
+    writer.add_pixmap(pix, 10)
+    writer.add_pixmap(pix, 20)
+    writer.close()
+
+    with Image.open(path) as img:
+        img.load()
+        assert img.size == (12, 25)
+        assert img.getpixel((11, 24)) == (255, 255, 255)
+
+def test_failed_render_removes_the_partial_png(tmp_path, monkeypatch):
+    path = str(tmp_path / 'page.png')
+
+    def failing_bands(page, matrix, max_bytes):
+        yield None, 10, page.get_pixmap(matrix=matrix, clip=fitz.Rect(0, 0, page.rect.width, 10), alpha=False)
+        raise RuntimeError("renderer crashed")
+
+    monkeypatch.setattr(raster, 'render_bands', failing_bands)
+    with fitz.open() as doc:
+        page = text_page(doc)
+        with pytest.raises(RuntimeError):
+            raster.save_png_banded(page, fitz.Matrix(1, 1), path, 1000)
+
+    assert not os.path.exists(path)
+
+def test_failed_close_removes_the_partial_png(tmp_path, monkeypatch):
+    path = str(tmp_path / 'page.png')
+
+    def failing_close(self):
+        self.file.write(b'IDAT')
+        raise OSError("disk full")
+
+    monkeypatch.setattr(raster.StreamingPngWriter, 'close', failing_close)
+    with fitz.open() as doc:
+        page = text_page(doc)
+        with pytest.raises(OSError):
+            raster.save_png_banded(page, fitz.Matrix(1, 1), path, 10000)
+
+    assert not os.path.exists(path)
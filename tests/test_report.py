@@ -0,0 +1,32 @@
+import json
+import Progress as progress
+import Report as rpt
+
+def test_percentile_interpolates():
+    assert rpt.percentile([], 50) == 0.0
+    assert rpt.percentile([5.0], 99) == 5.0
+    assert rpt.percentile([4, 1, 3, 2], 50) == 2.5
+    assert rpt.percentile(list(range(101)), 95) == 95
+    assert rpt.percentile([1, 2], 100) == 2
+
+def test_summarize():
+    assert rpt.summarize([]) == {'count': 0}
+    summary = rpt.summarize([1.0, 2.0, 3.0])
+    assert summary['count'] == 3 and summary['mean'] == 2.0 and summary['max'] == 3.0 and summary['p50'] == 2.0
+
+def test_report_aggregates_events(tmp_path):
+    report = rpt.RunReport('test', {'workers': 2})
+    progress.emit(report, progress.STARTED, total=3, workers=2)
+    progress.emit(report, progress.PAGE_DONE, item='a', status='success', timings={'tesseract': 0.5, 'total': 0.6})
+    progress.emit(report, progress.PAGE_DONE, item='b', status='cached', timings={'cache_lookup': 0.01, 'total': 0.02})
+    progress.emit(report, progress.ERROR, item='c', status='error', error='boom')
+    progress.emit(report, progress.FINISHED)
+
+    path = tmp_path / 'reports' / 'run.json'
+    report.write(str(path))
+    data = json.loads(path.read_text())
+    assert data['total'] == 3 and data['items'] == 3 and data['workers'] == 2
+    assert data['status'] == {'success': 1, 'cached': 1, 'error': 1}
+    assert data['latency']['count'] == 2
+    assert set(data['stages']) == {'tesseract', 'cache_lookup'}
+    assert data['errors'] == [{'item': 'c', 'error': 'boom'}]
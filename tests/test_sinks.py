@@ -0,0 +1,66 @@
+import os
+import json
+import pytest
+import xml.etree.ElementTree as ET
+import Sinks as snk
+
+def layout(words):
+    data = {'level': [1, 2, 3, 4] + [5] * len(words), 'text': [''] * 4 + words, 'conf': [-1] * 4 + [91.5] * len(words),
+            'left': [0, 5, 5, 5] + [5 + 40 * i for i in range(len(words))], 'top': [0, 5, 5, 5] + [5] * len(words),
+            'width': [200, 190, 190, 190] + [30] * len(words), 'height': [100, 20, 20, 20] + [20] * len(words)}
+    return snk.data_layout(data)
+
+def test_parse_formats():
+    assert snk.parse_formats('txt, JSONL') == ('txt', 'jsonl')
+    assert snk.parse_formats('') == (snk.TXT,)
+    with pytest.raises(ValueError):
+        snk.parse_formats('txt,docx')
+
+def test_layout_text_joins_words_and_lines():
+    page = layout(['Hello', '', 'world'])
+    assert snk.layout_text(page) == 'Hello world'
+    assert page['blocks'][0]['pars'][0]['lines'][0]['words'][1] == {'box': [85, 5, 115, 25], 'text': 'world', 'conf': 91.5}
+
+def test_pages_are_written_in_order(tmp_path):
+    sink = snk.JsonlSink(str(tmp_path), 'doc')
+    sink.write(3, 'c.png', 'three')
+    sink.write(1, 'a.png', 'one')
+    assert not os.path.exists(sink.path)
+    sink.write(2, 'b.png', 'two', {'status': 'cached'})
+    sink.close()
+
+    records = [json.loads(line) for line in open(sink.path, encoding='utf-8')]
+    assert [r['page'] for r in records] == [1, 2, 3]
+    assert records[1] == {'page': 2, 'id': 'b.png', 'text': 'two', 'status': 'cached'}
+    assert not os.path.exists(sink.temp_path)
+
+def test_pages_after_a_gap_are_written_on_close(tmp_path):
+    sink = snk.MergedTextSink(str(tmp_path), 'doc')
+    sink.write(1, 'a.png', 'one')
+    sink.write(4, 'd.png', 'four')
+    sink.write(3, 'c.png', None)
+    sink.close()
+
+    text = open(sink.path, encoding='utf-8').read()
+    assert text == "===== Page 1: a.png =====\none\n\n===== Page 4: d.png =====\nfour\n\n"
+
+def test_hocr_and_alto_are_well_formed(tmp_path):
+    sinks = snk.open_sinks(str(tmp_path), (snk.TXT, snk.HOCR, snk.ALTO), 'doc')
+    assert [type(sink) for sink in sinks] == [snk.HocrSink, snk.AltoSink]
+    snk.write_all(sinks, 2, 'b & "c".png', 'x', layout=layout(['<b>', 'a&b']))
+    snk.write_all(sinks, 1, 'a.png', 'y', layout=layout(['first']))
+    snk.write_all(sinks, 3, 'failed.png', None, {'status': 'error'})
+    snk.close_all(sinks)
+
+    hocr = ET.parse(str(tmp_path / 'doc.hocr')).getroot()
+    ns = {'h': 'http://www.w3.org/1999/xhtml'}
+    pages = hocr.findall('.//h:div[@class="ocr_page"]', ns)
+    assert [page.get('id') for page in pages] == ['page_1', 'page_2']
+    assert [word.text for word in pages[1].iter(f"{{{ns['h']}}}span") if word.get('class') == 'ocrx_word'] == ['<b>', 'a&b']
+
+    alto = ET.parse(str(tmp_path / 'doc.alto.xml')).getroot()
+    ns = {'a': 'http://www.loc.gov/standards/alto/ns-v3#'}
+    assert [page.get('ID') for page in alto.findall('.//a:Page', ns)] == ['page_1', 'page_2']
+    strings = alto.findall('.//a:Page[@ID="page_2"]//a:String', ns)
+    assert [s.get('CONTENT') for s in strings] == ['<b>', 'a&b']
+    assert strings[0].get('WC') == '0.92'
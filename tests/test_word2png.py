@@ -0,0 +1,62 @@
+import os
+import fixtures
+import Dedup as dd
+import Word2PNG as wp
+
+class Events:
+    def __init__(self):
+        self.events = []
+
+    def __call__(self, event):
+        self.events.append(event)
+
+    def finished(self):
+        return [event for event in self.events if event.kind == 'finished'][-1]
+
+def write_docx_with_repeats(path, rng):
+    page = fixtures.make_text_page(30, rng)
+    # image1 and image3 are both PNG copies of the same page
+    return fixtures.write_docx(path, [page, fixtures.make_text_page(30, rng), page])
+
+def test_extracts_every_image(tmp_path, rng):
+    docx = fixtures.write_docx(str(tmp_path / 'doc.docx'), [fixtures.make_text_page(30, rng) for _ in range(3)])
+    events = Events()
+
+    assert wp.extract_images_zip_method(docx, str(tmp_path / 'out'), events) == 3
+    assert sorted(os.listdir(tmp_path / 'out')) == ['image1.png', 'image2.jpeg', 'image3.png']
+
+def test_dedup_reports_skipped_without_incremental(tmp_path, rng):
+    docx = write_docx_with_repeats(str(tmp_path / 'doc.docx'), rng)
+    events = Events()
+
+    assert wp.extract_images_zip_method(docx, str(tmp_path / 'out'), events, dedup=True) == 2
+    assert dd.load_duplicates(str(tmp_path / 'out')) == {'image3.png': 'image1.png'}
+    assert events.finished().message == f"Skipped 1 duplicate images (listed in {dd.DUPLICATES_NAME})"
+
+def test_incremental_without_duplicates_has_no_footer(tmp_path, rng):
+    docx = fixtures.write_docx(str(tmp_path / 'doc.docx'), [fixtures.make_text_page(30, rng) for _ in range(2)])
+    events = Events()
+
+    assert wp.extract_images_zip_method(docx, str(tmp_path / 'out'), events, incremental=True) == 2
+    assert events.finished().message == ""
+
+def test_incremental_skips_unchanged_and_replaces_changed(tmp_path, rng):
+    docx = str(tmp_path / 'doc.docx')
+    output = str(tmp_path / 'out')
+    fixtures.write_docx(docx, [fixtures.make_text_page(30, rng) for _ in range(2)])
+    assert wp.extract_images_zip_method(docx, output, Events(), incremental=True) == 2
+
+    events = Events()
+    assert wp.extract_images_zip_method(docx, output, events, incremental=True) == 2
+    assert events.finished().status == 'skipped'
+
+    # A changed document replaces its images instead of adding _01 copies
+    fixtures.write_docx(docx, [fixtures.make_text_page(30, rng) for _ in range(3)])
+    os.utime(docx, (1, 1))
+    assert wp.extract_images_zip_method(docx, output, Events(), incremental=True) == 3
+    assert sorted(name for name in os.listdir(output) if not name.startswith('.')) == ['image1.png', 'image2.jpeg', 'image3.png']
+
+def test_iter_docx_images_marks_repeats(tmp_path, rng):
+    docx = write_docx_with_repeats(str(tmp_path / 'doc.docx'), rng)
+    items = [(name, data is None, original) for name, data, original in wp.iter_docx_images(docx, dedup=True)]
+    assert items == [('image1.png', False, None), ('image2.jpeg', False, None), ('image3.png', True, 'image1.png')]
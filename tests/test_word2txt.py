@@ -0,0 +1,48 @@
+import os
+import json
+import pytest
+from pathlib import Path
+import fixtures
+import OCR_Engine as ocrengine
+import word2txt
+
+def test_run_gives_inputs_with_the_same_name_their_own_folders(fake_tesseract, tmp_path, rng):
+    Path(tmp_path / 'a').mkdir()
+    Path(tmp_path / 'b').mkdir()
+    first = fixtures.write_pdf(str(tmp_path / 'a' / 'report.pdf'), 1, rng, dpi=40)
+    second = fixtures.write_docx(str(tmp_path / 'b' / 'report.docx'), [fixtures.make_text_page(40, rng)])
+    output = tmp_path / 'out'
+
+    word2txt.main(['run', first, second, '-o', str(output), '--workers', '1', '--dpi', '50'])
+    assert sorted(os.listdir(output)) == ['report', 'report_02']
+    assert 'page_001.txt' in os.listdir(output / 'report')
+    assert any(name.endswith('.txt') for name in os.listdir(output / 'report_02'))
+
+def test_config_can_supply_required_options(fake_tesseract, image_folder, tmp_path):
+    config = tmp_path / 'job.json'
+    config.write_text(json.dumps({'ocr': {'output': str(tmp_path / 'out'), 'workers': 1}}))
+
+    word2txt.main(['--config', str(config), 'ocr', '-i', image_folder])
+    assert len([name for name in os.listdir(tmp_path / 'out') if name.endswith('.txt')]) == 3
+
+def test_missing_required_options_are_reported(tmp_path, capsys):
+    with pytest.raises(SystemExit):
+        word2txt.main(['ocr', '-i', str(tmp_path)])
+    assert 'required: --output, --workers' in capsys.readouterr().err
+
+    with pytest.raises(SystemExit):
+        word2txt.main(['run', str(tmp_path)])
+    assert 'required: --output' in capsys.readouterr().err
+
+def test_run_shares_one_process_pool(fake_tesseract, tmp_path, rng, monkeypatch):
+    pools = []
+    create_ocr_pool = ocrengine.create_ocr_pool
+    monkeypatch.setattr(ocrengine, 'create_ocr_pool', lambda *args, **kwargs: pools.append(create_ocr_pool(*args, **kwargs)) or pools[-1])
+    pdf = fixtures.write_pdf(str(tmp_path / 'scan.pdf'), 2, rng, scanned_every=1, dpi=40)
+    docx = fixtures.write_docx(str(tmp_path / 'doc.docx'), [fixtures.make_text_page(40, rng)])
+
+    word2txt.main(['run', pdf, docx, '-o', str(tmp_path / 'out'), '--workers', '2', '--dpi', '50', '--engine', 'processes'])
+    assert len(pools) == 1
+    assert len(os.listdir(tmp_path / 'out' / 'scan')) > 2
+    with pytest.raises(RuntimeError):
+        pools[0].submit(len, '')